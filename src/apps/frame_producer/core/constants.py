@@ -0,0 +1,2 @@
+FRAME_PRODUCER_FPS = 60
+FRAME_PRODUCER_MONITOR = 1  # mss monitor index, 1 is the primary monitor
@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+import time
+from logging import Logger
+from typing import Iterator
+
+import mss
+import numpy as np
+
+from src.apps.frame_producer.core.constants import (
+    FRAME_PRODUCER_FPS,
+    FRAME_PRODUCER_MONITOR,
+)
+from src.apps.frame_producer.core.socket_handler import FrameProducerHandler
+from src.config.settings import FRAME_PRODUCER_REPLAY_DIR
+from src.core.constants import REPLAY_FRAMES_ORIGIN
+from src.utils.frame_bus import FrameBusProducer
+from src.utils.frame_replay import read_recording
+from src.utils.screen_capture import Area, ScreenCaptureService
+
+
+class FrameProducer:
+    """Captures the screen once for every detector and publishes the frames on
+    the frame bus, or loops over recorded frames when given a replay folder or
+    video."""
+
+    def __init__(
+        self,
+        socket_handler: FrameProducerHandler,
+        logger: Logger,
+        replay_dir: str = FRAME_PRODUCER_REPLAY_DIR,
+    ):
+        self.socket_handler = socket_handler
+        self.logger = logger
+        self.replay_dir = replay_dir
+
+    def live_frames(self) -> tuple[Area, Iterator[np.ndarray]]:
+        with mss.mss() as sct:
+            monitor = sct.monitors[FRAME_PRODUCER_MONITOR]
+        area = {key: monitor[key] for key in ("left", "top", "width", "height")}
+        capture = ScreenCaptureService({"screen": area})
+
+        def frames():
+            try:
+                while True:
+                    yield capture.grab_regions()["screen"]
+            finally:
+                capture.close()
+
+        return area, frames()
+
+    def recorded_frames(self) -> tuple[Area, Iterator[np.ndarray]]:
+        frames = [recorded.frame for recorded in read_recording(self.replay_dir)]
+        height, width, _ = frames[0].shape
+        area = {**REPLAY_FRAMES_ORIGIN, "width": width, "height": height}
+        print(f"Replaying {len(frames)} recorded frames from {self.replay_dir}")
+        return area, itertools.cycle(frames)
+
+    async def publish_frames(self):
+        area, frames = self.recorded_frames() if self.replay_dir else self.live_frames()
+        bus = FrameBusProducer(area)
+        self.logger.info(f"Publishing {area} frames on the frame bus")
+        interval = 1 / FRAME_PRODUCER_FPS
+        next_frame_at = time.perf_counter()
+        report_at = time.perf_counter() + 1
+        published = 0
+        try:
+            while not self.socket_handler.stop_event.is_set():
+                bus.publish(next(frames))
+                published += 1
+
+                now = time.perf_counter()
+                if now >= report_at:
+                    print(
+                        f"Publishing at {published / (now - report_at + 1):.1f} fps",
+                        end="\r",
+                    )
+                    report_at = now + 1
+                    published = 0
+                # Paced on a fixed schedule, a late frame does not delay the next ones
+                next_frame_at = max(next_frame_at + interval, now)
+                await asyncio.sleep(next_frame_at - now)
+        finally:
+            bus.close()
@@ -0,0 +1,7 @@
+from src.connection.socket_server import BaseHandler
+
+
+class FrameProducerHandler(BaseHandler):
+    async def process_message(self, message: str):
+        self.logger.info(f"Socket received: {message}")
+        await self.send_ack()
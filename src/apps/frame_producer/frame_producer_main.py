@@ -0,0 +1,51 @@
+import asyncio
+
+from src.apps.frame_producer.core.frame_producer import FrameProducer
+from src.apps.frame_producer.core.socket_handler import FrameProducerHandler
+from src.core.constants import STOP_SUBPROCESS_MESSAGE, SUBPROCESSES_PORTS
+from src.core.constants import TERMINAL_WINDOW_SLOTS_DB_FILE_PATH as SLOTS_DB
+from src.utils.helpers import construct_script_name, print_countdown
+from src.utils.logging_utils import setup_logger
+from src.utils.script_initializer import setup_script
+
+PORT = SUBPROCESSES_PORTS["frame_producer"]
+SCRIPT_NAME = construct_script_name(__file__)
+
+logger = setup_logger(SCRIPT_NAME, "DEBUG")
+
+
+async def main():
+    socket_server_task = None
+    slots_db_conn = None
+    try:
+        slots_db_conn, slot = await setup_script(SCRIPT_NAME, SLOTS_DB)
+        if slot is None:
+            logger.error("No slot available, exiting.")
+            return
+
+        socket_server_handler = FrameProducerHandler(
+            port=PORT, stop_message=STOP_SUBPROCESS_MESSAGE, logger=logger
+        )
+        socket_server_task = asyncio.create_task(
+            socket_server_handler.run_socket_server()
+        )
+
+        frame_producer = FrameProducer(socket_server_handler, logger)
+        await frame_producer.publish_frames()
+
+    except Exception as e:
+        print(f"Unexpected error of type: {type(e).__name__}: {e}")
+        logger.exception(f"Unexpected error: {e}")
+        raise
+
+    finally:
+        if socket_server_task:
+            socket_server_task.cancel()
+            await socket_server_task
+        if slots_db_conn:
+            await slots_db_conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    print_countdown()
@@ -1,9 +1,12 @@
 import os
 
-import cv2 as cv
-
+from src.apps.pregame_phase_detector.core.transitions import (
+    Transition,
+    TransitionGroup,
+)
 from src.config.settings import PROJECT_DIR_PATH
 from src.core.terminal_window_manager_v4 import SecondaryWindow
+from src.utils.signal_filter import FilterSettings
 
 # Opencv windows parameters, for resizing and moving using terminal_window_manager_v4
 SECONDARY_WINDOWS = [
@@ -16,6 +19,115 @@ SECONDARY_WINDOWS = [
 ]
 
 
+# Detectors, each matching a screen area against a template
+DETECTORS = (
+    "hero_pick",
+    "starting_buy",
+    "dota_tab",
+    "desktop_tab",
+    "settings",
+    "in_game",
+)
+MATCH_TARGET = 0.7  # ssim at which a detector is considered matching
+MATCH_EXIT = 0.65  # ssim under which a matching detector stops matching
+# Scores of each detector are filtered so that a score hovering around the
+# target does not flip the state back and forth
+DETECTOR_FILTERS = {
+    name: FilterSettings(enter=MATCH_TARGET, exit=MATCH_EXIT) for name in DETECTORS
+}
+VS_SCREEN_HOLD = 0.5  # seconds of nothing matching meaning the vs screen
+
+# State machine of the detector, run in order on every scan. Only the detectors
+# the possible transitions need in the current state are captured and scored.
+TRANSITION_GROUPS = (
+    TransitionGroup(
+        (
+            Transition(
+                "set_state_game_found",
+                matching=("hero_pick",),
+                requires=("game_phase.finding_game",),
+            ),
+        )
+    ),
+    TransitionGroup(
+        (
+            Transition(
+                "wait_for_settings_screen_exiting_fade_out",
+                not_matching=("settings", "desktop_tab"),
+                requires=("tabbed.to_settings_screen",),
+            ),
+            Transition(
+                "wait_for_starting_buy_screen_transition_out",
+                matching=("hero_pick",),
+                not_matching=("starting_buy", "dota_tab", "desktop_tab"),
+                requires=("game_phase.starting_buy",),
+            ),
+        ),
+        excludes=("game_phase.finding_game",),
+    ),
+    TransitionGroup(
+        (
+            Transition(
+                "set_state_dota_menu",
+                matching=("dota_tab",),
+                excludes=("tabbed.to_dota_menu",),
+            ),
+            Transition(
+                "set_state_desktop",
+                matching=("desktop_tab",),
+                excludes=("tabbed.to_desktop",),
+            ),
+            Transition(
+                "set_state_settings_screen",
+                matching=("settings",),
+                excludes=("tabbed.to_settings_screen",),
+            ),
+        ),
+        excludes=("game_phase.finding_game",),
+    ),
+    TransitionGroup(
+        (
+            Transition(
+                "set_state_starting_buy",
+                matching=("starting_buy",),
+                excludes=("game_phase.starting_buy",),
+            ),
+            Transition(
+                "set_back_state_hero_pick",
+                matching=("hero_pick",),
+                not_matching=("starting_buy", "settings", "desktop_tab"),
+                excludes=("game_phase.hero_pick",),
+            ),
+            Transition(
+                "set_state_in_game",
+                matching=("in_game",),
+                excludes=("game_phase.in_game",),
+            ),
+            Transition(
+                # Nothing matching for a while means vs screen (normally)
+                "set_state_vs_screen",
+                not_matching=DETECTORS,
+                excludes=("game_phase.versus_screen",),
+                hold=VS_SCREEN_HOLD,
+            ),
+        ),
+        excludes=("game_phase.finding_game",),
+    ),
+)
+
+# Seconds between two scans in each game phase (see PickPhase), stretched by the
+# scheduler while nothing changes. Fast where a transition is about to happen.
+PHASE_SCAN_INTERVALS = {
+    "finding_game": 0.25,
+    "hero_pick": 0.02,
+    "starting_buy": 0.02,
+    "versus_screen": 0.05,
+    "in_game": 0.25,
+    "unknown": 0.05,  # tabbed out
+}
+DEFAULT_SCAN_INTERVAL = 0.02
+
+
 # Screen areas
 DOTA_TAB_AREA = {"left": 1860, "top": 10, "width": 60, "height": 40}
 STARTING_BUY_AREA = {"left": 860, "top": 120, "width": 400, "height": 30}
@@ -27,61 +139,47 @@ HERO_PICK_AREA = {"left": 1658, "top": 1028, "width": 62, "height": 38}
 NEW_CAPTURE_AREA = {"left": 0, "top": 0, "width": 0, "height": 0}
 
 
-# Path to open CV templates
-DOTA_TAB_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_menu_power_icon.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+# Paths to open CV templates, compiled into the template pack on first use
+DOTA_TAB_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_menu_power_icon.jpg",
 )
-
-IN_GAME_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_courier_deliver_items_icon.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+IN_GAME_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_courier_deliver_items_icon.jpg",
 )
-
-STARTING_BUY_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_strategy-load-out-world-guides.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+STARTING_BUY_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_strategy-load-out-world-guides.jpg",
 )
-
-PLAY_DOTA_BUTTON_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_play_dota_button.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+PLAY_DOTA_BUTTON_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_play_dota_button.jpg",
 )
-
-DESKTOP_TAB_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/windows_desktop_icons.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+DESKTOP_TAB_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/windows_desktop_icons.jpg",
 )
-
-SETTINGS_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_settings_icon.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+SETTINGS_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_settings_icon.jpg",
+)
+HERO_PICK_TEMPLATE_PATH = os.path.join(
+    PROJECT_DIR_PATH,
+    "src/apps/pregame_phase_detector/data/opencv/dota_hero_select_chat_icons.jpg",
 )
 
-HERO_PICK_TEMPLATE = cv.imread(
-    os.path.join(
-        PROJECT_DIR_PATH,
-        "src/apps/pregame_phase_detector/data/opencv/dota_hero_select_chat_icons.jpg",
-    ),
-    cv.IMREAD_GRAYSCALE,
+TEMPLATE_SOURCES = {
+    "dota_tab": DOTA_TAB_TEMPLATE_PATH,
+    "in_game": IN_GAME_TEMPLATE_PATH,
+    "starting_buy": STARTING_BUY_TEMPLATE_PATH,
+    "play_dota_button": PLAY_DOTA_BUTTON_TEMPLATE_PATH,
+    "desktop_tab": DESKTOP_TAB_TEMPLATE_PATH,
+    "settings": SETTINGS_TEMPLATE_PATH,
+    "hero_pick": HERO_PICK_TEMPLATE_PATH,
+}
+TEMPLATE_PACK_PATH = os.path.join(
+    PROJECT_DIR_PATH, "src/apps/pregame_phase_detector/data/opencv/templates.npz"
 )
 
 
@@ -1,5 +1,4 @@
 import asyncio
-import time
 
 from src.apps.pregame_phase_detector.core.constants import (
     DSLR_HIDE_VS_SCREEN,
@@ -8,16 +7,13 @@ from src.apps.pregame_phase_detector.core.constants import (
     SCENE_CHANGE_FOR_PREGAME,
     SCENE_CHANGE_IN_GAME,
 )
-from src.apps.pregame_phase_detector.core.image_processor import ImageProcessor
 from src.apps.pregame_phase_detector.core.pick_phase import PickPhase
-from src.apps.pregame_phase_detector.core.shared_events import mute_ssim_prints
 from src.apps.pregame_phase_detector.core.tabbed import Tabbed
 from src.connection.websocket_client import WebSocketClient
 
 
 class GameStateManager:
-    def __init__(self, image_processor: ImageProcessor, ws: WebSocketClient):
-        self.image_processor = image_processor
+    def __init__(self, ws: WebSocketClient):
         self.ws = ws
         self.tabbed = Tabbed()
         self.game_phase = PickPhase()
@@ -75,28 +71,6 @@ class GameStateManager:
         await self.ws.send_json_requests(DSLR_HIDE_VS_SCREEN)
         print("\nWe are in settings")
 
-    async def confirm_transition_to_vs_screen(self, target_value: float):
-        start_time = time.time()
-        duration = 0.5
-        print("\nNo matches detected")
-        mute_ssim_prints.set()
-
-        while time.time() - start_time < duration:
-            print(
-                f"Checking for vs screen... ({time.time() - start_time:.4f}s elapsed.)",
-                end="\r",
-            )
-            ssim_matches = await self.image_processor.scan_screen_for_matches()
-
-            if max(ssim_matches.values()) >= target_value:
-                print("\nNot in vs screen")
-                break
-            elif time.time() - start_time >= duration:
-                # The condition was true for the entire 0.5 seconds
-                await self.set_state_vs_screen()
-                break
-        mute_ssim_prints.clear()
-
     async def wait_for_settings_screen_exiting_fade_out(self):
         self.tabbed.to_settings_screen = False
         await asyncio.sleep(0.25)
@@ -1,33 +1,89 @@
 import asyncio
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
 
 import cv2 as cv
-import mss
 import numpy as np
-from skimage.metrics import structural_similarity as ssim
 
 from src.apps.pregame_phase_detector.core.constants import (
     DESKTOP_TAB_AREA,
-    DESKTOP_TAB_TEMPLATE,
+    DETECTORS,
     DOTA_TAB_AREA,
-    DOTA_TAB_TEMPLATE,
     HERO_PICK_AREA,
-    HERO_PICK_TEMPLATE,
     IN_GAME_AREA,
-    IN_GAME_TEMPLATE,
     SECONDARY_WINDOWS,
     SETTINGS_AREA,
-    SETTINGS_TEMPLATE,
     STARTING_BUY_AREA,
-    STARTING_BUY_TEMPLATE,
+    TEMPLATE_PACK_PATH,
+    TEMPLATE_SOURCES,
 )
 from src.apps.pregame_phase_detector.core.shared_events import (
     mute_ssim_prints,
     secondary_windows_spawned,
 )
+from src.config.settings import DETECTOR_PREVIEW
+from src.core.constants import (
+    DETECTOR_SCORING_WORKERS,
+    TEMPLATE_REGIONS_CACHE_PATH,
+)
+from src.utils.adaptive_scheduler import StageTimings
+from src.utils.preview_windows import PreviewWindows
+from src.utils.screen_capture import Area, create_screen_capture
+from src.utils.template_matching import TemplateScorer
+from src.utils.template_pack import TemplatePack
+from src.utils.template_registry import TemplateRegistry
 
 
 class ImageProcessor:
+    def __init__(
+        self,
+        capture_factory: Callable[[dict[str, Area]], Any] = create_screen_capture,
+        preview_mode: str = DETECTOR_PREVIEW,
+        regions_cache_path: str = TEMPLATE_REGIONS_CACHE_PATH,
+    ):
+        # Every region is grabbed at once, once per scan. The factory makes the
+        # capture, e.g. from a recording instead of the screen.
+        self.screen_capture = capture_factory({})
+        # Where each template is on this monitor, from its area at the reference
+        # resolution, located once and cached. Templates are read from the pack
+        # as they are needed: to be located, or on the first scan of their region.
+        self.templates = TemplatePack(TEMPLATE_PACK_PATH, TEMPLATE_SOURCES)
+        areas = {
+            "hero_pick": HERO_PICK_AREA,
+            "starting_buy": STARTING_BUY_AREA,
+            "dota_tab": DOTA_TAB_AREA,
+            "desktop_tab": DESKTOP_TAB_AREA,
+            "settings": SETTINGS_AREA,
+            "in_game": IN_GAME_AREA,
+        }
+        self.regions = TemplateRegistry(
+            "pregame_phase_detector", regions_cache_path
+        ).resolve(
+            self.screen_capture,
+            areas,
+            self.templates.get,
+        )
+        for name, region in self.regions.items():
+            self.screen_capture.add_region(name, region.area)
+        self.scorers: dict[str, TemplateScorer] = {}
+        self.timings = StageTimings()
+        self.preview = PreviewWindows(SECONDARY_WINDOWS, preview_mode)
+        self.detectors = {
+            "hero_pick": self.detect_hero_pick,
+            "starting_buy": self.detect_starting_buy,
+            "dota_tab": self.detect_dota_tab_out,
+            "desktop_tab": self.detect_desktop_tab_out,
+            "settings": self.detect_settings_screen,
+            "in_game": self.detect_in_game,
+        }
+        # Capturing and scoring run off the event loop so the socket server stays
+        # responsive. Capture keeps a single thread, mss grabbers are per thread.
+        self.capture_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Capture"
+        )
+        self.scoring_executor = ThreadPoolExecutor(
+            max_workers=DETECTOR_SCORING_WORKERS, thread_name_prefix="Scoring"
+        )
 
     async def capture_new_area(self, capture_area: dict[str, int], filename: str):
         while True:
@@ -41,97 +97,103 @@ class ImageProcessor:
             await asyncio.sleep(0.1)
 
     async def capture_window(self, area: dict[str, int]):
-        with mss.mss() as sct:
-            img = sct.grab(area)
-        return np.array(img)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.capture_executor, self.screen_capture.grab, area
+        )
 
-    def compare_images(
-        self, image_a: cv.typing.MatLike, image_b: cv.typing.MatLike
-    ) -> float:
-        return ssim(image_a, image_b)
+    def scorer(self, name: str) -> TemplateScorer:
+        """Built on first use. Template statistics come precomputed with the pack
+        rather than being computed on every frame."""
+        if name not in self.scorers:
+            template = self.regions[name].fit(self.templates.get(name))
+            self.scorers[name] = self.templates.scorer(name, template)
+        return self.scorers[name]
+
+    def compare_images(self, image: cv.typing.MatLike, scorer: TemplateScorer) -> float:
+        return scorer.score(image)
 
     async def capture_and_process_image(
-        self, alias: str, capture_area: dict, template: cv.typing.MatLike
+        self, alias: str, frame: np.ndarray, scorer: TemplateScorer
     ) -> float:
-        frame = await self.capture_window(capture_area)
-        gray_frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
-        match_value = self.compare_images(gray_frame, template)
-
-        window_name = next(
-            (window.name for window in SECONDARY_WINDOWS if alias in window.name), None
+        gray_frame, match_value = await asyncio.get_running_loop().run_in_executor(
+            self.scoring_executor, self.process_image, frame, scorer
         )
-
-        if window_name:
-            cv.imshow(window_name, gray_frame)
-
-        if cv.waitKey(1) == ord("q"):
-            return 0.0
-
+        # Live previews are GUI calls, kept on the event loop's thread
+        self.preview.show(alias, gray_frame)
         return match_value
 
-    async def detect_hero_pick(self):
+    def process_image(
+        self, frame: np.ndarray, scorer: TemplateScorer
+    ) -> tuple[np.ndarray, float]:
+        """Runs in a scoring worker, OpenCV and NumPy release the GIL."""
+        gray_frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+        return gray_frame, self.compare_images(gray_frame, scorer)
+
+    async def detect_hero_pick(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "hero_pick_scanner", HERO_PICK_AREA, HERO_PICK_TEMPLATE
+            "hero_pick_scanner", frame, self.scorer("hero_pick")
         )
 
-    async def detect_starting_buy(self):
+    async def detect_starting_buy(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "starting_buy_scanner", STARTING_BUY_AREA, STARTING_BUY_TEMPLATE
+            "starting_buy_scanner", frame, self.scorer("starting_buy")
         )
 
-    async def detect_dota_tab_out(self):
+    async def detect_dota_tab_out(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "dota_tab_scanner", DOTA_TAB_AREA, DOTA_TAB_TEMPLATE
+            "dota_tab_scanner", frame, self.scorer("dota_tab")
         )
 
-    async def detect_desktop_tab_out(self):
+    async def detect_desktop_tab_out(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "desktop_tab_scanner", DESKTOP_TAB_AREA, DESKTOP_TAB_TEMPLATE
+            "desktop_tab_scanner", frame, self.scorer("desktop_tab")
         )
 
-    async def detect_settings_screen(self):
+    async def detect_settings_screen(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "settings_scanner", SETTINGS_AREA, SETTINGS_TEMPLATE
+            "settings_scanner", frame, self.scorer("settings")
         )
 
-    async def detect_in_game(self):
+    async def detect_in_game(self, frame: np.ndarray):
         return await self.capture_and_process_image(
-            "in_game_scanner", IN_GAME_AREA, IN_GAME_TEMPLATE
+            "in_game_scanner", frame, self.scorer("in_game")
         )
 
-    async def scan_screen_for_matches(self) -> Dict[str, float]:
-        (
-            hero_pick_result,
-            starting_buy_result,
-            dota_tab_out_result,
-            desktop_tab_out_result,
-            settings_screen_result,
-            in_game_result,
-        ) = await asyncio.gather(
-            self.detect_hero_pick(),
-            self.detect_starting_buy(),
-            self.detect_dota_tab_out(),
-            self.detect_desktop_tab_out(),
-            self.detect_settings_screen(),
-            self.detect_in_game(),
-        )
+    async def scan_screen_for_matches(
+        self, detectors: Optional[Iterable[str]] = None
+    ) -> Dict[str, float]:
+        """Capture and score the given detectors' regions, all by default."""
+        names = [name for name in DETECTORS if detectors is None or name in detectors]
+        with self.timings.stage("capture"):
+            frames = await asyncio.get_running_loop().run_in_executor(
+                self.capture_executor, self.screen_capture.grab_regions, names
+            )
+        with self.timings.stage("score"):
+            results = await asyncio.gather(
+                *(self.detectors[name](frames[name]) for name in names)
+            )
 
         secondary_windows_spawned.set()
 
-        combined_results = {
-            "hero_pick": hero_pick_result,
-            "starting_buy": starting_buy_result,
-            "dota_tab": dota_tab_out_result,
-            "desktop_tab": desktop_tab_out_result,
-            "settings": settings_screen_result,
-            "in_game": in_game_result,
-        }
+        combined_results = dict(zip(names, results))
+        if self.preview.poll():
+            combined_results = {name: 0.0 for name in names}
 
         formatted_combined_results = ", ".join(
             [f"{alias[:2]}:{value:.2f}" for alias, value in combined_results.items()]
         )
 
         if not mute_ssim_prints.is_set():
-            print(f"SSMIs: {formatted_combined_results}", end="\r")
+            print(
+                f"SSMIs: {formatted_combined_results} | {self.timings.summary()}",
+                end="\r",
+            )
 
         return combined_results
+
+    def close(self):
+        self.capture_executor.shutdown(wait=True)
+        self.scoring_executor.shutdown(wait=True)
+        self.preview.close()
+        self.screen_capture.close()
+        self.templates.close()
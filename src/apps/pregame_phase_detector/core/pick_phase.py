@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class PickPhase:
 
     def __init__(self):
@@ -68,6 +71,13 @@ class PickPhase:
             self._set_all_false()
         self._unknown = value
 
+    def current_phase(self) -> Optional[str]:
+        """Name of the phase currently set, if any."""
+        for attr, value in self.__dict__.items():
+            if value is True:
+                return attr.lstrip("_")
+        return None
+
     def _set_all_false(self):
         for attr in self.__dict__:
             if isinstance(self.__dict__[attr], bool):
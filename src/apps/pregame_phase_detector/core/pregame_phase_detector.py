@@ -1,97 +1,104 @@
-import asyncio
+from typing import Optional
 
+from src.apps.pregame_phase_detector.core.constants import (
+    DEFAULT_SCAN_INTERVAL,
+    DETECTOR_FILTERS,
+    PHASE_SCAN_INTERVALS,
+    TRANSITION_GROUPS,
+)
 from src.apps.pregame_phase_detector.core.game_state_manager import GameStateManager
 from src.apps.pregame_phase_detector.core.image_processor import ImageProcessor
 from src.apps.pregame_phase_detector.core.socket_handler import PreGamePhaseHandler
+from src.apps.pregame_phase_detector.core.transitions import (
+    TransitionGroup,
+    needed_detectors,
+)
 from src.connection.websocket_client import WebSocketClient
+from src.utils.adaptive_scheduler import AdaptiveScheduler
+from src.utils.signal_filter import FilterBank, FilterSettings, HysteresisFilter
 
 
 class PreGamePhaseDetector:
-    def __init__(self, socket_handler: PreGamePhaseHandler, ws_client: WebSocketClient):
-        self.image_processor = ImageProcessor()
-        self.state_manager = GameStateManager(self.image_processor, ws_client)
+    def __init__(
+        self,
+        socket_handler: PreGamePhaseHandler,
+        ws_client: WebSocketClient,
+        image_processor: Optional[ImageProcessor] = None,
+    ):
+        self.image_processor = (
+            image_processor if image_processor is not None else ImageProcessor()
+        )
+        self.state_manager = GameStateManager(ws_client)
         self.socket_handler = socket_handler
+        self.scheduler = AdaptiveScheduler(
+            PHASE_SCAN_INTERVALS,
+            DEFAULT_SCAN_INTERVAL,
+            timings=self.image_processor.timings,
+        )
+        self.filters = FilterBank(DETECTOR_FILTERS)
+        # How long the conditions of the transitions with a hold have been met
+        self.holds = {
+            transition.action: HysteresisFilter(
+                FilterSettings(enter=1.0, exit=1.0, min_dwell=transition.hold)
+            )
+            for group in TRANSITION_GROUPS
+            for transition in group.transitions
+            if transition.hold
+        }
 
     async def detect_pregame_phase(self):
         await self.state_manager.set_state_finding_game()
-        target = 0.7  # target value for ssim
+        previous_match = None
         while not self.socket_handler.stop_event.is_set():
-            ssim_match = await self.image_processor.scan_screen_for_matches()
-            await self.handle_finding_game(ssim_match, target)
-            if self.state_manager.game_phase.finding_game:
-                continue
-            await self.wait_for_transitions(ssim_match, target)
-            await self.handle_tabbed_states(ssim_match, target)
-            await self.handle_pregame_phases(ssim_match, target)
-            await asyncio.sleep(0.01)
-
-    async def handle_finding_game(self, ssim_match: dict[str, float], target: float):
-        if (
-            ssim_match["hero_pick"] >= target
-            and self.state_manager.game_phase.finding_game
-        ):
-            await self.state_manager.set_state_game_found()
-
-    async def wait_for_transitions(self, ssim_match: dict[str, float], target: float):
-        if (
-            self.state_manager.tabbed.to_settings_screen
-            and ssim_match["settings"] < target
-            and ssim_match["desktop_tab"] < target
-        ):
-            await self.state_manager.wait_for_settings_screen_exiting_fade_out()
-
-        elif (
-            self.state_manager.game_phase.starting_buy
-            and ssim_match["starting_buy"] < target
-            and ssim_match["dota_tab"] < target
-            and ssim_match["desktop_tab"] < target
-            and ssim_match["hero_pick"] >= target
-        ):
-            await self.state_manager.wait_for_starting_buy_screen_transition_out()
-
-    async def handle_tabbed_states(self, ssim_match: dict[str, float], target: float):
-        if (
-            ssim_match["dota_tab"] >= target
-            and not self.state_manager.tabbed.to_dota_menu
-        ):
-            await self.state_manager.set_state_dota_menu()
+            # The first scan covers every detector, so that all the preview
+            # windows exist by the time they get arranged
+            detectors = (
+                needed_detectors(TRANSITION_GROUPS, self.state_manager)
+                if previous_match is not None
+                else None
+            )
+            ssim_match = await self.image_processor.scan_screen_for_matches(detectors)
+            matches = self.filters.update(ssim_match)
+            held = self.update_holds(matches)
+            for group in TRANSITION_GROUPS:
+                await self.apply_transitions(group, matches, held)
 
-        elif (
-            ssim_match["desktop_tab"] >= target
-            and not self.state_manager.tabbed.to_desktop
-        ):
-            await self.state_manager.set_state_desktop()
+            # Unchanged regions give back the exact same scores
+            changed = ssim_match != previous_match
+            previous_match = ssim_match
+            await self.scheduler.wait(
+                self.state_manager.game_phase.current_phase(), changed
+            )
 
-        elif (
-            ssim_match["settings"] >= target
-            and not self.state_manager.tabbed.to_settings_screen
-        ):
-            await self.state_manager.set_state_settings_screen()
+    def update_holds(self, matches: dict[str, bool]) -> set[str]:
+        """Feed this scan to the held transitions, get the ones held long enough.
+        Fed from every scan rather than from extra scans of their own."""
+        held = set()
+        for group in TRANSITION_GROUPS:
+            for transition in group.transitions:
+                if not transition.hold:
+                    continue
+                met = group.possible(self.state_manager) and transition.fires(
+                    self.state_manager, matches
+                )
+                if self.holds[transition.action].update(float(met)):
+                    held.add(transition.action)
+        return held
 
-    async def handle_pregame_phases(self, ssim_match: dict[str, float], target: float):
-        if (
-            ssim_match["starting_buy"] >= target
-            and not self.state_manager.game_phase.starting_buy
-        ):
-            await self.state_manager.set_state_starting_buy()
-
-        elif (
-            ssim_match["hero_pick"] >= target > ssim_match["starting_buy"]
-            and ssim_match["settings"] < target
-            and ssim_match["desktop_tab"] < target
-            and not self.state_manager.game_phase.hero_pick
-        ):
-            await self.state_manager.set_back_state_hero_pick()
-
-        elif (
-            ssim_match["in_game"] >= target
-            and not self.state_manager.game_phase.in_game
-        ):
-            await self.state_manager.set_state_in_game()
-
-        elif (
-            max(ssim_match.values())
-            < target  # nothing matching means vs screen (normally)
-            and not self.state_manager.game_phase.versus_screen
-        ):
-            await self.state_manager.confirm_transition_to_vs_screen(target)
+    async def apply_transitions(
+        self, group: TransitionGroup, matches: dict[str, bool], held: set[str]
+    ):
+        if not group.possible(self.state_manager):
+            return
+        # A previous group may have changed the state to one needing detectors
+        # that were not scanned, the group then waits for the next scan.
+        if not group.detectors(self.state_manager) <= matches.keys():
+            return
+        for transition in group.transitions:
+            if transition.hold and transition.action not in held:
+                continue
+            if transition.fires(self.state_manager, matches):
+                if transition.hold:
+                    self.holds[transition.action].reset()
+                await getattr(self.state_manager, transition.action)()
+                return
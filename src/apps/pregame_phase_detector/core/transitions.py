@@ -0,0 +1,65 @@
+from operator import attrgetter
+from typing import NamedTuple
+
+
+class Transition(NamedTuple):
+    """Calls the GameStateManager method `action` when the state flags in
+    `requires` are set, the ones in `excludes` are not, the `matching`
+    detectors match and the `not_matching` ones do not, as filtered (see
+    DETECTOR_FILTERS). With a `hold`, all of that must stay true scan after
+    scan for that many seconds first.
+    Flags are attribute paths from the GameStateManager, e.g. "tabbed.in_game"."""
+
+    action: str
+    matching: tuple[str, ...] = ()
+    not_matching: tuple[str, ...] = ()
+    requires: tuple[str, ...] = ()
+    excludes: tuple[str, ...] = ()
+    hold: float = 0.0
+
+    @property
+    def detectors(self) -> tuple[str, ...]:
+        return self.matching + self.not_matching
+
+    def possible(self, state_manager) -> bool:
+        """Whether the current state allows it, whatever the scores."""
+        return all(attrgetter(flag)(state_manager) for flag in self.requires) and (
+            not any(attrgetter(flag)(state_manager) for flag in self.excludes)
+        )
+
+    def fires(self, state_manager, matches: dict[str, bool]) -> bool:
+        """Whether its conditions are met, never when a detector was not scanned."""
+        return (
+            self.possible(state_manager)
+            and all(matches.get(name) is True for name in self.matching)
+            and all(matches.get(name) is False for name in self.not_matching)
+        )
+
+
+class TransitionGroup(NamedTuple):
+    """Transitions checked in order, only the first one firing is applied (an
+    if/elif chain). The whole group is skipped when its flags do not allow it."""
+
+    transitions: tuple[Transition, ...]
+    requires: tuple[str, ...] = ()
+    excludes: tuple[str, ...] = ()
+
+    def possible(self, state_manager) -> bool:
+        return all(attrgetter(flag)(state_manager) for flag in self.requires) and (
+            not any(attrgetter(flag)(state_manager) for flag in self.excludes)
+        )
+
+    def detectors(self, state_manager) -> set[str]:
+        """Detectors the group needs scores of in the current state."""
+        if not self.possible(state_manager):
+            return set()
+        return {
+            name
+            for transition in self.transitions
+            if transition.possible(state_manager)
+            for name in transition.detectors
+        }
+
+
+def needed_detectors(groups: tuple[TransitionGroup, ...], state_manager) -> set[str]:
+    return set().union(*(group.detectors(state_manager) for group in groups))
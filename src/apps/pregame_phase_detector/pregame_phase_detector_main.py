@@ -15,6 +15,7 @@ from src.apps.pregame_phase_detector.core.shared_events import (
     secondary_windows_spawned,
 )
 from src.apps.pregame_phase_detector.core.socket_handler import PreGamePhaseHandler
+from src.config.settings import DETECTOR_PREVIEW
 from src.connection.websocket_client import WebSocketClient
 from src.core import terminal_window_manager_v4 as twm
 from src.core.constants import (
@@ -30,6 +31,8 @@ from src.utils.script_initializer import setup_script
 SCRIPT_NAME = construct_script_name(__file__)
 logger = setup_logger(SCRIPT_NAME, "DEBUG")
 
+# Headless detectors have no secondary windows to arrange
+PREVIEW_WINDOWS = DETECTOR_PREVIEW != "headless"
 PORT = SUBPROCESSES_PORTS["pregame_phase_detector"]
 
 # Making a test change to see if it is staged
@@ -53,7 +56,9 @@ async def run_main_task(
     main_task = asyncio.create_task(detector.detect_pregame_phase())
 
     await secondary_windows_spawned.wait()
-    await twm.manage_secondary_windows(slot, SECONDARY_WINDOWS)
+    await detector.image_processor.preview.wait_shown()
+    if detector.image_processor.preview.windows:
+        await twm.manage_secondary_windows(slot, SECONDARY_WINDOWS)
     mute_ssim_prints.clear()
     await main_task
     return None
@@ -63,9 +68,10 @@ async def main():
     ws_client = None
     socket_server_task = None
     slots_db_conn = None
+    detector = None
     try:
         slots_db_conn, slot = await setup_script(
-            SCRIPT_NAME, SLOTS_DB, SECONDARY_WINDOWS
+            SCRIPT_NAME, SLOTS_DB, SECONDARY_WINDOWS if PREVIEW_WINDOWS else None
         )
         if slot is None:
             logger.error("No terminal window slot available, exiting.")
@@ -98,6 +104,8 @@ async def main():
             await ws_client.close()
         if slots_db_conn:
             await slots_db_conn.close()
+        if detector:
+            detector.image_processor.close()
         cv.destroyAllWindows()
 
 
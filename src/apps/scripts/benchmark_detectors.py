@@ -0,0 +1,308 @@
+"""Run a detector on a recording instead of the live screen, then report how long
+each stage of its scans took, the state transitions it detected against the
+labelled ones, and the websocket requests it would have sent to Streamer.bot.
+
+Run from the project root, e.g.:
+python -m src.apps.scripts.benchmark_detectors data/recordings/pregame pregame
+python -m src.apps.scripts.benchmark_detectors shop.mp4 shop --fast
+
+The recording is a folder of images (name order) or a video, with an optional
+sidecar JSON (see frame_replay.load_sidecar) giving its timestamps and the
+labelled transitions, e.g. for the pregame detector:
+{"fps": 30, "labels": {"pregame": [{"time": 0.0, "state": "finding_game"},
+                                   {"time": 4.5, "state": "hero_pick"}]}}
+States are the pick phases (finding_game, hero_pick, starting_buy,
+versus_screen, in_game, unknown) for "pregame", "open" and "closed" for "shop".
+The state the detector starts in counts as a transition at the first frame.
+
+Realtime, the recording plays at its own pace and the detector keeps its
+scheduler, as live. --fast scans every frame once, without waiting between
+scans; the detectors' own timed waits (fade outs) and holds (vs screen) still
+run on the wall clock. The capture stage includes decoding the recording.
+
+Templates are located on the recording's first frame and cached in a temporary
+file, leaving the live cache alone."""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Optional
+
+from src.utils.adaptive_scheduler import AdaptiveScheduler, StageTimings
+from src.utils.frame_replay import ReplayCapture
+from src.utils.screen_capture import Area
+
+DETECTOR_NAMES = ("pregame", "shop")
+
+
+class ReplayHandler:
+    """Stands in for the detectors' socket handler, stopped at the end of the
+    recording instead of by a message."""
+
+    def __init__(self):
+        self.stop_event = asyncio.Event()
+
+
+class RecordingWebSocketClient:
+    """Stands in for WebSocketClient, records the requests instead of sending
+    them, with the recording time they would have been sent at."""
+
+    def __init__(self, clock: Callable[[], float]):
+        self.clock = clock
+        self.requests: list[tuple[float, str]] = []
+
+    async def establish_connection(self):
+        return None
+
+    async def send_json_requests(self, json_file_paths: list[str] | str):
+        if isinstance(json_file_paths, str):
+            json_file_paths = [json_file_paths]
+        for json_file in json_file_paths:
+            self.requests.append((self.clock(), os.path.basename(json_file)))
+
+    async def close(self):
+        pass
+
+
+class ObservingScheduler(AdaptiveScheduler):
+    """Records the detector's state at the end of each scan, with the recording
+    time of the frame scanned, and stops the detector after the last frame."""
+
+    def __init__(
+        self,
+        capture: ReplayCapture,
+        handler: ReplayHandler,
+        intervals: dict[str, float],
+        default_interval: float,
+        timings: StageTimings,
+        cpu_budget: float,
+    ):
+        super().__init__(intervals, default_interval, timings, cpu_budget=cpu_budget)
+        self.capture = capture
+        self.handler = handler
+        self.transitions: list[tuple[float, Optional[str]]] = []
+
+    async def wait(self, state: Optional[str], changed: bool):
+        if not self.transitions or self.transitions[-1][1] != state:
+            self.transitions.append((self.capture.timestamp, state))
+        if self.capture.finished.is_set():
+            self.handler.stop_event.set()
+        await super().wait(state, changed)
+
+
+def make_scheduler(
+    scheduler: AdaptiveScheduler,
+    capture: ReplayCapture,
+    handler: ReplayHandler,
+    timings: StageTimings,
+    realtime: bool,
+) -> ObservingScheduler:
+    if realtime:
+        return ObservingScheduler(
+            capture,
+            handler,
+            scheduler.intervals,
+            scheduler.default_interval,
+            timings,
+            scheduler.cpu_budget,
+        )
+    # No interval and no CPU budget: the next scan starts right away
+    return ObservingScheduler(capture, handler, {}, 0.0, timings, math.inf)
+
+
+async def run_pregame(
+    capture_regions: Callable[[dict[str, Area]], ReplayCapture],
+    capture: ReplayCapture,
+    handler: ReplayHandler,
+    ws_client: RecordingWebSocketClient,
+    realtime: bool,
+    regions_cache_path: str,
+) -> ObservingScheduler:
+    from src.apps.pregame_phase_detector.core.image_processor import ImageProcessor
+    from src.apps.pregame_phase_detector.core.pregame_phase_detector import (
+        PreGamePhaseDetector,
+    )
+    from src.apps.pregame_phase_detector.core.shared_events import mute_ssim_prints
+
+    mute_ssim_prints.set()
+    image_processor = ImageProcessor(
+        capture_regions, preview_mode="headless", regions_cache_path=regions_cache_path
+    )
+    image_processor.timings.keep_samples = True
+    detector = PreGamePhaseDetector(handler, ws_client, image_processor)  # type: ignore[arg-type]
+    scheduler = make_scheduler(
+        detector.scheduler, capture, handler, image_processor.timings, realtime
+    )
+    detector.scheduler = scheduler
+    try:
+        await detector.detect_pregame_phase()
+    finally:
+        image_processor.close()
+    return scheduler
+
+
+async def run_shop(
+    capture_regions: Callable[[dict[str, Area]], ReplayCapture],
+    capture: ReplayCapture,
+    handler: ReplayHandler,
+    ws_client: RecordingWebSocketClient,
+    realtime: bool,
+    regions_cache_path: str,
+) -> ObservingScheduler:
+    from src.apps.shop_watcher.core.shared_events import mute_ssim_prints
+    from src.apps.shop_watcher.core.shop_watcher import ShopWatcher
+
+    mute_ssim_prints.set()
+    shop_watcher = ShopWatcher(
+        logging.getLogger("benchmark_detectors"),
+        handler,  # type: ignore[arg-type]
+        ws_client,  # type: ignore[arg-type]
+        capture_regions,
+        preview_mode="headless",
+        regions_cache_path=regions_cache_path,
+    )
+    scheduler = make_scheduler(
+        shop_watcher.scheduler,
+        capture,
+        handler,
+        StageTimings(keep_samples=True),
+        realtime,
+    )
+    shop_watcher.scheduler = scheduler
+    try:
+        await shop_watcher.scan_for_shop_and_notify()
+    finally:
+        task = shop_watcher.shop_tracker.shop_open_duration_task
+        if task and not task.done():
+            task.cancel()
+        shop_watcher.close()
+    return scheduler
+
+
+def match_transitions(
+    labels: list[dict], detected: list[tuple[float, Optional[str]]], tolerance: float
+) -> tuple[list[tuple[dict, Optional[float]]], list[tuple[float, Optional[str]]]]:
+    """Pair each labelled transition with the first detected transition to the
+    same state within the tolerance. Returns the labels with the time they were
+    detected at (None when missed), and the detected transitions left over."""
+    unmatched = list(detected)
+    matches = []
+    for label in sorted(labels, key=lambda label: label["time"]):
+        found = next(
+            (
+                transition
+                for transition in unmatched
+                if transition[1] == label["state"]
+                and abs(transition[0] - label["time"]) <= tolerance
+            ),
+            None,
+        )
+        if found is not None:
+            unmatched.remove(found)
+        matches.append((label, found[0] if found is not None else None))
+    return matches, unmatched
+
+
+def print_report(name: str, durations: list[float]):
+    if not durations:
+        print(f"{name}: no samples")
+        return
+    durations_ms = sorted(duration * 1000 for duration in durations)
+    p95 = durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))]
+    print(
+        f"{name}: {len(durations_ms)} samples, "
+        f"mean {statistics.mean(durations_ms):.1f}ms, "
+        f"median {statistics.median(durations_ms):.1f}ms, p95 {p95:.1f}ms, "
+        f"max {durations_ms[-1]:.1f}ms"
+    )
+
+
+def print_transitions(
+    labels: list[dict], detected: list[tuple[float, Optional[str]]], tolerance: float
+):
+    if not labels:
+        print("\nNo labelled transitions, detected:")
+        for timestamp, state in detected:
+            print(f"  {timestamp:8.2f}s {state}")
+        return
+
+    matches, unmatched = match_transitions(labels, detected, tolerance)
+    print(f"\nTransitions (tolerance {tolerance:.1f}s):")
+    delays = []
+    for label, detected_at in matches:
+        if detected_at is None:
+            print(f"  {label['time']:8.2f}s {label['state']:<14} MISSED")
+        else:
+            delays.append(detected_at - label["time"])
+            print(
+                f"  {label['time']:8.2f}s {label['state']:<14} "
+                f"detected at {detected_at:.2f}s ({delays[-1] * 1000:+.0f}ms)"
+            )
+    for timestamp, state in unmatched:
+        print(f"  {timestamp:8.2f}s {str(state):<14} UNEXPECTED")
+    print(
+        f"{len(delays)}/{len(matches)} detected, {len(unmatched)} unexpected"
+        + (f", mean delay {statistics.mean(delays) * 1000:+.0f}ms" if delays else "")
+    )
+
+
+async def main(path: str, detector: str, realtime: bool, tolerance: float):
+    capture = ReplayCapture(path, realtime=realtime)
+
+    def capture_regions(regions: dict[str, Area]) -> ReplayCapture:
+        for name, area in regions.items():
+            capture.add_region(name, area)
+        return capture
+
+    handler = ReplayHandler()
+    ws_client = RecordingWebSocketClient(lambda: capture.timestamp)
+    run = run_pregame if detector == "pregame" else run_shop
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        scheduler = await run(
+            capture_regions,
+            capture,
+            handler,
+            ws_client,
+            realtime,
+            os.path.join(cache_dir, "template_regions.json"),
+        )
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"\n\nReplayed {path} with the {detector} detector in {elapsed:.2f}s: "
+        f"{capture.grabs} scans, {capture.skipped} frames skipped"
+    )
+    for stage, durations in scheduler.timings.samples.items():
+        print_report(stage, durations)
+
+    labels = capture.sidecar.get("labels", {}).get(detector, [])
+    print_transitions(labels, scheduler.transitions, tolerance)
+
+    print("\nWebsocket requests:")
+    for timestamp, request in ws_client.requests:
+        print(f"  {timestamp:8.2f}s {request}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("recording", help="folder of frames or video")
+    parser.add_argument("detector", choices=DETECTOR_NAMES)
+    parser.add_argument(
+        "--fast", action="store_true", help="scan every frame, as fast as possible"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=2.0,
+        help="seconds between a labelled and a detected transition to match them",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.recording, args.detector, not args.fast, args.tolerance))
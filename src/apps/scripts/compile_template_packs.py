@@ -0,0 +1,16 @@
+"""Compile the detectors' template packs ahead of time, e.g. after editing a
+template image. The detectors also compile them when missing or outdated.
+
+Run from the project root:
+python -m src.apps.scripts.compile_template_packs"""
+
+from src.apps.pregame_phase_detector.core import constants as pregame
+from src.apps.shop_watcher.core import constants as shop
+from src.utils.template_pack import compile_template_pack
+
+if __name__ == "__main__":
+    for app in (pregame, shop):
+        compile_template_pack(app.TEMPLATE_PACK_PATH, app.TEMPLATE_SOURCES)
+        print(
+            f"Compiled {len(app.TEMPLATE_SOURCES)} templates in {app.TEMPLATE_PACK_PATH}"
+        )
@@ -2,14 +2,28 @@ import os
 
 from src.config.settings import PROJECT_DIR_PATH
 from src.core.terminal_window_manager_v4 import SecondaryWindow
+from src.utils.signal_filter import FilterSettings
 
 SECONDARY_WINDOWS = [SecondaryWindow("opencv_shop_scanner", 150, 100)]
 SCREEN_CAPTURE_AREA = {"left": 1853, "top": 50, "width": 30, "height": 35}
 
+# Seconds between two scans with the shop open or closed, stretched by the
+# scheduler while nothing changes
+SHOP_SCAN_INTERVALS = {"open": 0.02, "closed": 0.02}
+DEFAULT_SCAN_INTERVAL = 0.02
+
+# The shop opens at a ssim of 0.8 and closes under 0.7, on 2 of the last 3 scans,
+# so that a glitching frame does not close and reopen it
+SHOP_FILTER = FilterSettings(enter=0.8, exit=0.7, window=3, votes=2)
+
 # cv template image
 SHOP_TEMPLATE_IMAGE_PATH = os.path.join(
     PROJECT_DIR_PATH, "src/apps/shop_watcher/data/opencv/shop_top_right_icon.jpg"
 )
+TEMPLATE_SOURCES = {"shop": SHOP_TEMPLATE_IMAGE_PATH}
+TEMPLATE_PACK_PATH = os.path.join(
+    PROJECT_DIR_PATH, "src/apps/shop_watcher/data/opencv/templates.npz"
+)
 
 # ws requests
 BRB_BUYING_MILK_SHOW = os.path.join(
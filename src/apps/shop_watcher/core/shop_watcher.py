@@ -1,15 +1,19 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
+from typing import Any, Callable
 
 import cv2 as cv
-import mss
 import numpy as np
-from skimage.metrics import structural_similarity as ssim  # pylint: disable-msg=E0611
 
 from src.apps.shop_watcher.core.constants import (
+    DEFAULT_SCAN_INTERVAL,
     SCREEN_CAPTURE_AREA,
     SECONDARY_WINDOWS,
-    SHOP_TEMPLATE_IMAGE_PATH,
+    SHOP_FILTER,
+    SHOP_SCAN_INTERVALS,
+    TEMPLATE_PACK_PATH,
+    TEMPLATE_SOURCES,
 )
 from src.apps.shop_watcher.core.shared_events import (
     mute_ssim_prints,
@@ -17,7 +21,16 @@ from src.apps.shop_watcher.core.shared_events import (
 )
 from src.apps.shop_watcher.core.shop_tracker import ShopTracker
 from src.apps.shop_watcher.core.socket_handler import ShopWatcherHandler
+from src.config.settings import DETECTOR_PREVIEW
 from src.connection.websocket_client import WebSocketClient
+from src.core.constants import TEMPLATE_REGIONS_CACHE_PATH
+from src.utils.adaptive_scheduler import AdaptiveScheduler
+from src.utils.preview_windows import PreviewWindows
+from src.utils.screen_capture import Area, create_screen_capture
+from src.utils.signal_filter import HysteresisFilter
+from src.utils.template_matching import TemplateScorer
+from src.utils.template_pack import TemplatePack
+from src.utils.template_registry import TemplateRegistry
 
 
 class ShopWatcher:
@@ -26,40 +39,77 @@ class ShopWatcher:
         logger: Logger,
         socket_handler: ShopWatcherHandler,
         ws_client: WebSocketClient,
+        capture_factory: Callable[[dict[str, Area]], Any] = create_screen_capture,
+        preview_mode: str = DETECTOR_PREVIEW,
+        regions_cache_path: str = TEMPLATE_REGIONS_CACHE_PATH,
     ):
         self.secondary_windows_spawned = secondary_windows_spawned
         self.mute_ssim_prints = mute_ssim_prints
         self.socket_handler = socket_handler
         self.logger = logger
         self.shop_tracker = ShopTracker(logger, ws_client)
+        self.screen_capture = capture_factory({})
+        self.templates = TemplatePack(TEMPLATE_PACK_PATH, TEMPLATE_SOURCES)
+        # Where the shop icon is on this monitor, located once and cached
+        region = TemplateRegistry("shop_watcher", regions_cache_path).resolve(
+            self.screen_capture,
+            {"shop": SCREEN_CAPTURE_AREA},
+            self.templates.get,
+        )["shop"]
+        self.screen_capture.add_region("shop", region.area)
+        self.scorer = self.templates.scorer(
+            "shop", region.fit(self.templates.get("shop"))
+        )
+        self.preview = PreviewWindows(SECONDARY_WINDOWS, preview_mode)
+        # Capture and scoring run off the event loop, in one thread since mss
+        # grabbers are per thread
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ShopWatcher"
+        )
+        self.scheduler = AdaptiveScheduler(SHOP_SCAN_INTERVALS, DEFAULT_SCAN_INTERVAL)
+        self.shop_filter = HysteresisFilter(SHOP_FILTER)
 
-    @staticmethod
-    async def capture_window(area: dict[str, int]):
-        with mss.mss() as sct:
-            img = sct.grab(area)
-        return np.array(img)
+    async def capture_window(self) -> np.ndarray:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: self.screen_capture.grab_regions()["shop"]
+        )
 
-    @staticmethod
-    async def compare_images(image_a: cv.typing.MatLike, image_b: cv.typing.MatLike):
-        return ssim(image_a, image_b)
+    async def compare_images(self, image: cv.typing.MatLike, scorer: TemplateScorer):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, scorer.score, image
+        )
 
     async def scan_for_shop_and_notify(self):
-        template = cv.imread(SHOP_TEMPLATE_IMAGE_PATH, cv.IMREAD_GRAYSCALE)
+        timings = self.scheduler.timings
+        previous_value = None
 
         while not self.socket_handler.stop_event.is_set():
-            frame = await self.capture_window(SCREEN_CAPTURE_AREA)
-            gray_frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
-            match_value = await self.compare_images(gray_frame, template)
-            cv.imshow(SECONDARY_WINDOWS[0].name, gray_frame)
+            with timings.stage("capture"):
+                frame = await self.capture_window()
+            with timings.stage("score"):
+                gray_frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+                match_value = await self.compare_images(gray_frame, self.scorer)
+            self.preview.show(SECONDARY_WINDOWS[0].name, gray_frame)
             self.secondary_windows_spawned.set()
 
-            if cv.waitKey(1) == ord("q"):
+            if self.preview.poll():
                 break
             if not self.mute_ssim_prints.is_set():
-                print(f"SSIM: {match_value:.6f}", end="\r")
+                print(f"SSIM: {match_value:.6f} | {timings.summary()}", end="\r")
 
-            if match_value >= 0.8:
+            if self.shop_filter.update(match_value):
                 await self.shop_tracker.open_shop()
-            elif match_value < 0.8:
+            else:
                 await self.shop_tracker.close_shop()
-            await asyncio.sleep(0.01)
+
+            # An unchanged region gives back the exact same score
+            changed = match_value != previous_value
+            previous_value = match_value
+            state = "open" if self.shop_tracker.shop_is_currently_open else "closed"
+            await self.scheduler.wait(state, changed)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.templates.close()
+        self.preview.close()
+        self.screen_capture.close()
@@ -9,6 +9,7 @@ from src.apps.shop_watcher.core.shared_events import (
 )
 from src.apps.shop_watcher.core.shop_watcher import ShopWatcher
 from src.apps.shop_watcher.core.socket_handler import ShopWatcherHandler
+from src.config.settings import DETECTOR_PREVIEW
 from src.connection.websocket_client import WebSocketClient
 from src.core import terminal_window_manager_v4 as twm
 from src.core.constants import (
@@ -21,6 +22,8 @@ from src.utils.helpers import construct_script_name, print_countdown
 from src.utils.logging_utils import setup_logger
 from src.utils.script_initializer import setup_script
 
+# Headless detectors have no secondary windows to arrange
+PREVIEW_WINDOWS = DETECTOR_PREVIEW != "headless"
 PORT = SUBPROCESSES_PORTS["shop_watcher"]
 SCRIPT_NAME = construct_script_name(__file__)
 
@@ -32,7 +35,9 @@ async def run_main_task(slot: int, shop_watcher: ShopWatcher):
     main_task = asyncio.create_task(shop_watcher.scan_for_shop_and_notify())
 
     await secondary_windows_spawned.wait()
-    await twm.manage_secondary_windows(slot, SECONDARY_WINDOWS)
+    await shop_watcher.preview.wait_shown()
+    if shop_watcher.preview.windows:
+        await twm.manage_secondary_windows(slot, SECONDARY_WINDOWS)
     mute_ssim_prints.clear()
     await main_task
     return None
@@ -41,9 +46,10 @@ async def run_main_task(slot: int, shop_watcher: ShopWatcher):
 async def main():
     socket_server_task = None
     slots_db_conn = None
+    shop_watcher = None
     try:
         slots_db_conn, slot = await setup_script(
-            SCRIPT_NAME, SLOTS_DB, SECONDARY_WINDOWS
+            SCRIPT_NAME, SLOTS_DB, SECONDARY_WINDOWS if PREVIEW_WINDOWS else None
         )
         if slot is None:
             logger.error("No slot available, exiting.")
@@ -74,6 +80,8 @@ async def main():
             await socket_server_task
         if slots_db_conn:
             await slots_db_conn.close()
+        if shop_watcher:
+            shop_watcher.close()
         cv.destroyAllWindows()
 
 
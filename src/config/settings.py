@@ -18,3 +18,22 @@ GOOGLE_CLOUD_API_KEY = get_env_var("GOOGLE_CLOUD_API_KEY_PATH")
 NEO4J_URI = get_env_var("NEO4J_URI")
 NEO4J_USER = get_env_var("NEO4J_USER")
 NEO4J_PASSWORD = get_env_var("NEO4J_PASSWORD")
+
+# Logging verbosity profile: "debug", "production" or "quiet"
+LOG_VERBOSITY = get_env_var("LOG_VERBOSITY", "debug")
+
+# Speech recognition backend: "google", "vosk" (offline) or "replay" (WAV file)
+SPEECH_RECOGNIZER = get_env_var("SPEECH_RECOGNIZER", "google")
+VOSK_MODEL_PATH = get_env_var("VOSK_MODEL_PATH")
+SPEECH_REPLAY_WAV = get_env_var("SPEECH_REPLAY_WAV")
+
+# Where detectors get their frames: "mss" (own screen capture) or "frame_bus"
+# (shared frames of the frame_producer app, falls back to mss if it is not running)
+SCREEN_CAPTURE_SOURCE = get_env_var("SCREEN_CAPTURE_SOURCE", "mss")
+# Folder of recorded frames (or video) the frame_producer app replays instead of
+# capturing
+FRAME_PRODUCER_REPLAY_DIR = get_env_var("FRAME_PRODUCER_REPLAY_DIR", "")
+
+# Detectors preview windows: "live" (every frame), "decimated" (a few times per
+# second, from a separate thread) or "headless" (no windows)
+DETECTOR_PREVIEW = get_env_var("DETECTOR_PREVIEW", "live")
@@ -13,10 +13,59 @@ TEMP_DIR_PATH = os.path.join(PROJECT_DIR_PATH, "temp")
 LOG_DIR_PATH = os.path.join(TEMP_DIR_PATH, "logs")
 LOCK_FILES_DIR_PATH = os.path.join(TEMP_DIR_PATH, "lock_files")
 COMMON_LOGS_FILE_PATH = os.path.join(LOG_DIR_PATH, "all_logs.log")
+COMMON_LOGS_PARTS_DIR_PATH = os.path.join(LOG_DIR_PATH, "common_parts")
+TEMPLATE_REGIONS_CACHE_PATH = os.path.join(TEMP_DIR_PATH, "template_regions.json")
 
 # URLs
 STREAMERBOT_WS_URL = "ws://127.0.0.1:50001/"
 
+# Screen capture: "union" grabs the bounding box of a detector's regions once per
+# tick, "regions" grabs each region on its own (see utils.screen_capture)
+SCREEN_CAPTURE_MODE = "union"
+
+# Template matching score: "ssim" (exact) or "ncc" (cheaper, mapped onto the
+# SSIM scale so the detectors' thresholds hold, see utils.template_matching)
+TEMPLATE_MATCHING_MODE = "ssim"
+# Reuse a region's last score while it has not changed, i.e. while its mean
+# absolute difference to the frame last scored stays under the threshold
+SKIP_UNCHANGED_FRAMES = True
+FRAME_CHANGE_MAX_MEAN_DIFF = 0.5  # gray levels
+
+# Detectors polling: the per-state interval grows by the backoff factor on each
+# tick where nothing changed, up to the max backoff, and the polling loop keeps
+# within the CPU budget (fraction of one core).
+SCHEDULER_BACKOFF_FACTOR = 1.5
+SCHEDULER_MAX_BACKOFF = 4.0
+SCHEDULER_CPU_BUDGET = 0.25
+
+# Threads scoring a detector's regions in parallel
+DETECTOR_SCORING_WORKERS = 4
+
+# Refreshes per second of the detectors' preview windows in "decimated" mode
+PREVIEW_REFRESH_RATE = 4.0
+
+# Frame bus, shared memory ring the frame_producer app publishes screen frames in
+FRAME_BUS_NAME = "from_pain_to_beauty_frame_bus"
+FRAME_BUS_SLOTS = 3
+FRAME_BUS_WAIT_TIMEOUT = 0.05  # seconds a consumer waits for a frame it has not read
+FRAME_BUS_STALE_AFTER = 1.0  # seconds after which frames are reported as stale
+FRAME_BUS_FIRST_FRAME_TIMEOUT = 5.0  # seconds a consumer waits for any frame
+
+# Recorded frames replayed instead of the screen (frame_producer, benchmarks):
+# images of a folder in name order, or a video
+REPLAY_FRAMES_ORIGIN = {"left": 0, "top": 0}  # screen position of the frames
+REPLAY_FRAMES_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+REPLAY_DEFAULT_FPS = 30.0  # for folders whose sidecar has no timestamps
+
+# The detectors' areas and templates are for this resolution. At startup each
+# template is looked for where its area lands on the actual monitor, then over
+# the whole screen (image pyramid, coarse to fine, see utils.template_registry),
+# and the regions found are cached per resolution.
+TEMPLATE_REFERENCE_RESOLUTION = (1920, 1080)
+TEMPLATE_SEARCH_SCALES = (0.9, 0.95, 1.0, 1.05, 1.1)  # around the monitor's
+TEMPLATE_LOCATE_MIN_SCORE = 0.8  # normalized cross-correlation
+TEMPLATE_PYRAMID_MIN_SIZE = 8  # pixels, smallest template side searched for
+
 # Window names
 SERVER_WINDOW_NAME = "MY SERVER"
 
@@ -28,4 +77,5 @@ SUBPROCESSES_PORTS = {
     "pregame_phase_detector": 59001,
     "robeau": 59002,
     "synonym_adder": 59003,
+    "frame_producer": 59004,
 }
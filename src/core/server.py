@@ -24,7 +24,7 @@ from src.core.constants import (
     TERMINAL_WINDOW_SLOTS_DB_FILE_PATH,
 )
 from src.utils.helpers import construct_script_name
-from src.utils.logging_utils import setup_logger
+from src.utils.logging_utils import merge_common_log_parts, setup_logger
 
 SCRIPT_NAME = construct_script_name(__file__)
 
@@ -154,6 +154,7 @@ async def send_message_to_subprocess_socket(
 
 async def main():
     print("Welcome to the server, bro. You know what to do.")
+    merge_common_log_parts()  # leftovers from subprocesses that did not exit cleanly
     conn = await sdh.create_connection(TERMINAL_WINDOW_SLOTS_DB_FILE_PATH)
     await twm.manage_window(conn, twm.WinType.SERVER, "SERVER")
     if conn:
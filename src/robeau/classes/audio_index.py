@@ -0,0 +1,229 @@
+import json
+import os
+import random
+import threading
+import time
+from logging import Logger
+from typing import NamedTuple, Optional
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class AudioEntry(NamedTuple):
+    text: str
+    files: tuple[str, ...]  # absolute paths, checked to exist when indexed
+    cum_weights: tuple[float, ...]
+    durations: tuple[Optional[float], ...]  # seconds, known for built assets only
+
+    def select_file(self) -> Optional[str]:
+        if not self.files:
+            return None
+        return random.choices(self.files, cum_weights=self.cum_weights)[0]
+
+
+class AudioIndex:
+    """Index of the response nodes audio files, keyed by normalized response text.
+    The mappings file is watched and only the nodes that changed get re-resolved
+    when it is rewritten (e.g. by neo4j_responses_merger). Nodes with missing
+    audio files are re-resolved once files are added to the folders those
+    should be in.
+
+    Files listed in the assets manifest (see scripts/build_voice_assets.py) are
+    swapped for their pre-rendered version, whose duration is known."""
+
+    def __init__(
+        self,
+        mappings_file: str,
+        base_dir: str,
+        logger: Logger,
+        manifest_file: Optional[str] = None,
+        check_interval: float = 2.0,
+    ):
+        self.mappings_file = mappings_file
+        self.manifest_file = manifest_file
+        self.base_dir = base_dir
+        self.logger = logger
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+
+        self._entries: dict[str, AudioEntry] = {}
+        self._entries_by_id: dict[int, tuple[tuple, AudioEntry]] = {}
+        self._mtime = 0.0
+        self._last_check = 0.0
+        # Nodes with audio files not found, and the mtimes of the folders those
+        # files should be in: adding a file to a folder changes its mtime
+        self._incomplete: set[int] = set()
+        self._missing_dirs: dict[str, Optional[float]] = {}
+
+        # Source file, as written in the mappings -> (built asset path, duration)
+        self._assets: dict[str, tuple[str, float]] = {}
+        self._durations: dict[str, float] = {}
+        self._manifest_mtime: Optional[float] = None
+
+        self.reload()
+
+    def get(self, text: str) -> Optional[AudioEntry]:
+        self.refresh_if_changed()
+        return self._entries.get(normalize_text(text))
+
+    def entries(self) -> list[AudioEntry]:
+        return list(self._entries.values())
+
+    def duration(self, audio_file: str) -> Optional[float]:
+        return self._durations.get(audio_file)
+
+    def refresh_if_changed(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.mappings_file)
+        except OSError:
+            return
+        if (
+            mtime != self._mtime
+            or self._manifest_changed()
+            or any(
+                self._dir_mtime(folder) != folder_mtime
+                for folder, folder_mtime in self._missing_dirs.items()
+            )
+        ):
+            self.reload()
+
+    @staticmethod
+    def _dir_mtime(folder: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(folder)
+        except OSError:
+            return None
+
+    def _manifest_changed(self) -> bool:
+        if not self.manifest_file:
+            return False
+        try:
+            mtime: Optional[float] = os.path.getmtime(self.manifest_file)
+        except OSError:
+            mtime = None
+        return mtime != self._manifest_mtime
+
+    def _load_manifest(self) -> bool:
+        """Return whether the built assets changed since the last load."""
+        if not self._manifest_changed():
+            return False
+
+        assets: dict[str, tuple[str, float]] = {}
+        manifest_mtime = None
+        if self.manifest_file and os.path.exists(self.manifest_file):
+            try:
+                manifest_mtime = os.path.getmtime(self.manifest_file)
+            except OSError:
+                pass
+            try:
+                with open(self.manifest_file, "r") as file:
+                    files = json.load(file)["files"]
+                assets = {
+                    source: (
+                        os.path.join(self.base_dir, built["asset"]),
+                        built["duration"],
+                    )
+                    for source, built in files.items()
+                }
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Could not load voice assets manifest: {e}")
+                # Not retried until it is written again, keep the current assets
+                self._manifest_mtime = manifest_mtime
+                return False
+
+        self._assets = assets
+        self._durations = dict(assets.values())
+        self._manifest_mtime = manifest_mtime
+        self.logger.info(f"Voice assets manifest loaded: {len(assets)} built files")
+        return True
+
+    def reload(self):
+        try:
+            mtime = os.path.getmtime(self.mappings_file)
+            with open(self.mappings_file, "r") as file:
+                nodes = json.load(file)["nodes"]
+        except (OSError, ValueError, KeyError) as e:
+            # Most likely caught mid-rewrite, keep the current index until next check
+            self.logger.warning(f"Could not load audio mappings: {e}")
+            return
+
+        with self.lock:
+            # Every node may point to a different file when the assets change
+            previous = {} if self._load_manifest() else self._entries_by_id
+            entries_by_id: dict[int, tuple[tuple, AudioEntry]] = {}
+            incomplete = self._incomplete
+            self._incomplete, self._missing_dirs = set(), {}
+            rebuilt = 0
+
+            for node in nodes:
+                signature = self._node_signature(node)
+                cached = previous.get(node["id"])
+                if cached and cached[0] == signature and node["id"] not in incomplete:
+                    entries_by_id[node["id"]] = cached
+                else:
+                    entries_by_id[node["id"]] = (signature, self._build_entry(node))
+                    rebuilt += 1
+
+            entries: dict[str, AudioEntry] = {}
+            for _, entry in entries_by_id.values():
+                key = normalize_text(entry.text)
+                if key in entries:
+                    self.logger.warning(f"Duplicate audio mapping for <<{entry.text}>>")
+                    continue
+                entries[key] = entry
+
+            self._entries_by_id = entries_by_id
+            self._entries = entries
+            self._mtime = mtime
+
+        removed = len(previous.keys() - entries_by_id.keys())
+        self.logger.info(
+            f"Audio index loaded: {len(entries)} responses "
+            f"({rebuilt} (re)built, {removed} removed)"
+        )
+
+    @staticmethod
+    def _node_signature(node: dict) -> tuple:
+        return node["properties"].get("text", ""), tuple(
+            (file["file"], file["weight"]) for file in node.get("audio_files", [])
+        )
+
+    def _build_entry(self, node: dict) -> AudioEntry:
+        text = node["properties"].get("text", "")
+        files = []
+        cum_weights = []
+        durations: list[Optional[float]] = []
+        total_weight = 0.0
+
+        for file in node.get("audio_files", []):
+            if not file["file"] or file["weight"] <= 0:
+                continue
+            audio_file, duration = self._resolve(file["file"])
+            if audio_file is None:
+                self._incomplete.add(node["id"])
+                continue
+            total_weight += file["weight"]
+            files.append(audio_file)
+            cum_weights.append(total_weight)
+            durations.append(duration)
+
+        return AudioEntry(text, tuple(files), tuple(cum_weights), tuple(durations))
+
+    def _resolve(self, file: str) -> tuple[Optional[str], Optional[float]]:
+        built = self._assets.get(file)
+        if built and os.path.exists(built[0]):
+            return built
+        audio_file = os.path.join(self.base_dir, file)
+        if not os.path.exists(audio_file):
+            self.logger.warning(f'Audio file "{audio_file}" not found.')
+            folder = os.path.dirname(audio_file)
+            if folder not in self._missing_dirs:
+                self._missing_dirs[folder] = self._dir_mtime(folder)
+            return None, None
+        return audio_file, None
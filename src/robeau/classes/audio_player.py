@@ -1,39 +1,133 @@
-import json
-import os
-import random
+import itertools
+import queue
 import threading
+from dataclasses import dataclass, field
 from logging import Logger
-from threading import Event, Thread
-from typing import Literal, Optional
+from threading import Thread
+from typing import Callable, Literal, NamedTuple, Optional
 
 import pygame
 
-from src.robeau.core.robeau_constants import ROBEAU_DIR_PATH
+from src.robeau.classes.audio_index import AudioIndex
+from src.robeau.classes.sound_cache import SoundCache
+from src.robeau.core.robeau_constants import (
+    AUDIO_SERVICE_START_TIMEOUT,
+    MIXER_CHANNELS,
+    MIXER_FREQUENCY,
+    MIXER_SIZE,
+    ROBEAU_DIR_PATH,
+    SOUND_CACHE_MAX_BYTES,
+    VOICE_ASSETS_MANIFEST_FILE_PATH,
+)
+
+# Posted by the mixer when a channel finishes (or is stopped), and by the public
+# methods to wake up the audio service when a command is queued.
+AUDIO_END_EVENT = pygame.event.custom_type()
+AUDIO_COMMAND_EVENT = pygame.event.custom_type()
+
+TerminationReason = Literal["stop", "end", "error"]
+
+
+class AudioServiceError(RuntimeError):
+    pass
+
+
+class PlaybackEvent(NamedTuple):
+    kind: Literal["started", "stopped", "ended", "error"]
+    group_id: int
+    response_string: str
+    audio_file: Optional[str] = None
+    duration: Optional[float] = None  # seconds, for pre-rendered voice lines
+
+
+class _PlayCommand(NamedTuple):
+    group_id: int
+    response_string: str
+
+
+class _StopCommand(NamedTuple):
+    group_id: Optional[int]  # None stops every group
+
+
+@dataclass
+class _Playback:
+    group_id: int
+    response_string: str
+    audio_file: str
+    sound: pygame.mixer.Sound
+    channel: pygame.mixer.Channel
+
+    def is_finished(self) -> bool:
+        return not self.channel.get_busy() or self.channel.get_sound() is not self.sound
+
+
+@dataclass
+class _TrackGroup:
+    """Tracks played together (multiple_tracks), the callbacks fire once for the
+    whole group."""
+
+    group_id: int
+    size: int
+    callbacks: dict[str, Optional[Callable]]
+    queued: int = 0
+    started: int = 0
+    failed: int = 0
+    done: int = 0
+    reasons: set[TerminationReason] = field(default_factory=set)
+
+    def is_full(self) -> bool:
+        return self.queued >= self.size
 
 
 class AudioPlayer:
-    pygame.mixer.init()
+    """Owns the pygame mixer through a single long-lived service thread. Play and
+    stop requests are queued as commands, tracks are grouped by ID and every
+    track's lifecycle is published to subscribers."""
 
-    def __init__(self, mappings_file, logger: Logger):
-        with open(mappings_file, "r") as file:
-            self.audio_mappings = json.load(file)["nodes"]
+    pygame.mixer.init(
+        frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS
+    )
+
+    def __init__(
+        self,
+        mappings_file,
+        logger: Logger,
+        sound_cache_bytes: int = SOUND_CACHE_MAX_BYTES,
+    ):
         self.logger = logger
-        self.playing_threads: list[Thread] = []
-        self.stop_events: list[Event] = []
-        self.threads_to_join: list[Thread] = []
+        self.audio_index = AudioIndex(
+            mappings_file, ROBEAU_DIR_PATH, logger, VOICE_ASSETS_MANIFEST_FILE_PATH
+        )
+        self.sound_cache = SoundCache(sound_cache_bytes, logger)
+        self._preload_queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self._preload_thread: Optional[Thread] = None
         self.lock = threading.Lock()
-        self.active_threads = 0
 
-        # Callbacks
+        # Callbacks, captured by each new group
         self.on_start = None
         self.on_stop = None
         self.on_end = None
         self.on_error = None
+        self._subscribers: list[Callable[[PlaybackEvent], None]] = []
 
-        # To manage groups of threads
-        self.group_count = 1
-        self.current_group_start_count = 0
-        self.current_group_done_count = 0
+        # Group bookkeeping, the open group is the one still accepting tracks
+        self._group_ids = itertools.count(1)
+        self._groups: dict[int, _TrackGroup] = {}
+        self._open_group: Optional[_TrackGroup] = None
+
+        # Only touched by the service thread
+        self.playbacks: list[_Playback] = []
+        self.active_tracks = 0
+
+        self._commands: queue.SimpleQueue[_PlayCommand | _StopCommand] = (
+            queue.SimpleQueue()
+        )
+        self._service_ready = threading.Event()
+        self._service_error: Optional[Exception] = None
+        self._service_thread = Thread(
+            target=self._audio_service, name="AudioService", daemon=True
+        )
+        self._service_thread.start()
 
     def set_callbacks(self, on_start=None, on_stop=None, on_end=None, on_error=None):
         self.on_start = on_start
@@ -41,139 +135,263 @@ class AudioPlayer:
         self.on_end = on_end
         self.on_error = on_error
 
-    def _get_audio_files(self, response_string):
-        for node in self.audio_mappings:
-            if node["properties"]["text"] == response_string:
-                return node.get("audio_files", [])
-        return []
-
-    def play_audio(self, response_string: str, multiple_tracks: Optional[int] = False):
-        self.group_count = multiple_tracks if multiple_tracks else 1
-        stop_event = threading.Event()
-        thread_name = f"AudioThread-{response_string}-{len(self.playing_threads) + 1}"
-        thread = threading.Thread(
-            target=self._play_audio,
-            args=(response_string, stop_event),
-            name=thread_name,
-            daemon=True,
-        )
+    def subscribe(self, listener: Callable[[PlaybackEvent], None]):
+        """Listeners are called from the audio service thread, for every track."""
+        self._subscribers.append(listener)
+
+    def unsubscribe(self, listener: Callable[[PlaybackEvent], None]):
+        if listener in self._subscribers:
+            self._subscribers.remove(listener)
+
+    def preload(self, response_strings):
+        """Decode, in the background, every audio file of the given responses."""
+        if self._preload_thread is None:
+            self._preload_thread = Thread(
+                target=self._preload_worker, name="AudioPreload", daemon=True
+            )
+            self._preload_thread.start()
+        for response_string in response_strings:
+            self._preload_queue.put(response_string)
+
+    def _preload_worker(self):
+        while True:
+            response_string = self._preload_queue.get()
+            entry = self.audio_index.get(response_string)
+            if entry is None:
+                continue
+            for audio_file in entry.files:
+                try:
+                    self.sound_cache.preload(audio_file)
+                except Exception as e:
+                    self.logger.warning(f"Could not preload {audio_file}: {e}")
+
+    # Commands
+
+    def play_audio(
+        self, response_string: str, multiple_tracks: Optional[int] = False
+    ) -> int:
+        """Queue a track and return the ID of its group. With multiple_tracks=N,
+        the next N calls share the same group."""
         with self.lock:
-            self.playing_threads.append(thread)
-            self.stop_events.append(stop_event)
-            self.active_threads += 1
-        thread.start()
-        self.logger.info(f"Started thread {thread_name}")
+            group = self._open_group
+            if group is None or group.is_full():
+                group = _TrackGroup(
+                    group_id=next(self._group_ids),
+                    size=multiple_tracks if multiple_tracks else 1,
+                    callbacks={
+                        "start": self.on_start,
+                        "stop": self.on_stop,
+                        "end": self.on_end,
+                        "error": self.on_error,
+                    },
+                )
+                self._groups[group.group_id] = group
+                self._open_group = group
+            group.queued += 1
 
-    def _play_audio(self, response_string: str, stop_event):
         try:
-            audio_files = self._get_audio_files(response_string)
-            if not audio_files:
-                self.logger.warning(f"No audio files found for <<{response_string}>>.")
-                self._thread_done(stop_event, termination_reason="error")
-                return
+            self._send(_PlayCommand(group.group_id, response_string))
+        except AudioServiceError:
+            with self.lock:
+                group.queued -= 1
+                if not group.queued:
+                    del self._groups[group.group_id]
+                    if self._open_group is group:
+                        self._open_group = None
+            raise
+        return group.group_id
+
+    def stop_audio(self, group_id: Optional[int] = None):
+        """Stop the tracks of a group, or every track when no group is given."""
+        if group_id is None:
+            self.logger.info("Stopping all audio.")
+        else:
+            self.logger.info(f"Stopping audio group {group_id}.")
+        self._send(_StopCommand(group_id))
 
-            audio_file_relative_path = self._select_weighted_random_file(audio_files)
-            audio_file = os.path.join(ROBEAU_DIR_PATH, audio_file_relative_path)
+    def _send(self, command: _PlayCommand | _StopCommand):
+        if not self._service_ready.wait(AUDIO_SERVICE_START_TIMEOUT):
+            raise AudioServiceError("The audio service did not start in time")
+        if self._service_error is not None:
+            raise AudioServiceError(
+                f"The audio service failed to start: {self._service_error}"
+            ) from self._service_error
+        self._commands.put(command)
+        pygame.event.post(pygame.event.Event(AUDIO_COMMAND_EVENT))
 
-            if not audio_file_relative_path or not os.path.exists(audio_file):
-                self.logger.warning(f'Audio file "{audio_file}" not found.')
-                self._thread_done(stop_event, termination_reason="error")
+    # Audio service thread
+
+    def _audio_service(self):
+        # The event queue needs the video subsystem, it has to be pumped from the
+        # thread that initialized it. No window is ever opened.
+        try:
+            pygame.display.init()
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed([AUDIO_END_EVENT, AUDIO_COMMAND_EVENT])
+        except Exception as e:
+            self.logger.exception(f"Could not start the audio service: {e}")
+            self._service_error = e
+            return
+        finally:
+            self._service_ready.set()
+
+        while True:
+            event = pygame.event.wait()
+            if event.type == AUDIO_COMMAND_EVENT:
+                self._run_commands()
+            elif event.type == AUDIO_END_EVENT:
+                try:
+                    self._handle_finished_tracks()
+                except Exception as e:
+                    self.logger.exception(f"Exception handling finished tracks: {e}")
+
+    def _run_commands(self):
+        while True:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
                 return
+            try:
+                if isinstance(command, _PlayCommand):
+                    self._play(command)
+                else:
+                    self._stop(command.group_id)
+            except Exception as e:
+                self.logger.exception(f"Exception running {command}: {e}")
 
-            self.logger.info(f"Starting to play audio for: <<{response_string}>>")
+    def _play(self, command: _PlayCommand):
+        group = self._groups[command.group_id]
+        self.active_tracks += 1
 
-            with self.lock:
-                self.current_group_start_count += 1
-                if self.current_group_start_count == self.group_count:
-                    self.logger.info("Calling on_start() callback.")
-                    if self.on_start:
-                        self.on_start()
-                    self.current_group_start_count = 0
-
-            sound = pygame.mixer.Sound(audio_file)
+        try:
+            entry = self.audio_index.get(command.response_string)
+            audio_file = entry.select_file() if entry else None
+            if not audio_file:
+                self.logger.warning(
+                    f"No audio files found for <<{command.response_string}>>."
+                )
+                self._track_failed(group, command.response_string)
+                return
+
+            sound = self.sound_cache.get(audio_file)
             channel = sound.play()
+            if channel is None:
+                self.logger.error(f"No free mixer channel to play {audio_file}")
+                self._track_failed(group, command.response_string, audio_file)
+                return
 
-            self.logger.info(f"Playing audio file: {audio_file}")
-            while channel.get_busy():
-                if stop_event.is_set():
-                    channel.stop()
-                    self._thread_done(stop_event, termination_reason="stop")
-                    return
-                pygame.time.wait(5)  # Reduce the wait time to check more frequently
+        except Exception as e:
+            self.logger.exception(f"Exception in play_audio: {e}")
+            self._track_failed(group, command.response_string)
+            return
 
+        channel.set_endevent(AUDIO_END_EVENT)
+        self.playbacks.append(
+            _Playback(
+                group.group_id, command.response_string, audio_file, sound, channel
+            )
+        )
+        self.logger.info(
+            f"Playing audio file: {audio_file} for <<{command.response_string}>> "
+            f"(group {group.group_id}, sound cache: {self.sound_cache.stats()})"
+        )
+        self._publish(
+            PlaybackEvent(
+                "started",
+                group.group_id,
+                command.response_string,
+                audio_file,
+                self.audio_index.duration(audio_file),
+            )
+        )
+
+        group.started += 1
+        self._check_group_started(group)
+
+        if not channel.get_busy():
+            # Finished before its end event was set, the event may never come
+            self._handle_finished_tracks()
+
+    def _stop(self, group_id: Optional[int]):
+        stopped = [
+            playback
+            for playback in self.playbacks
+            if group_id is None or playback.group_id == group_id
+        ]
+        for playback in stopped:
+            self.playbacks.remove(playback)
+            playback.channel.stop()
+            self._track_done(playback, "stop")
+
+    def _handle_finished_tracks(self):
+        finished = [playback for playback in self.playbacks if playback.is_finished()]
+        for playback in finished:
+            self.playbacks.remove(playback)
             self.logger.info(
-                f"Thread for <<{response_string}>> finished playing naturally."
+                f"Track for <<{playback.response_string}>> finished playing naturally."
             )
-            self._thread_done(stop_event, termination_reason="end")
+            self._track_done(playback, "end")
 
-        except Exception as e:
-            self.logger.exception(f"Exception in _play_audio: {e}")
-            self._thread_done(stop_event, termination_reason="error")
+    def _track_failed(
+        self,
+        group: _TrackGroup,
+        response_string: str,
+        audio_file: Optional[str] = None,
+    ):
+        self._publish(
+            PlaybackEvent("error", group.group_id, response_string, audio_file)
+        )
+        group.failed += 1
+        self._check_group_started(group)
+        self._group_track_done(group, "error")
 
-    def stop_audio(self):
-        self.logger.info("Stopping all audio.")
-        with self.lock:
-            for stop_event in self.stop_events:
-                stop_event.set()  # Signal all threads to stop
+    def _track_done(self, playback: _Playback, reason: TerminationReason):
+        kind = "stopped" if reason == "stop" else "ended"
+        self._publish(
+            PlaybackEvent(
+                kind, playback.group_id, playback.response_string, playback.audio_file
+            )
+        )
+        self._group_track_done(self._groups[playback.group_id], reason)
 
-    @staticmethod
-    def _select_weighted_random_file(audio_files) -> str:
-        total_weight = sum(file["weight"] for file in audio_files)
-        random_choice = random.uniform(0, total_weight)
-        current_weight = 0
+    def _check_group_started(self, group: _TrackGroup):
+        # on_start fires once every track of the group got its turn, if any played
+        if group.started and group.started + group.failed == group.size:
+            self._call_group_callback(group, "start")
 
-        for file in audio_files:
-            current_weight += file["weight"]
-            if current_weight >= random_choice:
-                return file["file"]
+    def _group_track_done(self, group: _TrackGroup, reason: TerminationReason):
+        self.active_tracks -= 1
+        self.logger.info(f"Active tracks remaining: {self.active_tracks}")
 
-        return "N/A"
+        group.done += 1
+        group.reasons.add(reason)
+        if group.done < group.size:
+            return
 
-    def _thread_done(
-        self, stop_event, termination_reason: Literal["stop", "end", "error"]
-    ):
         with self.lock:
-            self._remove_thread_and_stop_event(stop_event)
-            self._update_counters()
-            self._handle_callbacks(termination_reason)
+            del self._groups[group.group_id]
+            if self._open_group is group:
+                self._open_group = None
 
-    def _remove_thread_and_stop_event(self, stop_event):
-        try:
-            index = self.stop_events.index(stop_event)
-            thread = self.playing_threads.pop(index)
-            self.stop_events.pop(index)
-            self.threads_to_join.append(thread)  # Add thread to list to join later
-        except ValueError:
-            self.logger.error("Error removing thread or stop event.")
-            return
+        if "stop" in group.reasons:
+            self._call_group_callback(group, "stop")
+        elif "end" in group.reasons:
+            self._call_group_callback(group, "end")
+        else:
+            self._call_group_callback(group, "error")
+
+    def _call_group_callback(self, group: _TrackGroup, name: str):
+        self.logger.info(f"Calling on_{name}() callback for group {group.group_id}.")
+        callback = group.callbacks[name]
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.exception(f"on_{name}() callback failed: {e}")
 
-    def _update_counters(self):
-        self.active_threads -= 1
-        self.current_group_done_count += 1
-        self.logger.info(f"Active threads remaining: {self.active_threads}")
-
-    def _handle_callbacks(self, termination_reason: Literal["stop", "end", "error"]):
-        if self.current_group_done_count == self.group_count:
-            self.current_group_done_count = 0
-            if termination_reason == "stop":
-                self.logger.info("Calling on_stop() callback.")
-                if self.on_stop:
-                    self.on_stop()
-            elif termination_reason == "end":
-                self.logger.info("Calling on_end() callback.")
-                if self.on_end:
-                    self.on_end()
-            elif termination_reason == "error":
-                self.logger.info("Calling on_error() callback.")
-                if self.on_error:
-                    self.on_error()
-
-            self.playing_threads.clear()
-            self.stop_events.clear()
-
-    def join_threads(self):
-        """Join threads that have finished their work."""
-        self.logger.info("Joining completed threads.")
-        for thread in self.threads_to_join:
-            thread.join()
-        self.threads_to_join.clear()
+    def _publish(self, event: PlaybackEvent):
+        for listener in list(self._subscribers):
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.exception(f"Playback event listener failed: {e}")
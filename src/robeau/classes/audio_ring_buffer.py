@@ -0,0 +1,94 @@
+import threading
+from typing import Optional
+
+
+class AudioRingBuffer:
+    """Preallocated ring of fixed-size audio chunks, for one producer thread (the
+    audio callback) and one consumer thread.
+
+    Each side only ever moves its own index, so neither takes a lock to move
+    data. The producer never blocks: a chunk arriving while the ring is full is
+    dropped and counted in overruns. The consumer reads chunks as memoryviews
+    into the ring, valid until it calls advance()."""
+
+    def __init__(self, chunk_bytes: int, capacity: int):
+        self.chunk_bytes = chunk_bytes
+        self.capacity = capacity
+        self._buffer = bytearray(chunk_bytes * capacity)
+        self._view = memoryview(self._buffer)
+        self._sizes = [0] * capacity
+        self._timestamps = [0.0] * capacity
+
+        # Chunks written and read since the start, each owned by one side
+        self._written = 0
+        self._read = 0
+
+        self._data_ready = threading.Event()
+        self._space_ready = threading.Event()
+        self._finished = False  # producer is done, readers drain what is left
+        self.closed = False  # readers stop right away
+
+        self.overruns = 0
+        self.oversized = 0
+
+    def __len__(self) -> int:
+        return self._written - self._read
+
+    def write(self, data: bytes, timestamp: float, block: bool = False) -> bool:
+        """Copy a chunk in the ring. With block=False (audio callbacks) a full
+        ring drops the chunk; block=True waits for the consumer instead."""
+        while self._written - self._read >= self.capacity:
+            if not block or self.closed:
+                self.overruns += 1
+                return False
+            self._space_ready.clear()
+            if self._written - self._read >= self.capacity:
+                self._space_ready.wait(0.1)
+
+        size = len(data)
+        if size > self.chunk_bytes:
+            self.oversized += 1
+            size = self.chunk_bytes
+        slot = self._written % self.capacity
+        offset = slot * self.chunk_bytes
+        self._view[offset : offset + size] = data[:size]
+        self._sizes[slot] = size
+        self._timestamps[slot] = timestamp
+
+        self._written += 1  # publishes the chunk, once its data is in place
+        self._data_ready.set()
+        return True
+
+    def read(self) -> Optional[tuple[float, memoryview]]:
+        """Wait for the next chunk and return its capture timestamp and a view on
+        it, or None once the ring is closed (or finished and drained)."""
+        while self._read == self._written:
+            if self.closed or self._finished:
+                return None
+            self._data_ready.clear()
+            # Checked again after clearing, a chunk may have been written between
+            if self._read == self._written and not (self.closed or self._finished):
+                self._data_ready.wait()
+        if self.closed:
+            return None
+
+        slot = self._read % self.capacity
+        offset = slot * self.chunk_bytes
+        return (
+            self._timestamps[slot],
+            self._view[offset : offset + self._sizes[slot]],
+        )
+
+    def advance(self):
+        """Release the chunk returned by the last read(), its view gets reused."""
+        self._read += 1
+        self._space_ready.set()
+
+    def finish(self):
+        self._finished = True
+        self._data_ready.set()
+
+    def close(self):
+        self.closed = True
+        self._data_ready.set()
+        self._space_ready.set()
@@ -0,0 +1,130 @@
+import sys
+import threading
+from collections.abc import Iterator, Mapping
+from types import MappingProxyType
+from typing import Any, NamedTuple
+
+from neo4j.graph import Node, Relationship
+
+EMPTY_PARAMS: Mapping[str, Any] = MappingProxyType({})
+
+
+class NodeDataView(Mapping):
+    """Read-only view over a node's properties that hides the "text" key, without
+    copying the underlying properties."""
+
+    __slots__ = ("_properties",)
+
+    def __init__(self, properties: Mapping[str, Any]):
+        self._properties = properties
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "text":
+            raise KeyError(key)
+        return self._properties[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._properties if key != "text")
+
+    def __len__(self) -> int:
+        return len(self._properties) - ("text" in self._properties)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class NodeRecord:
+    """Immutable node of the graph snapshot. Interned by NodeRegistry, so every
+    connection and conversation item pointing to the same node shares it."""
+
+    __slots__ = ("element_id", "text", "labels", "_properties", "_data")
+
+    def __init__(self, element_id: str, labels: tuple[str, ...], properties: dict):
+        object.__setattr__(self, "element_id", element_id)
+        object.__setattr__(self, "text", properties.get("text", ""))
+        object.__setattr__(self, "labels", labels)
+        object.__setattr__(self, "_properties", MappingProxyType(properties))
+        object.__setattr__(self, "_data", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    @property
+    def properties(self) -> Mapping[str, Any]:
+        return self._properties
+
+    @property
+    def data(self) -> NodeDataView:
+        """Node properties without "text", built on first access only."""
+        data = self._data
+        if data is None:
+            data = NodeDataView(self._properties)
+            object.__setattr__(self, "_data", data)
+        return data
+
+    def __repr__(self) -> str:
+        return f"<{self.text}> {list(self.labels)}"
+
+
+class ConnectionRecord(NamedTuple):
+    start: NodeRecord
+    relationship: str
+    end: NodeRecord
+    params: Mapping[str, Any]
+
+    @property
+    def start_node(self) -> str:
+        return self.start.text
+
+    @property
+    def end_node(self) -> str:
+        return self.end.text
+
+    @property
+    def summary(self) -> tuple[str, str, str]:
+        return self.start.text, self.relationship, self.end.text
+
+    def __repr__(self) -> str:
+        return (
+            f"({self.start.text})-[{self.relationship} {dict(self.params)}]->"
+            f"({self.end.text}) {list(self.end.labels)} {self.end.data!r}"
+        )
+
+
+class NodeRegistry:
+    """Snapshot of the graph nodes seen so far in the session, keyed by element id."""
+
+    def __init__(self):
+        self._nodes: dict[str, NodeRecord] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def intern(self, node: Node) -> NodeRecord:
+        record = self._nodes.get(node.element_id)
+        if record is None:
+            record = NodeRecord(
+                sys.intern(node.element_id),
+                tuple(sys.intern(label) for label in node.labels),
+                dict(node),
+            )
+            with self.lock:
+                record = self._nodes.setdefault(record.element_id, record)
+        return record
+
+    def connection(
+        self, start: Node, relationship: Relationship, end: Node
+    ) -> ConnectionRecord:
+        return ConnectionRecord(
+            start=self.intern(start),
+            relationship=sys.intern(relationship.type),
+            end=self.intern(end),
+            params=(
+                MappingProxyType(dict(relationship)) if relationship else EMPTY_PARAMS
+            ),
+        )
+
+    def clear(self):
+        with self.lock:
+            self._nodes.clear()
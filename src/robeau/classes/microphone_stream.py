@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+import wave
+from typing import Iterator, Optional
+
+import pyaudio
+
+from src.robeau.classes.audio_ring_buffer import AudioRingBuffer
+from src.robeau.classes.voice_activity import Utterance, VoiceActivityDetector
+from src.robeau.core.robeau_constants import MICROPHONE_BUFFER_SECONDS, VAD_ENABLED
+
+# Yielded by the streams, views into their ring buffer unless copied (pre-roll)
+AudioChunk = bytes | memoryview
+
+
+class MicrophoneStream:
+    """Opens a recording stream as a generator yielding the voice lines chunks.
+    With voice activity detection, silence between utterances is not yielded and
+    finished utterances are queued in self.utterances.
+
+    Chunks go through a preallocated ring buffer and are yielded as views into
+    it, only valid until the generator is resumed: copy them (bytes(chunk)) to
+    keep them longer."""
+
+    def __init__(
+        self,
+        rate: int,
+        chunk: int,
+        pause_event: Optional[threading.Event] = None,
+        use_vad: bool = VAD_ENABLED,
+    ):
+        self._rate = rate
+        self._chunk = chunk
+        self._buff = AudioRingBuffer(
+            chunk_bytes=chunk * 2,
+            capacity=max(int(MICROPHONE_BUFFER_SECONDS * rate / chunk), 2),
+        )
+        self.closed = True
+        self.pause_event = pause_event
+        self._audio_interface = None
+        self._audio_stream = None
+        self.utterances: queue.SimpleQueue[Utterance] = queue.SimpleQueue()
+        self.vad = (
+            VoiceActivityDetector(rate, on_utterance_end=self.utterances.put)
+            if use_vad
+            else None
+        )
+
+    def __enter__(self):
+        self._audio_interface = pyaudio.PyAudio()
+        self._audio_stream = self._audio_interface.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self._rate,
+            input=True,
+            frames_per_buffer=self._chunk,
+            stream_callback=self._fill_buffer,
+        )
+        self.closed = False
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._audio_stream.stop_stream()
+        self._audio_stream.close()
+        self.closed = True
+        self._buff.close()
+        self._audio_interface.terminate()
+
+    def stop(self):
+        """Make the generator return, from any thread."""
+        self.closed = True
+        self._buff.close()
+
+    def _fill_buffer(self, in_data, _frame_count, _time_info, _status_flags):
+        # Never blocks, a full ring drops the chunk and counts an overrun
+        self._buff.write(in_data, time.monotonic())
+        return None, pyaudio.paContinue
+
+    def generator(self) -> Iterator[AudioChunk]:
+        try:
+            while not self.closed:
+                item = self._buff.read()
+                if item is None:
+                    return
+                timestamp, chunk = item
+                try:
+                    if self.vad is None:
+                        yield chunk
+                    else:
+                        for data in self.vad.process(chunk, timestamp):
+                            yield data
+                finally:
+                    self._buff.advance()
+        finally:
+            if self._buff.overruns:
+                print(f"Microphone buffer overran {self._buff.overruns} time(s)")
+            if self.vad is not None:
+                self.vad.flush()
+                print(
+                    f"VAD sent {self.vad.bytes_out}/{self.vad.bytes_in} bytes "
+                    f"over {self.vad.utterances} utterance(s)"
+                )
+
+
+class WavFileStream(MicrophoneStream):
+    """Stands in for the microphone by playing back a 16 bits mono WAV file at
+    its real pace (or as fast as possible with realtime=False)."""
+
+    def __init__(
+        self,
+        wav_path: str,
+        rate: int,
+        chunk: int,
+        pause_event: Optional[threading.Event] = None,
+        use_vad: bool = VAD_ENABLED,
+        realtime: bool = True,
+    ):
+        super().__init__(rate, chunk, pause_event, use_vad)
+        self.wav_path = wav_path
+        self.realtime = realtime
+        self.started_at: Optional[float] = None
+        self._feeder: Optional[threading.Thread] = None
+
+        with wave.open(wav_path, "rb") as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (
+                1,
+                2,
+                rate,
+            ):
+                raise ValueError(f"{wav_path} must be 16 bits mono at {rate}Hz")
+
+    def __enter__(self):
+        self.closed = False
+        self.started_at = time.monotonic()
+        self._feeder = threading.Thread(
+            target=self._feed, name="WavFileStream", daemon=True
+        )
+        self._feeder.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _feed(self):
+        with wave.open(self.wav_path, "rb") as wav:
+            position = 0
+            while not self.closed:
+                data = wav.readframes(self._chunk)
+                if not data:
+                    break
+                position += len(data) // 2
+                if self.realtime and self.started_at is not None:
+                    delay = self.started_at + position / self._rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                # Unlike the microphone, waits for room when read slower than fed
+                self._buff.write(data, time.monotonic(), block=True)
+        self._buff.finish()
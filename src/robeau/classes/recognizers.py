@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from typing import Iterator, NamedTuple, Optional
+
+from src.config.settings import (
+    GOOGLE_CLOUD_API_KEY,
+    SPEECH_RECOGNIZER,
+    SPEECH_REPLAY_WAV,
+    VOSK_MODEL_PATH,
+)
+from src.robeau.classes.microphone_stream import (
+    AudioChunk,
+    MicrophoneStream,
+    WavFileStream,
+)
+from src.robeau.core.robeau_constants import SPEECH_CHUNK, SPEECH_RATE
+
+
+class RecognitionResult(NamedTuple):
+    transcript: str
+    is_final: bool
+    stability: float = 0.0  # how unlikely an interim result is to change
+    timestamp: float = 0.0  # time.monotonic() when the result came out
+
+
+class SpeechRecognizer:
+    """Turns the audio of a stream into interim and final transcripts. By default
+    the stream is the microphone, a WavFileStream can be given instead."""
+
+    name = "base"
+
+    def __init__(
+        self,
+        pause_event: Optional[threading.Event] = None,
+        stream: Optional[MicrophoneStream] = None,
+    ):
+        self.stream = stream or MicrophoneStream(
+            SPEECH_RATE, SPEECH_CHUNK, pause_event=pause_event
+        )
+
+    def results(self) -> Iterator[RecognitionResult]:
+        with self.stream:
+            yield from self._recognize(self.stream.generator())
+
+    def stop(self):
+        """Ends the audio stream, results() returns once the backend is done."""
+        self.stream.stop()
+
+    def _recognize(self, audio: Iterator[AudioChunk]) -> Iterator[RecognitionResult]:
+        raise NotImplementedError
+
+
+class GoogleRecognizer(SpeechRecognizer):
+    name = "google"
+
+    def __init__(
+        self,
+        pause_event: Optional[threading.Event] = None,
+        stream: Optional[MicrophoneStream] = None,
+        language_code: str = "en-US",
+    ):
+        if not os.path.exists(GOOGLE_CLOUD_API_KEY):
+            raise ValueError(
+                "Missing Google API Key, set GOOGLE_CLOUD_API_KEY_PATH or use "
+                "another speech recognizer"
+            )
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GOOGLE_CLOUD_API_KEY
+        from google.cloud import speech
+
+        super().__init__(pause_event, stream)
+        self.speech = speech
+        self.client = speech.SpeechClient()
+        self.streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=SPEECH_RATE,
+                language_code=language_code,
+            ),
+            interim_results=True,
+        )
+
+    # noinspection PyTypeChecker, PyArgumentList
+    def _recognize(self, audio: Iterator[AudioChunk]) -> Iterator[RecognitionResult]:
+        requests = (
+            # The chunks are views into the stream's ring buffer, copied here only
+            self.speech.StreamingRecognizeRequest(audio_content=bytes(content))
+            for content in audio
+        )
+        # pylint: disable=E1123
+        responses = self.client.streaming_recognize(
+            config=self.streaming_config,
+            requests=requests,
+        )  # type: ignore
+        for response in responses:
+            if not response.results:
+                continue
+            result = response.results[0]
+            if not result.alternatives:
+                continue
+            yield RecognitionResult(
+                result.alternatives[0].transcript,
+                result.is_final,
+                result.stability,
+                time.monotonic(),
+            )
+
+
+class VoskRecognizer(SpeechRecognizer):
+    """Offline recognition, on device, with a Vosk model (VOSK_MODEL_PATH)."""
+
+    name = "vosk"
+
+    def __init__(
+        self,
+        pause_event: Optional[threading.Event] = None,
+        stream: Optional[MicrophoneStream] = None,
+        model_path: str = VOSK_MODEL_PATH,
+    ):
+        if not os.path.isdir(model_path):
+            raise ValueError(
+                f"Vosk model not found at {model_path}, set VOSK_MODEL_PATH"
+            )
+        try:
+            import vosk  # type: ignore
+        except ImportError as e:
+            raise ImportError("The vosk recognizer needs the vosk package") from e
+
+        super().__init__(pause_event, stream)
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+        self.vosk = vosk
+
+    def _recognize(self, audio: Iterator[AudioChunk]) -> Iterator[RecognitionResult]:
+        recognizer = self.vosk.KaldiRecognizer(self.model, SPEECH_RATE)
+        partial = ""
+
+        for content in audio:
+            if recognizer.AcceptWaveform(bytes(content)):
+                text = json.loads(recognizer.Result()).get("text", "")
+            elif (
+                partial
+                and self.stream.vad is not None
+                and not self.stream.vad.in_utterance
+            ):
+                # The voice activity detector already closed the utterance
+                text = json.loads(recognizer.FinalResult()).get("text", "")
+            else:
+                text = json.loads(recognizer.PartialResult()).get("partial", "")
+                if text and text != partial:
+                    partial = text
+                    yield RecognitionResult(text, False, 0.0, time.monotonic())
+                continue
+
+            partial = ""
+            if text:
+                yield RecognitionResult(text, True, 1.0, time.monotonic())
+
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if text:
+            yield RecognitionResult(text, True, 1.0, time.monotonic())
+
+
+class ReplayRecognizer(SpeechRecognizer):
+    """Plays a WAV file back and emits the transcripts scripted in its sidecar
+    JSON file (same name, .json), when playback reaches their time:
+    [{"time": 1.2, "transcript": "hey", "is_final": false}, ...]
+
+    Its default stream skips voice activity detection, which would hold the
+    scripted results back while it drops silence."""
+
+    name = "replay"
+
+    def __init__(
+        self,
+        pause_event: Optional[threading.Event] = None,
+        stream: Optional[MicrophoneStream] = None,
+        wav_path: str = SPEECH_REPLAY_WAV,
+        script_path: Optional[str] = None,
+        realtime: bool = True,
+    ):
+        super().__init__(
+            pause_event,
+            stream
+            or WavFileStream(
+                wav_path,
+                SPEECH_RATE,
+                SPEECH_CHUNK,
+                pause_event=pause_event,
+                use_vad=False,
+                realtime=realtime,
+            ),
+        )
+        script_path = script_path or f"{os.path.splitext(wav_path)[0]}.json"
+        with open(script_path, "r") as file:
+            self.script = sorted(json.load(file), key=lambda entry: entry["time"])
+
+    def _recognize(self, audio: Iterator[AudioChunk]) -> Iterator[RecognitionResult]:
+        # Time is measured in audio consumed, so the script holds whether or not
+        # the playback is realtime.
+        script = iter(self.script)
+        upcoming = next(script, None)
+        sent_bytes = 0
+
+        for content in audio:
+            vad = self.stream.vad
+            sent_bytes += len(content)
+            position = (vad.bytes_in if vad else sent_bytes) / 2 / SPEECH_RATE
+            while upcoming is not None and upcoming["time"] <= position:
+                yield self._result(upcoming)
+                upcoming = next(script, None)
+
+        while upcoming is not None and not self.stream.closed:  # unless stopped
+            yield self._result(upcoming)
+            upcoming = next(script, None)
+
+    @staticmethod
+    def _result(entry: dict) -> RecognitionResult:
+        return RecognitionResult(
+            entry["transcript"],
+            entry.get("is_final", True),
+            entry.get("stability", 1.0 if entry.get("is_final", True) else 0.0),
+            time.monotonic(),
+        )
+
+
+RECOGNIZERS: dict[str, type[SpeechRecognizer]] = {
+    recognizer.name: recognizer
+    for recognizer in (GoogleRecognizer, VoskRecognizer, ReplayRecognizer)
+}
+
+
+def create_recognizer(
+    backend: str = SPEECH_RECOGNIZER,
+    pause_event: Optional[threading.Event] = None,
+    **kwargs,
+) -> SpeechRecognizer:
+    if backend not in RECOGNIZERS:
+        raise ValueError(
+            f"Unknown speech recognizer {backend}, must be one of {list(RECOGNIZERS)}"
+        )
+    return RECOGNIZERS[backend](pause_event=pause_event, **kwargs)
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from logging import Logger
+
+import pygame
+
+
+class SoundCache:
+    """LRU cache of decoded pygame Sounds, bounded by the size of their PCM data."""
+
+    def __init__(self, max_bytes: int, logger: Logger):
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.lock = threading.Lock()
+        self._sounds: OrderedDict[str, tuple[pygame.mixer.Sound, int]] = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _sound_size(sound: pygame.mixer.Sound) -> int:
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        bytes_per_sample = abs(sample_format) // 8
+        return int(sound.get_length() * frequency) * channels * bytes_per_sample
+
+    def get(self, audio_file: str) -> pygame.mixer.Sound:
+        with self.lock:
+            cached = self._sounds.get(audio_file)
+            if cached is not None:
+                self._sounds.move_to_end(audio_file)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        # Decode outside the lock, a concurrent miss on the same file only costs
+        # a duplicate decode.
+        sound = pygame.mixer.Sound(audio_file)
+        self._store(audio_file, sound)
+        return sound
+
+    def preload(self, audio_file: str):
+        with self.lock:
+            if audio_file in self._sounds:
+                return
+        self._store(audio_file, pygame.mixer.Sound(audio_file))
+
+    def _store(self, audio_file: str, sound: pygame.mixer.Sound):
+        size = self._sound_size(sound)
+        if size > self.max_bytes:
+            self.logger.warning(
+                f"{audio_file} ({size} bytes) exceeds the sound cache budget, not cached"
+            )
+            return
+
+        with self.lock:
+            if audio_file in self._sounds:
+                return
+            self._sounds[audio_file] = (sound, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                evicted_file, (_, evicted_size) = self._sounds.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+                self.logger.debug(f"Evicted {evicted_file} from sound cache")
+
+    def stats(self) -> dict[str, int | float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._sounds),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self.lock:
+            self._sounds.clear()
+            self.current_bytes = 0
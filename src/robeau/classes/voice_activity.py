@@ -0,0 +1,196 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.robeau.core.robeau_constants import (
+    VAD_ENERGY_MARGIN_DB,
+    VAD_FRAME_MS,
+    VAD_HANGOVER_MS,
+    VAD_KEEPALIVE_INTERVAL,
+    VAD_MAX_ZCR,
+    VAD_MIN_ENERGY_DBFS,
+    VAD_PRE_ROLL_MS,
+    VAD_SPEECH_FRAMES_RATIO,
+)
+
+
+@dataclass
+class Utterance:
+    # Timestamps of the chunks (time.monotonic() when captured) where the voice
+    # started and stopped, both from the same clock even when replayed fast
+    start: float
+    end: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.end - self.start if self.end is not None else None
+
+
+class VoiceActivityDetector:
+    """Gates 16 bits mono PCM chunks on voice activity, using the energy and the
+    zero-crossing rate of short frames against an adaptive noise floor.
+
+    Voiced chunks are forwarded along with a short pre-roll, and the audio keeps
+    flowing for a hangover delay after the voice stops so the recognizer sees the
+    end of the utterance. Silence is dropped, apart from an occasional keep-alive
+    chunk of digital silence.
+
+    Chunks may be views into a reused buffer, the ones held back for the
+    pre-roll are copied."""
+
+    def __init__(
+        self,
+        rate: int,
+        on_utterance_start: Optional[Callable[[Utterance], None]] = None,
+        on_utterance_end: Optional[Callable[[Utterance], None]] = None,
+    ):
+        self.frame_size = int(rate * VAD_FRAME_MS / 1000)
+        self.rate = rate
+        self.on_utterance_start = on_utterance_start
+        self.on_utterance_end = on_utterance_end
+
+        self.noise_floor_db = VAD_MIN_ENERGY_DBFS
+        self.utterance: Optional[Utterance] = None
+        self._pre_roll: deque[bytearray] = deque()
+        self._pre_roll_pool: list[bytearray] = []  # buffers reused for copies
+        self._pre_roll_samples = 0
+        self._silent_samples = 0
+        self._silence_start: Optional[float] = None  # hangover's first chunk
+        self._last_timestamp: Optional[float] = None
+        self._last_sent = time.monotonic()
+        self._silence = b""
+
+        # Statistics
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.utterances = 0
+
+    @property
+    def in_utterance(self) -> bool:
+        return self.utterance is not None
+
+    def _voiced_ratio(self, samples: np.ndarray) -> float:
+        frames_count = len(samples) // self.frame_size
+        if not frames_count:
+            return 0.0
+        frames = samples[: frames_count * self.frame_size].reshape(
+            frames_count, self.frame_size
+        )
+        floats = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(floats * floats, axis=1)) + 1e-10
+        energy_db = 20 * np.log10(rms)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_size
+
+        threshold = max(self.noise_floor_db + VAD_ENERGY_MARGIN_DB, VAD_MIN_ENERGY_DBFS)
+        # Loud enough, and either tonal or clearly louder than a hiss would be
+        voiced = (energy_db >= threshold) & (
+            (zcr <= VAD_MAX_ZCR) | (energy_db >= threshold + VAD_ENERGY_MARGIN_DB)
+        )
+        self._update_noise_floor(energy_db[~voiced])
+        return float(np.count_nonzero(voiced)) / frames_count
+
+    def _update_noise_floor(self, unvoiced_energy_db: np.ndarray):
+        for energy in unvoiced_energy_db:
+            # Follows drops right away, rises slowly so speech does not drag it up
+            if energy < self.noise_floor_db:
+                self.noise_floor_db = float(energy)
+            else:
+                self.noise_floor_db += 0.02 * (float(energy) - self.noise_floor_db)
+
+    def process(
+        self, chunk: bytes | memoryview, timestamp: Optional[float] = None
+    ) -> list[bytes | memoryview]:
+        """Return the audio to forward for this chunk, possibly empty."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self._last_timestamp = timestamp
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        self.bytes_in += len(chunk)
+        is_speech = self._voiced_ratio(samples) >= VAD_SPEECH_FRAMES_RATIO
+
+        if self.utterance is None:
+            if is_speech:
+                output: list[bytes | memoryview] = [
+                    memoryview(data) for data in self._pre_roll
+                ]
+                output.append(chunk)
+                self._clear_pre_roll()
+                self._start_utterance(timestamp)
+            else:
+                self._add_pre_roll(chunk)
+                output = self._keepalive(chunk, timestamp)
+        else:
+            output = [chunk]
+            if is_speech:
+                self._silent_samples = 0
+                self._silence_start = None
+            else:
+                if self._silence_start is None:
+                    self._silence_start = timestamp
+                self._silent_samples += len(samples)
+                if self._silent_samples * 1000 >= VAD_HANGOVER_MS * self.rate:
+                    self._end_utterance(timestamp)
+
+        if output:
+            self._last_sent = timestamp
+            self.bytes_out += sum(len(data) for data in output)
+        return output
+
+    def _add_pre_roll(self, chunk: bytes | memoryview):
+        copy = self._pre_roll_pool.pop() if self._pre_roll_pool else bytearray()
+        copy[:] = chunk
+        self._pre_roll.append(copy)
+        self._pre_roll_samples += len(chunk) // 2
+        while (
+            len(self._pre_roll) > 1
+            and (self._pre_roll_samples - len(self._pre_roll[0]) // 2) * 1000
+            >= VAD_PRE_ROLL_MS * self.rate
+        ):
+            dropped = self._pre_roll.popleft()
+            self._pre_roll_samples -= len(dropped) // 2
+            self._pre_roll_pool.append(dropped)
+
+    def _clear_pre_roll(self):
+        # Only reused once the consumer moved past them, on a later chunk
+        self._pre_roll_pool.extend(self._pre_roll)
+        self._pre_roll.clear()
+        self._pre_roll_samples = 0
+
+    def _keepalive(self, chunk: bytes | memoryview, timestamp: float) -> list[bytes]:
+        if timestamp - self._last_sent >= VAD_KEEPALIVE_INTERVAL:
+            if len(self._silence) != len(chunk):
+                self._silence = bytes(len(chunk))
+            return [self._silence]
+        return []
+
+    def _start_utterance(self, timestamp: float):
+        self.utterance = Utterance(start=timestamp)
+        self._silent_samples = 0
+        self._silence_start = None
+        self.utterances += 1
+        if self.on_utterance_start:
+            self.on_utterance_start(self.utterance)
+
+    def _end_utterance(self, timestamp: float):
+        utterance = self.utterance
+        self.utterance = None
+        if utterance is None:
+            return
+        # The utterance ended when the hangover started
+        utterance.end = (
+            timestamp if self._silence_start is None else self._silence_start
+        )
+        self._silent_samples = 0
+        self._silence_start = None
+        if self.on_utterance_end:
+            self.on_utterance_end(utterance)
+
+    def flush(self, timestamp: Optional[float] = None):
+        """Close the current utterance, if any, e.g. when the stream closes."""
+        if self.utterance is not None:
+            if timestamp is None:
+                timestamp = self._last_timestamp
+            self._end_utterance(time.monotonic() if timestamp is None else timestamp)
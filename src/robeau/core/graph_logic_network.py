@@ -1,18 +1,22 @@
+import logging
 import random
 import threading
 import time
 from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from threading import Thread
 from typing import Literal, Optional
 
 import keyboard
-from neo4j import GraphDatabase, Result, Session
+from neo4j import Driver, GraphDatabase, Result, Session
 from prompt_toolkit import PromptSession
 from prompt_toolkit.patch_stdout import patch_stdout
 
 from src.config.settings import NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER
 from src.robeau.classes.audio_player import AudioPlayer
+from src.robeau.classes.graph_records import ConnectionRecord, NodeRegistry
 from src.robeau.core.graph_logic_network_constants import (
     ADMIN,
     ANY_MATCHING_PLEA,
@@ -37,14 +41,25 @@ from src.robeau.core.graph_logic_network_constants import (
     QuerySource,
     transmission_output_nodes,
 )
+from src.robeau.core.robeau_constants import (
+    PRELOAD_NEXT_VOICE_LINES,
+    PREFETCH_TTL,
+    ROBEAU_LABELS,
+)
 from src.robeau.core.robeau_constants import (
     ROBEAU_RESPONSES_JSON_FILE_PATH as ROBEAU_RESPONSES,
 )
 from src.utils.helpers import construct_script_name
-from src.utils.logging_utils import log_empty_lines, setup_logger
+from src.utils.logging_utils import (
+    VERBOSITY_PROFILES,
+    LazyFormat,
+    log_empty_lines,
+    set_verbosity,
+    setup_logger,
+)
 
 SCRIPT_NAME = construct_script_name(__file__)
-logger = setup_logger(SCRIPT_NAME, "DEBUG")
+logger = setup_logger(SCRIPT_NAME)
 
 
 class TypingDetector:
@@ -112,8 +127,8 @@ class ConversationState:
     def _add_item(
         self,
         node: str,
-        labels: list[str],
-        node_data: dict,
+        labels: Sequence[str],
+        node_data: Mapping,
         duration: float | None,
         item_type: str,
     ):
@@ -129,7 +144,7 @@ class ConversationState:
                 existing_item["duration"] = duration
                 existing_item["time_left"] = duration
                 existing_item["start_time"] = start_time
-                self.logger.info(f"Reset the time duration of {existing_item}")
+                self.logger.info("Reset the time duration of %s", existing_item)
                 return
 
         if item_type == "listens":
@@ -151,13 +166,13 @@ class ConversationState:
         }
 
         item_list.append(item)
-        self.logger.info(f"Added {item_type} <{node}>: {item}")
+        self.logger.info("Added %s <%s>: %s", item_type, node, item)
 
     def add_item(
         self,
         node: str,
-        labels: list[str],
-        node_data: dict,
+        labels: Sequence[str],
+        node_data: Mapping,
         duration: float | None,
         item_type: str,
     ):
@@ -169,7 +184,7 @@ class ConversationState:
             )
 
     def delay_item(
-        self, node: str, labels: list[str], data: dict, duration: float | None
+        self, node: str, labels: Sequence[str], data: Mapping, duration: float | None
     ):
         """Unused right now but may be used in the future, Logic wise just know that the difference between this and
         add_initiation is that this is for items that are already in the conversation state, which means a previously
@@ -240,21 +255,26 @@ class ConversationState:
             )
 
     def _remove_expired(
-        self, items: list[dict], log_messages: list[str], session: Session, key: str
+        self,
+        items: list[dict],
+        log_messages: list[str] | None,
+        session: Session,
+        key: str,
     ) -> list[dict]:
         valid_items, expired_items = self._filter_expired_items(items)
         self._handle_initiations(expired_items, session)
 
-        for item in valid_items:
-            item_type = item.get("type")
-            node = item.get("node")
-            labels = item.get("labels", [])
-            time_left = item.get("time_left")
+        if log_messages is not None:
+            for item in valid_items:
+                item_type = item.get("type")
+                node = item.get("node")
+                labels = item.get("labels", [])
+                time_left = item.get("time_left")
 
-            if time_left is not None:
-                log_messages.append(
-                    f"{item_type}: {labels}: <{node}> ({time_left:.2f}): {item}"
-                )
+                if time_left is not None:
+                    log_messages.append(
+                        f"{item_type}: {labels}: <{node}> ({time_left:.2f}): {item}"
+                    )
 
         items_after_initiations = self.context[key]
         valid_items = [
@@ -266,7 +286,7 @@ class ConversationState:
     def _update_timed_items(
         self,
         session: Session,
-        log_messages: list[str],
+        log_messages: list[str] | None,
     ):
         for key in self.context:
             updated_items = self._remove_expired(
@@ -274,7 +294,7 @@ class ConversationState:
             )
             self.context[key] = updated_items
 
-    def _update_timed_states(self, session: Session, log_messages: list[str]):
+    def _update_timed_states(self, session: Session, log_messages: list[str] | None):
         states_to_update = ["stubborn", "unresponsive"]
 
         for state in states_to_update:
@@ -287,7 +307,10 @@ class ConversationState:
                 continue
 
             if time_left > 0:
-                log_messages.append(f"State {state}: ({time_left:.2f}): {state_obj}")
+                if log_messages is not None:
+                    log_messages.append(
+                        f"State {state}: ({time_left:.2f}): {state_obj}"
+                    )
             else:
                 state_obj["state"] = False
                 logger.info(f"Robeau is no longer in state {state} ")
@@ -296,23 +319,29 @@ class ConversationState:
 
             setattr(self, state, state_obj)
 
-    def _update_attitude_levels(self, log_messages: list[str]):
+    def _update_attitude_levels(self, log_messages: list[str] | None):
         for attitude, level in self.attitude_levels.items():
             if level > 0 and random.randint(0, 9) == 0:
                 level -= 1
-                log_messages.append(f"{attitude}: level decreased to {level}")
+                if log_messages is not None:
+                    log_messages.append(f"{attitude}: level decreased to {level}")
 
     def update_conversation_state(self, session: Session):
-        log_messages: list[str] = []
+        # Runs twice a second: only build the update report when it will be logged.
+        verbose = self.logger.isEnabledFor(logging.DEBUG)
+        log_messages: list[str] | None = [] if verbose else None
 
         self._update_timed_items(session, log_messages)
         self._update_timed_states(session, log_messages)
         self._update_attitude_levels(log_messages)
 
+        if not verbose:
+            return
+
         if log_messages:
-            self.logger.info("Time-bound updates:\n" + "\n".join(log_messages))
+            self.logger.debug("Time-bound updates:\n%s", "\n".join(log_messages))
         else:
-            self.logger.info("No time-bound items or states to update")
+            self.logger.debug("No time-bound items or states to update")
 
     def reset_attribute(self, *attributes: str):
         reset_attributes = []
@@ -343,16 +372,12 @@ class ConversationState:
             )
             or []
         )
-        formatted_definitions = [
-            (i["start_node"], i["relationship"], i["end_node"])
-            for i in definitions_to_revert
-        ]
+        formatted_definitions = [i.summary for i in definitions_to_revert]
         self.logger.info(f"Obtained definitions to revert: {formatted_definitions}")
 
         for connection in definitions_to_revert:
-            relationship = connection.get("relationship", "").lower()
-            node = connection.get("end_node", "")
-            self._revert_individual_definition(relationship, node)
+            relationship = connection.relationship.lower()
+            self._revert_individual_definition(relationship, connection.end_node)
 
     def _revert_individual_definition(self, relationship: str, node: str):
         for definition_type, definitions_list in self.context.items():
@@ -368,6 +393,9 @@ class ConversationState:
                 self.logger.info(f"Removed {definition_type}: <{node}>")
 
     def log_conversation_state(self):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+
         log_message = []
 
         states = {"stubborn": self.stubborn, "unresponsive": self.unresponsive}
@@ -404,10 +432,11 @@ class ConversationState:
         log_message.extend(sorted(attitude_messages))
         log_message.extend(listening_context_message)
 
-        self.logger.info("\n".join(log_message))
+        self.logger.debug("\n".join(log_message))
 
 
 audio_player = AudioPlayer(ROBEAU_RESPONSES, logger=logger)
+node_registry = NodeRegistry()
 
 processing_nodes_audio = threading.Event()
 audio_player_first_callback = threading.Event()
@@ -417,6 +446,14 @@ audio_finished_event = threading.Event()
 
 node_thread: Thread | None = None
 
+# Connections fetched ahead of time by prefetch_node(), by lowercase node text
+prefetched_connections: dict[str, tuple[float, list[ConnectionRecord]]] = {}
+prefetch_lock = threading.Lock()
+
+# Looks up, in the background, the voice lines following the nodes just reached
+next_hop_driver: Driver | None = None
+next_hop_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="NextHop")
+
 
 def handle_transmission_output(
     transmission_node: str, conversation_state: ConversationState
@@ -515,7 +552,105 @@ def play_audio(
     audio_player.play_audio(node, multiple_activations)
 
 
-def process_node_data(data: dict, conversation_state: ConversationState):
+def preload_next_voice_lines(connections: list[ConnectionRecord]):
+    """Warm the sound cache with the voice lines the next hop may play. Only
+    worth it ahead of time: right before playing them, the preload races the
+    playback's own decode."""
+    if not PRELOAD_NEXT_VOICE_LINES:
+        return
+    next_vocal_nodes = {
+        connection.end_node
+        for connection in connections
+        if any(label in ROBEAU_LABELS for label in connection.end.labels)
+    }
+    if next_vocal_nodes:
+        audio_player.preload(next_vocal_nodes)
+
+
+PREFETCH_QUERY = """
+    MATCH (x)-[r]->(y)
+    WHERE toLower(x.text) = toLower($text)
+    RETURN x, r, y
+    """
+
+
+def prefetch_node(driver: Driver, text: str):
+    """Fetch, on a session of its own, the outgoing connections of every node
+    named text, and warm the audio of the voice lines they lead to. Used on
+    speculative matches, before the final transcript comes in."""
+    with driver.session() as session:
+        connections = [
+            node_registry.connection(record["x"], record["r"], record["y"])
+            for record in session.run(PREFETCH_QUERY, text=text)
+        ]
+    now = time.monotonic()
+    with prefetch_lock:
+        # Interims that never became the final transcript are never taken
+        for expired in [
+            key
+            for key, (prefetched_at, _) in prefetched_connections.items()
+            if now - prefetched_at > PREFETCH_TTL
+        ]:
+            del prefetched_connections[expired]
+        prefetched_connections[text.lower()] = (now, connections)
+    logger.debug("Prefetched %d connection(s) for <%s>", len(connections), text)
+    preload_next_voice_lines(connections)
+
+
+NEXT_HOP_QUERY = """
+    MATCH (x)-[r]->(y)
+    WHERE toLower(x.text) IN $texts
+    RETURN x, r, y
+    """
+
+
+def preload_next_hop(driver: Driver, nodes: list[str]):
+    """Fetch, on a session of its own, the outgoing connections of the nodes
+    just reached, and warm the audio of the voice lines they lead to, while the
+    nodes' own voice lines play."""
+    try:
+        with driver.session() as session:
+            connections = [
+                node_registry.connection(record["x"], record["r"], record["y"])
+                for record in session.run(
+                    NEXT_HOP_QUERY, texts=[node.lower() for node in nodes]
+                )
+            ]
+    except Exception as e:
+        logger.warning(f"Could not fetch the next hop of {nodes}: {e}")
+        return
+    preload_next_voice_lines(connections)
+
+
+def take_prefetched_connections(
+    text: str, labels: list[str], conversation_state: ConversationState
+) -> list[ConnectionRecord] | None:
+    """Prefetched connections filtered as query_database() would, or None when
+    none were prefetched recently."""
+    with prefetch_lock:
+        prefetched = prefetched_connections.pop(text.lower(), None)
+    if prefetched is None or time.monotonic() - prefetched[0] > PREFETCH_TTL:
+        return None
+
+    listening_context = conversation_state.listening_context
+    connections = []
+    for connection in prefetched[1]:
+        start_labels = connection.start.labels
+        for label in labels:
+            if label not in start_labels:
+                continue
+            if label == "Whisper" and (
+                not listening_context
+                or connection.start.properties.get("context") != listening_context
+            ):
+                continue
+            connections.append(connection)
+            break
+    logger.info("Using %d prefetched connection(s) for <%s>", len(connections), text)
+    return connections
+
+
+def process_node_data(data: Mapping, conversation_state: ConversationState):
     for attitude, level in conversation_state.attitude_levels.items():
         if data.get(attitude + "LevelIncrease"):
             new_level = level + data[attitude + "LevelIncrease"]
@@ -530,17 +665,17 @@ def process_node_data(data: dict, conversation_state: ConversationState):
 
 
 def activate_connection_or_item(
-    node_dict: dict,
+    node_dict: ConnectionRecord | dict,
     conversation_state: ConversationState,
     dict_type: Literal["connection", "item"],
     multiple_activations: Optional[int] = False,
 ):
-    """Works for both activation connections (end_node) and dictionaries from the conversation state(node)."""
+    """Works for both activation connections (end node) and dictionaries from the conversation state(node)."""
 
     if dict_type == "connection":
-        node = node_dict.get("end_node", "")
-        labels = node_dict.get("labels", {}).get("end", "")
-        data = node_dict.get("data", {}).get("end", {})
+        node = node_dict.end_node
+        labels = node_dict.end.labels
+        data = node_dict.end.data
 
     elif dict_type == "item":
         node = node_dict.get("node", "")
@@ -550,71 +685,81 @@ def activate_connection_or_item(
     if data:
         process_node_data(data, conversation_state)
 
-    vocal_labels = ["Response", "Question", "Test"]
-
-    if any(label in vocal_labels for label in labels):
+    if any(label in ROBEAU_LABELS for label in labels):
         play_audio(node, conversation_state, multiple_activations)
         print(node)
     else:
-        logger.info(f" <{node}> with labels {labels} is not considered an audio output")
+        logger.info(
+            " <%s> with labels %s is not considered an audio output", node, labels
+        )
         print(f"-{node}")  # - is to indicate that the node is not an audio output
 
     return node_dict
 
 
 def activate_connections(
-    connections: list[dict],
+    connections: list[ConnectionRecord],
     conversation_state: ConversationState,
     connection_type: Literal["regular", "random", "logic_gate"],
 ):
-    conn_names = [
-        f"{', '.join(list(connection.values())[0:3])}" for connection in connections
-    ]
-
-    if len(conn_names) > 0:
+    if connections:
         logger.info(
-            f"Activating {len(connections)} {connection_type} connection(s): {conn_names}"
+            "Activating %d %s connection(s): %s",
+            len(connections),
+            connection_type,
+            LazyFormat(lambda: [", ".join(conn.summary) for conn in connections]),
         )
+    # Only the voice lines play audio, their tracks make up one audio group
+    vocal_count = sum(
+        any(label in ROBEAU_LABELS for label in connection.end.labels)
+        for connection in connections
+    )
     for connection in connections:
         activate_connection_or_item(
             connection,
             conversation_state,
             "connection",
-            multiple_activations=len(connections) if len(connections) > 1 else False,
+            multiple_activations=vocal_count if vocal_count > 1 else False,
         )
     return connections
 
 
 def additional_conditions_are_true(
-    connections: list[tuple[dict, bool, str]], conversation_state: ConversationState
+    connections: list[tuple[ConnectionRecord, bool, str]],
+    conversation_state: ConversationState,
 ):
     for connection in connections:
         conn, is_true, attribute = connection
         context = conversation_state.context[attribute]
 
         if is_true:
-            if not any(conn["end_node"] == item["node"] for item in context):
+            if not any(conn.end_node == item["node"] for item in context):
                 return False
         else:
-            if any(conn["end_node"] == item["node"] for item in context):
+            if any(conn.end_node == item["node"] for item in context):
                 return False
     return True
 
 
 def initial_condition_is_true(
-    connection: tuple[dict, bool, str], conversation_state: ConversationState
+    connection: tuple[ConnectionRecord, bool, str],
+    conversation_state: ConversationState,
 ):
     conn, is_true, attribute = connection
     context = conversation_state.context[attribute]
     if is_true:
-        return any(conn["end_node"] == item["node"] for item in context)
+        return any(conn.end_node == item["node"] for item in context)
     else:
-        return not any(conn["end_node"] == item["node"] for item in context)
+        return not any(conn.end_node == item["node"] for item in context)
 
 
 def filter_logic_connections(
-    attribute_map: dict, connections: list[dict], logic_gate: str
-) -> tuple[tuple[dict, bool, str] | None, list[tuple[dict, bool, str]], list[dict]]:
+    attribute_map: dict, connections: list[ConnectionRecord], logic_gate: str
+) -> tuple[
+    tuple[ConnectionRecord, bool, str] | None,
+    list[tuple[ConnectionRecord, bool, str]],
+    list[ConnectionRecord],
+]:
 
     is_conditions = {"IS_" + key: attr for key, attr in attribute_map.items()}
     and_is_conditions = {"AND_IS_" + key: attr for key, attr in attribute_map.items()}
@@ -624,12 +769,12 @@ def filter_logic_connections(
         "AND_IS_NOT_" + key: attr for key, attr in attribute_map.items()
     }
 
-    initial_conn: tuple[dict, bool, str] | None = None
-    and_conns: list[tuple[dict, bool, str]] = []
-    then_conns: list[dict] = []
+    initial_conn: tuple[ConnectionRecord, bool, str] | None = None
+    and_conns: list[tuple[ConnectionRecord, bool, str]] = []
+    then_conns: list[ConnectionRecord] = []
 
     for conn in connections:
-        relationship = conn["relationship"]
+        relationship = conn.relationship
 
         if relationship in is_conditions:
             initial_conn = (conn, True, is_conditions[relationship])
@@ -654,21 +799,22 @@ def filter_logic_connections(
     if not then_conns:
         logger.error(f'No "THEN" connection found for LogicGate: <{logic_gate}>')
 
-    formatted_and_conns = "\nAnd: ".join([str(and_conn) for and_conn in and_conns])
-    formatted_then_conns = "\nThen: ".join([str(then_conn) for then_conn in then_conns])
-
-    logger.info(
-        f"LogicGate <{logic_gate}> connections: \nInitial: {initial_conn} "
-        f"\nAnd: {formatted_and_conns} \nThen: {formatted_then_conns}"
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "LogicGate <%s> connections: \nInitial: %s \nAnd: %s \nThen: %s",
+            logic_gate,
+            initial_conn,
+            "\nAnd: ".join([str(and_conn) for and_conn in and_conns]),
+            "\nThen: ".join([str(then_conn) for then_conn in then_conns]),
+        )
     return initial_conn, and_conns, then_conns
 
 
 def process_logic_connections(
-    connections: list[dict],
+    connections: list[ConnectionRecord],
     logic_gate: str,
     conversation_state: ConversationState,
-) -> list[dict]:
+) -> list[ConnectionRecord]:
     attribute_map = {
         "ALLOWED": "allows",
         "PERMITTED": "permits",
@@ -710,7 +856,7 @@ def process_logic_relationships(
     end_nodes_reached = []
 
     for if_connection in relations_map["IF"]:
-        logic_gate = if_connection["end_node"]
+        logic_gate = if_connection.end_node
         gate_connections = get_node_connections(
             session, logic_gate, conversation_state, ROBEAU
         )
@@ -727,7 +873,7 @@ def process_logic_relationships(
             logger.info(f"No connections activated for LogicGate: {logic_gate}")
 
         end_nodes_reached = (
-            [connection["end_node"] for connection in activated_connections]
+            [connection.end_node for connection in activated_connections]
             if activated_connections
             else []
         )
@@ -736,20 +882,18 @@ def process_logic_relationships(
 
 def process_modifications_connections(
     session: Session,
-    connections: list[dict],
+    connections: list[ConnectionRecord],
     process_method,
 ):
     for connection in connections:
-        end_node = connection.get("end_node", "")
-        labels = connection.get("labels", {}).get("end", [])
-        data = connection.get("data", {}).get("end", {})
-        duration = connection.get("params", {}).get("duration")
-        process_method(end_node, labels, data, duration, session)
+        end = connection.end
+        duration = connection.params.get("duration")
+        process_method(end.text, end.labels, end.data, duration, session)
 
 
 def process_modifications_relationships(
     session: Session,
-    relationships_map: dict[str, list[dict]],
+    relationships_map: dict[str, list[ConnectionRecord]],
     conversation_state: ConversationState,
 ):
     relationship_methods = {
@@ -773,34 +917,30 @@ def process_modifications_relationships(
             process_modifications_connections(session, connections, process_method)
 
 
-def process_definitions_connections(connections: list[dict], method):
+def process_definitions_connections(connections: list[ConnectionRecord], method):
     for connection in connections:
-        node = connection.get("end_node", "")
-        duration = connection.get("params", {}).get("duration")
-        labels = connection.get("labels", {}).get("end", [])
-        method(node, labels, duration)
+        duration = connection.params.get("duration")
+        method(connection.end_node, connection.end.labels, duration)
 
 
 def process_definitions_relationships(
     session: Session,
-    relationships_map: dict[str, list[dict]],
+    relationships_map: dict[str, list[ConnectionRecord]],
     conversation_state: ConversationState,
 ):
     for relationship, connections in relationships_map.items():
         relationship_lower = relationship.lower()
         if relationship_lower in conversation_state.context:
             for connection in connections:
-                node = connection.get("end_node")
-                duration = connection.get("params", {}).get("duration")
-                labels = connection.get("labels", {}).get("end", [])
-                data = connection.get("data", {}).get("end", {})
+                node = connection.end_node
+                duration = connection.params.get("duration")
                 if not node:
                     logger.error(f"No end node for connection {connection}")
                     continue
                 conversation_state.add_item(
                     node=node,
-                    labels=labels,
-                    node_data=data,
+                    labels=connection.end.labels,
+                    node_data=connection.end.data,
                     duration=duration,
                     item_type=relationship_lower,
                 )
@@ -809,14 +949,14 @@ def process_definitions_relationships(
         handle_transmission_input(session, EXPECTATIONS_SET, conversation_state)
 
 
-def select_random_connection(connections: list[dict] | dict) -> dict:
-    if isinstance(connections, dict):  # only one connection passed
+def select_random_connection(
+    connections: list[ConnectionRecord] | ConnectionRecord,
+) -> ConnectionRecord:
+    if isinstance(connections, ConnectionRecord):  # only one connection passed
         logger.info(f"Only one connection passed: {connections}")
         return connections
 
-    weights = [
-        connection.get("params", {}).get("randomWeight") for connection in connections
-    ]
+    weights = [connection.params.get("randomWeight") for connection in connections]
 
     if None in weights:
         logger.warning(
@@ -839,43 +979,51 @@ def select_random_connection(connections: list[dict] | dict) -> dict:
     return random.choice(connections)
 
 
-def select_random_connections(random_pool_groups: list[list[dict]]) -> list[dict]:
+def select_random_connections(
+    random_pool_groups: list[list[ConnectionRecord]],
+) -> list[ConnectionRecord]:
     selected_connections = []
 
     for pooled_group in random_pool_groups:
         connection = select_random_connection(pooled_group)
-        pool_id = connection["params"].get("randomPoolId")
-        end_node = connection["end_node"]
+        pool_id = connection.params.get("randomPoolId")
+        end_node = connection.end_node
         logger.info(f"Selected end_node for random pool Id {pool_id} is: <{end_node}>")
         selected_connections.append(connection)
 
     return selected_connections
 
 
-def define_random_pools(connections: list[dict]) -> list[list[dict]]:
+def define_random_pools(
+    connections: list[ConnectionRecord],
+) -> list[list[ConnectionRecord]]:
     grouped_data = defaultdict(list)
 
     for connection in connections:
-        random_pool_id = connection["params"].get("randomPoolId", 0)
+        random_pool_id = connection.params.get("randomPoolId", 0)
         grouped_data[random_pool_id].append(connection)
 
     result = list(grouped_data.values())
 
-    if result:
+    if result and logger.isEnabledFor(logging.DEBUG):
         formatted_pools = "\n".join(
             f"\ngroup{index}:\n" + "\n".join(map(str, group))
             for index, group in enumerate(result)
         )
-        logger.info(f"Random pools defined: {formatted_pools}")
+        logger.debug("Random pools defined: %s", formatted_pools)
 
     return result
 
 
 def process_random_connections(
-    random_connection: list[dict], conversation_state: ConversationState
-) -> list[dict]:
-    random_pool_groups: list[list[dict]] = define_random_pools(random_connection)
-    selected_connections: list[dict] = select_random_connections(random_pool_groups)
+    random_connection: list[ConnectionRecord], conversation_state: ConversationState
+) -> list[ConnectionRecord]:
+    random_pool_groups: list[list[ConnectionRecord]] = define_random_pools(
+        random_connection
+    )
+    selected_connections: list[ConnectionRecord] = select_random_connections(
+        random_pool_groups
+    )
     activate_connections(
         selected_connections, conversation_state, connection_type="random"
     )
@@ -883,24 +1031,22 @@ def process_random_connections(
 
 
 def execute_attempt(
-    connection: dict,
+    connection: ConnectionRecord,
     node: str,
     conversation_state: ConversationState,
 ) -> bool:
     if any(
         node == item["node"] for item in conversation_state.context["unlocks"]
     ) or any(node == item["node"] for item in conversation_state.context["primes"]):
-        logger.info(
-            f"Successful attempt at connection: {list(connection.values())[0:3]}"
-        )
+        logger.info(f"Successful attempt at connection: {connection.summary}")
         return True
     else:
-        logger.info(f"Failed attempt at connection: {list(connection.values())[0:3]}")
+        logger.info(f"Failed attempt at connection: {connection.summary}")
     return False
 
 
 def node_is_inaccessible(
-    node: str, connection: dict, conversation_state: ConversationState
+    node: str, connection: ConnectionRecord, conversation_state: ConversationState
 ) -> bool:
     connection_locked = any(
         node == item["node"] for item in conversation_state.context["locks"]
@@ -910,15 +1056,15 @@ def node_is_inaccessible(
     )
 
     if connection_locked:
-        logger.info(f"Connection is locked: {list(connection.values())[0:3]}")
+        logger.info(f"Connection is locked: {connection.summary}")
     if connection_unprimed:
-        logger.info(f"Connection is unprimed: {list(connection.values())[0:3]}")
+        logger.info(f"Connection is unprimed: {connection.summary}")
 
     return connection_locked or connection_unprimed
 
 
 def evaluation_meets_criteria(
-    connection: dict, conversation_state: ConversationState
+    connection: ConnectionRecord, conversation_state: ConversationState
 ) -> bool:
     def assign_default_min():
         logger.info("No min value found for evaluation, defaulting to 0")
@@ -929,26 +1075,20 @@ def evaluation_meets_criteria(
         return 100
 
     for attitude, level in conversation_state.attitude_levels.items():
-        eval_min = (
-            connection.get("params", {}).get(attitude + "LevelMin")
-            or assign_default_min()
-        )
-        eval_max = (
-            connection.get("params", {}).get(attitude + "LevelMax")
-            or assign_default_max()
-        )
+        eval_min = connection.params.get(attitude + "LevelMin") or assign_default_min()
+        eval_max = connection.params.get(attitude + "LevelMax") or assign_default_max()
 
         # ! important to note that the evaluation is inclusive
 
         if eval_min <= level <= eval_max:
             logger.info(
-                f"Connection meets criteria: {list(connection.values())[0:3]} "
+                f"Connection meets criteria: {connection.summary} "
                 f"(min {eval_min} <= {attitude}: {level} <= max {eval_max})"
             )
             return True
         else:
             logger.info(
-                f"Connection does not meet criteria: {list(connection.values())[0:3]} "
+                f"Connection does not meet criteria: {connection.summary} "
                 f"(min {eval_min} <= {attitude}: {level} <= max {eval_max})"
             )
             return False
@@ -957,17 +1097,17 @@ def evaluation_meets_criteria(
 
 
 def process_activation_connections(
-    connections: list[dict],
+    connections: list[ConnectionRecord],
     conversation_state: ConversationState,
     connection_type: str,
     reset_primes: Optional[bool] = True,
-) -> list[dict]:
+) -> list[ConnectionRecord]:
     random_connections = []
     regular_connections = []
     activated_connections = []
 
     for connection in connections:
-        node = connection["end_node"]
+        node = connection.end_node
         if node_is_inaccessible(node, connection, conversation_state):
             continue
 
@@ -981,7 +1121,7 @@ def process_activation_connections(
         ):
             continue
 
-        if connection.get("params", {}).get("randomWeight"):
+        if connection.params.get("randomWeight"):
             random_connections.append(connection)
         else:
             regular_connections.append(connection)
@@ -1002,7 +1142,7 @@ def process_activation_connections(
 
 
 def process_activation_relationships(
-    relationships_map: dict[str, list[dict]],
+    relationships_map: dict[str, list[ConnectionRecord]],
     conversation_state: ConversationState,
     cutoff: Optional[bool] = False,
 ) -> list[str]:
@@ -1018,9 +1158,7 @@ def process_activation_relationships(
             reset_primes=False,
         )
         if activated_connections:
-            end_nodes_reached.extend(
-                [item["end_node"] for item in activated_connections]
-            )
+            end_nodes_reached.extend([item.end_node for item in activated_connections])
 
     if cutoff:
         priority_order = ["CUTSOFF"] + priority_order
@@ -1034,7 +1172,7 @@ def process_activation_relationships(
             )
             if activated_connections:
                 end_nodes_reached.extend(
-                    [item["end_node"] for item in activated_connections]
+                    [item.end_node for item in activated_connections]
                 )
                 break  # Stop processing further as we've found the first activated
                 # connections
@@ -1044,8 +1182,8 @@ def process_activation_relationships(
 
 def process_special_relationships(session, relationships_map, conversation_state):
     if relationships_map["REPLACES"]:
-        replacing_node = relationships_map["REPLACES"][0]["start_node"]
-        replaced_node = relationships_map["REPLACES"][0]["end_node"]
+        replacing_node = relationships_map["REPLACES"][0].start_node
+        replaced_node = relationships_map["REPLACES"][0].end_node
         logger.info(
             f"<{replacing_node}> will now be processed as if it was <{replaced_node}>"
         )
@@ -1059,7 +1197,7 @@ def process_special_relationships(session, relationships_map, conversation_state
 
 def process_relationships(
     session: Session,
-    connections: list[dict],
+    connections: list[ConnectionRecord],
     conversation_state: ConversationState,
     node: str,
     source: QuerySource,
@@ -1067,40 +1205,49 @@ def process_relationships(
     cutoff: Optional[bool] = False,
 ) -> list[str]:
 
-    def log_formatted_connections(relationships_map: dict[str, list[dict]]):
-        conns_from_map = []
-        cutoff_status = "(cutoff)" if cutoff else ""
-        for connection in relationships_map.values():
-            conns_from_map.extend(connection)
-
-        formatted_connections = "\n".join(
-            [str(connection) for connection in connections]
-        )
-        formatted_silent_connections = "\n".join(
+    def format_connections(only_silent: bool = False) -> str:
+        return "\n".join(
             [
                 str(connection)
                 for connection in connections
-                if connection["relationship"]
+                if not only_silent
+                or connection.relationship
                 not in ("CHECKS", "ATTEMPTS", "TRIGGERS", "DEFAULTS", "CUTSOFF")
             ]
         )
-        if silent and conns_from_map:
+
+    def log_formatted_connections(
+        relationships_map: dict[str, list[ConnectionRecord]],
+    ):
+        has_mapped_conns = any(relationships_map.values())
+        cutoff_status = "(cutoff)" if cutoff else ""
+
+        if silent and has_mapped_conns:
             logger.info(
-                f"Processing SILENT connections {cutoff_status} (activation relationships were not applied) "
-                f"for node <{node}> ({source.name}):\n{formatted_silent_connections}"
+                "Processing SILENT connections %s (activation relationships were not applied) "
+                "for node <%s> (%s)",
+                cutoff_status,
+                node,
+                source.name,
             )
-        elif conns_from_map:
+        elif has_mapped_conns:
             logger.info(
-                f"Processing connections for node <{node}> from source "
-                f"{source.name} {cutoff_status}:\n{formatted_connections}"
+                "Processing connections for node <%s> from source %s %s",
+                node,
+                source.name,
+                cutoff_status,
             )
-        elif not conns_from_map:
+        else:
             logger.warning(
-                f"No connections found to process in: \n{formatted_connections}\n "
-                f"Must not be bound to a valid key in the relationships_map"
+                "No connections found to process in: \n%s\n "
+                "Must not be bound to a valid key in the relationships_map",
+                LazyFormat(format_connections),
             )
+            return
+
+        logger.debug("Connections:\n%s", LazyFormat(format_connections, silent))
 
-    relationships_map: dict[str, list[dict]] = {
+    relationships_map: dict[str, list[ConnectionRecord]] = {
         # Special
         "REPLACES": [],
         # Logic checks
@@ -1131,7 +1278,7 @@ def process_relationships(
     }
 
     for connection in connections:
-        relationship = connection["relationship"]
+        relationship = connection.relationship
         if relationship in relationships_map:
             relationships_map[relationship].append(connection)
 
@@ -1185,24 +1332,20 @@ def query_database(
             listening_context = conversation_state.listening_context
 
             if listening_context:
-                queries.append(
-                    f"""
+                queries.append(f"""
                     MATCH (x:{label})-[r]->(y)
                     WHERE x.context = $listening_context
                     AND toLower(x.text) = toLower($text)
                     RETURN x, r, y
-                    """
-                )
+                    """)
             else:
                 logger.warning(f"Listening context is not set for Whisper: {text}")
         else:
-            queries.append(
-                f"""
+            queries.append(f"""
                 MATCH (x:{label})-[r]->(y)
                 WHERE toLower(x.text) = toLower($text)
                 RETURN x, r, y
-                """
-            )
+                """)
 
     if not queries:
         logger.warning("No queries were constructed. Check the labels or context.")
@@ -1399,7 +1542,7 @@ def get_node_connections(
     text: str,
     conversation_state: ConversationState,
     source: QuerySource,
-) -> list[dict] | None:
+) -> list[ConnectionRecord] | None:
 
     labels = define_labels(session, text, conversation_state, source)
 
@@ -1409,7 +1552,11 @@ def get_node_connections(
         ]  # This will not return results from the database, but it will also not throw an error. We still want to
         # call get_node_data (instead of making an early return) in order to call relevant nested functions inside.
 
-    logger.info(f"Labels for fetching <{text}> connection are {labels}")
+    logger.info("Labels for fetching <%s> connection are %s", text, labels)
+
+    prefetched = take_prefetched_connections(text, labels, conversation_state)
+    if prefetched is not None:
+        return prefetched or None
 
     result = query_database(session, text, labels, conversation_state)
 
@@ -1417,20 +1564,7 @@ def get_node_connections(
         return None
 
     result_data = [
-        {
-            "start_node": dict(record["x"])["text"],
-            "relationship": record["r"].type,
-            "end_node": dict(record["y"])["text"],
-            "params": dict(record["r"]),
-            "labels": {
-                "start": list(record["x"].labels),
-                "end": list(record["y"].labels),
-            },
-            "data": {
-                "start": {k: v for k, v in dict(record["x"]).items() if k != "text"},
-                "end": {k: v for k, v in dict(record["y"]).items() if k != "text"},
-            },
-        }
+        node_registry.connection(record["x"], record["r"], record["y"])
         for record in result
     ]
 
@@ -1452,13 +1586,15 @@ def process_node(
     log_empty_lines(logger=logger, lines=7 if main_call else 0)
 
     if input_node:
-        logger.info(f">>> Start of intermediary input process for: <{node}>")
+        logger.info(">>> Start of intermediary input process for: <%s>", node)
 
     logger.info(
-        f"Processing node: <{node}> from source {source.name}"
-        + (" (OG)" if main_call else "")
-        + (" (cutoff)" if cutoff else "")
-        + ("(initiation)" if initiated else "")
+        "Processing node: <%s> from source %s%s%s%s",
+        node,
+        source.name,
+        " (OG)" if main_call else "",
+        " (cutoff)" if cutoff else "",
+        "(initiation)" if initiated else "",
     )
 
     connections = get_node_connections(
@@ -1470,7 +1606,7 @@ def process_node(
 
     if not connections:
         logger.info(
-            f"No connection obtained for node: <{node}> from source {source.name}"
+            "No connection obtained for node: <%s> from source %s", node, source.name
         )
         return
 
@@ -1484,6 +1620,11 @@ def process_node(
         cutoff=cutoff,
     )
 
+    if PRELOAD_NEXT_VOICE_LINES and next_hop_driver and response_nodes_reached:
+        next_hop_executor.submit(
+            preload_next_hop, next_hop_driver, list(response_nodes_reached)
+        )
+
     for response_node in response_nodes_reached:
         if response_node in transmission_output_nodes:
             handle_transmission_output(response_node, conversation_state)
@@ -1503,12 +1644,14 @@ def process_node(
         )
 
     logger.info(
-        f"End of process for node: <{node}> from source {source.name}"
-        + (" (OG)" if main_call else "")
+        "End of process for node: <%s> from source %s%s",
+        node,
+        source.name,
+        " (OG)" if main_call else "",
     )
 
     if input_node:
-        logger.info(f">>> End of intermediary process for input <{node}>\n\n\n")
+        logger.info(">>> End of intermediary process for input <%s>\n\n\n", node)
 
     log_empty_lines(logger=logger, lines=7 if main_call else 0)
 
@@ -1553,7 +1696,13 @@ def establish_connection():
 
 
 def initialize():
+    global next_hop_driver
+
     driver, session = establish_connection()
+    next_hop_driver = driver
+    node_registry.clear()  # new session, new graph snapshot
+    with prefetch_lock:
+        prefetched_connections.clear()
     if not driver or not session:
         raise ConnectionError("Failed to establish connection to Neo4j database")
     conversation_state = ConversationState(logger_instance=logger)
@@ -1576,6 +1725,9 @@ def initialize():
 
 
 def cleanup(driver, session, stop_event, update_thread):
+    global next_hop_driver
+
+    next_hop_driver = None  # lookups still running fail and are skipped
     if session:
         session.close()
     if driver:
@@ -1664,6 +1816,15 @@ def handle_user_query(prompt_session, conversation_state, session):
     if user_query == "dict":
         print(conversation_state.__dict__)
 
+    if user_query.startswith("verbosity "):
+        profile = user_query.removeprefix("verbosity ").strip()
+        if profile in VERBOSITY_PROFILES:
+            set_verbosity(profile)
+            print(f"Log verbosity set to {profile}")
+        else:
+            print(f"Unknown verbosity profile, use one of {list(VERBOSITY_PROFILES)}")
+        return
+
     force, silent, user_query = check_for_particular_query(user_query)
 
     if conversation_state.unresponsive["state"]:
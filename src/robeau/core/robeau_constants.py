@@ -15,3 +15,45 @@ ROBEAU_RESPONSES_JSON_FILE_PATH = os.path.join(
 USER_LABELS = ["Prompt", "Whisper", "Plea", "Answer", "Greeting"]
 ROBEAU_LABELS = ["Response", "Question", "Test"]
 SYSTEM_LABELS = ["Input", "Output", "LogicGate", "TrafficGate"]
+
+# Audio playback
+SOUND_CACHE_MAX_BYTES = 256 * 1024 * 1024  # decoded PCM kept in memory
+PRELOAD_NEXT_VOICE_LINES = True  # decode the voice lines of the next nodes ahead
+AUDIO_SERVICE_START_TIMEOUT = 5.0  # seconds for the audio service to initialize
+
+# Mixer format, voice line assets are pre-rendered to it
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16  # signed 16 bits
+MIXER_CHANNELS = 2
+
+# Voice line assets built by scripts/build_voice_assets.py
+VOICE_ASSETS_DIR_PATH = os.path.join(ROBEAU_DIR_PATH, "data/audio/voice_lines/built")
+VOICE_ASSETS_MANIFEST_FILE_PATH = os.path.join(VOICE_ASSETS_DIR_PATH, "manifest.json")
+VOICE_LINES_TARGET_DBFS = -20.0  # average loudness
+VOICE_LINES_MAX_PEAK_DBFS = -1.0  # normalization never pushes peaks above this
+VOICE_LINES_SILENCE_THRESHOLD_DBFS = -50.0
+VOICE_LINES_KEEP_SILENCE_MS = 20  # kept on each end after trimming
+
+# Speech recognition audio, 16 bits mono
+SPEECH_RATE = 16000
+SPEECH_CHUNK = SPEECH_RATE // 10  # 100ms
+MICROPHONE_BUFFER_SECONDS = 5.0  # audio held before the microphone overruns
+
+# Prompts matched at the same time, off the event loop
+MATCHING_MAX_CONCURRENCY = 2
+
+# Speculative matching of stable interim transcripts
+SPECULATIVE_MATCHING = True
+SPECULATION_MIN_STABILITY = 0.8  # interim results above are matched ahead
+PREFETCH_TTL = 10.0  # seconds a prefetched node's connections stay usable
+
+# Voice activity detection on the microphone stream
+VAD_ENABLED = True  # otherwise every chunk is sent to the recognizer
+VAD_FRAME_MS = 20  # analysis frame, chunks are split in such frames
+VAD_SPEECH_FRAMES_RATIO = 0.3  # voiced frames needed for a chunk to be speech
+VAD_MIN_ENERGY_DBFS = -50.0  # frames below are never voiced
+VAD_ENERGY_MARGIN_DB = 9.0  # above the adaptive noise floor
+VAD_MAX_ZCR = 0.35  # zero-crossing rate above which a frame is treated as hiss
+VAD_PRE_ROLL_MS = 300  # sent before the first voiced chunk
+VAD_HANGOVER_MS = 800  # kept sending after the voice stops, ends the utterance
+VAD_KEEPALIVE_INTERVAL = 4.0  # seconds, digital silence sent while nobody talks
@@ -1,123 +1,158 @@
-import os
+import asyncio
+import logging
 import queue
 import threading
+import time
 from typing import Optional
 
-import pyaudio
-from google.cloud import speech
-
-from src.config.settings import GOOGLE_CLOUD_API_KEY
-
-RATE = 16000
-CHUNK = int(RATE / 10)  # 100ms
-
-
-if GOOGLE_CLOUD_API_KEY is None:
-    raise ValueError("Missing Google API Key")
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GOOGLE_CLOUD_API_KEY
-
-
-class MicrophoneStream:
-    """Opens a recording stream as a generator yielding the voice lines chunks."""
-
-    def __init__(
-        self, rate: int, chunk: int, pause_event: Optional[threading.Event] = None
-    ):
-        self._rate = rate
-        self._chunk = chunk
-        self._buff: queue.Queue = queue.Queue()
-        self.closed = True
-        self.pause_event = pause_event
-        self._audio_interface = None
-        self._audio_stream = None
-
-    def __enter__(self):
-        self._audio_interface = pyaudio.PyAudio()
-        self._audio_stream = self._audio_interface.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self._rate,
-            input=True,
-            frames_per_buffer=self._chunk,
-            stream_callback=self._fill_buffer,
-        )
-        self.closed = False
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback):
-        self._audio_stream.stop_stream()
-        self._audio_stream.close()
-        self.closed = True
-        self._buff.put(None)
-        self._audio_interface.terminate()
-
-    def _fill_buffer(self, in_data, _frame_count, _time_info, _status_flags):
-        self._buff.put(in_data)
-        return None, pyaudio.paContinue
-
-    def generator(self):
-        while not self.closed:
-            chunk = self._buff.get()
-            if chunk is None:
-                return
-            data = [chunk]
-            while True:
-                try:
-                    chunk = self._buff.get(block=False)
-                    if chunk is None:
-                        return
-                    data.append(chunk)
-                except queue.Empty:
-                    break
-            yield b"".join(data)
+from src.robeau.classes.microphone_stream import MicrophoneStream
+from src.robeau.classes.recognizers import (
+    RecognitionResult,
+    SpeechRecognizer,
+    create_recognizer,
+)
+from src.robeau.classes.voice_activity import Utterance
+from src.robeau.core.robeau_constants import (
+    SPECULATION_MIN_STABILITY,
+    SPECULATIVE_MATCHING,
+)
+
+# What the recognizer thread hands over to the event loop: a result, the error
+# that stopped the recognizer, or None once it is done.
+ResultsQueue = asyncio.Queue[RecognitionResult | Exception | None]
+
+
+def last_finished_utterance(stream: MicrophoneStream) -> Optional[Utterance]:
+    utterance = None
+    while True:
+        try:
+            utterance = stream.utterances.get_nowait()
+        except queue.Empty:
+            return utterance
+
+
+def pump_results(
+    recognizer: SpeechRecognizer,
+    loop: asyncio.AbstractEventLoop,
+    results: ResultsQueue,
+):
+    """Runs in the recognizer thread, the blocking backend never touches the loop."""
+
+    def put(item: RecognitionResult | Exception | None):
+        try:
+            loop.call_soon_threadsafe(results.put_nowait, item)
+        except RuntimeError:
+            pass  # loop already closed
+
+    try:
+        for result in recognizer.results():
+            put(result)
+    except Exception as e:
+        put(e)
+    finally:
+        put(None)
+
+
+async def handle_final_transcript(
+    handler, transcript: str, pause_event: Optional[threading.Event]
+):
+    try:
+        await handler.handle_message(transcript)
+    except Exception as e:
+        logging.exception(f"Error handling transcript '{transcript}': {e}")
+    finally:
+        if pause_event is not None:
+            pause_event.clear()
+            print("cleared pause event")
 
 
 async def listen_print_loop(
-    responses, handler, pause_event: Optional[threading.Event] = None
+    results: ResultsQueue,
+    handler,
+    pause_event: Optional[threading.Event] = None,
+    stream: Optional[MicrophoneStream] = None,
+):
+    """Handles each final transcript in its own task, so a long handling never
+    holds back the next results (e.g. a stop command). Stable interim transcripts
+    are handed to the handler's speculate(), when it has one."""
+    handling: set[asyncio.Task] = set()
+    speculate = getattr(handler, "speculate", None) if SPECULATIVE_MATCHING else None
+    previous_interim = ""
+
+    try:
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            if isinstance(result, Exception):
+                raise result
+            if not result.transcript:
+                continue
+
+            if result.is_final:
+                utterance = last_finished_utterance(stream) if stream else None
+                if utterance and utterance.end is not None:
+                    print(
+                        f"Final transcript {time.monotonic() - utterance.end:.2f}s "
+                        f"after the end of a {utterance.duration:.2f}s utterance"
+                    )
+                task = asyncio.create_task(
+                    handle_final_transcript(handler, result.transcript, pause_event)
+                )
+                handling.add(task)
+                task.add_done_callback(handling.discard)
+                previous_interim = ""
+            else:
+                print(f"Interim: {result.transcript}")
+                if pause_event is not None:
+                    pause_event.set()
+                # Backends without stability scores repeat unchanged interims
+                if speculate and (
+                    result.stability >= SPECULATION_MIN_STABILITY
+                    or result.transcript == previous_interim
+                ):
+                    speculate(result.transcript)
+                previous_interim = result.transcript
+    finally:
+        if handling:
+            await asyncio.gather(*handling, return_exceptions=True)
+
+
+async def stop_on_event(stop_event: asyncio.Event, recognizer: SpeechRecognizer):
+    await stop_event.wait()
+    print("Stopping speech recognition")
+    recognizer.stop()
+
+
+async def recognize_speech(
+    handler,
+    pause_event: Optional[threading.Event] = None,
+    recognizer: Optional[SpeechRecognizer] = None,
+    stop_event: Optional[asyncio.Event] = None,
 ):
-    for response in responses:
-        if not response.results:
-            continue
-        result = response.results[0]
-        if not result.alternatives:
-            continue
-        transcript = result.alternatives[0].transcript
-        if result.is_final:
-            await handler.handle_message(transcript)
-            if pause_event is not None:
-                pause_event.clear()
-                print("cleared pause event")
-        else:
-            print(f"Interim: {transcript}")
-            if pause_event is not None:
-                pause_event.set()
-
-
-# noinspection PyTypeChecker, PyArgumentList
-# Really no idea why there are so many type errors here, but it works totally fine
-async def recognize_speech(handler, pause_event: Optional[threading.Event] = None):
-    client = speech.SpeechClient()
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=RATE,
-        language_code="en-US",
+    """Recognizer defaults to the SPEECH_RECOGNIZER backend. It runs in its own
+    thread and hands its results over to the event loop through a queue; setting
+    stop_event ends the recognition."""
+    recognizer = recognizer or create_recognizer(pause_event=pause_event)
+    print(f"Listening with the {recognizer.name} speech recognizer")
+
+    results: ResultsQueue = asyncio.Queue()
+    recognizer_thread = threading.Thread(
+        target=pump_results,
+        args=(recognizer, asyncio.get_running_loop(), results),
+        name="SpeechRecognizer",
+        daemon=True,
     )
-    streaming_config = speech.StreamingRecognitionConfig(
-        config=config,
-        interim_results=True,
+    recognizer_thread.start()
+    stop_task = (
+        asyncio.create_task(stop_on_event(stop_event, recognizer))
+        if stop_event
+        else None
     )
 
-    with MicrophoneStream(RATE, CHUNK, pause_event=pause_event) as stream:
-
-        audio_generator = stream.generator()
-        requests = (
-            speech.StreamingRecognizeRequest(audio_content=content)
-            for content in audio_generator
-        )
-
-        # pylint: disable=E1123
-        responses = client.streaming_recognize(
-            config=streaming_config,
-            requests=requests,
-        )  # type: ignore
-        await listen_print_loop(responses, handler, pause_event)
+    try:
+        await listen_print_loop(results, handler, pause_event, recognizer.stream)
+    finally:
+        if stop_task:
+            stop_task.cancel()
+        recognizer.stop()
@@ -1,4 +1,5 @@
 import json
+import os
 
 
 def load_json_data(old_file_path, new_file_path):
@@ -65,8 +66,11 @@ def write_json_data(
     additions_file_path,
     deletions_file_path,
 ):
-    with open(merged_file_path, "w") as merged_file:
+    # Written aside then swapped in, the running AudioPlayer watches this file
+    temp_file_path = f"{merged_file_path}.tmp"
+    with open(temp_file_path, "w") as merged_file:
         json.dump(merged_data, merged_file, indent=4)
+    os.replace(temp_file_path, merged_file_path)
 
     with open(additions_file_path, "w") as additions_file:
         json.dump(additions_data, additions_file, indent=4)
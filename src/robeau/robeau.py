@@ -1,8 +1,10 @@
 import asyncio
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
 
-from neo4j import Session
+from neo4j import Driver, Session
 
 from src.core.constants import TERMINAL_WINDOW_SLOTS_DB_FILE_PATH
 from src.robeau.classes.sbert_matcher import SBERTMatcher  # type: ignore
@@ -12,10 +14,12 @@ from src.robeau.core.graph_logic_network import (
     initialize,
     interrupt_robeau,
     launch_specified_query,
+    prefetch_node,
     robeau_is_listening,
     robeau_is_talking,
 )
 from src.robeau.core.robeau_constants import (
+    MATCHING_MAX_CONCURRENCY,
     ROBEAU_PROMPTS_JSON_FILE_PATH as ROBEAU_PROMPTS,
 )
 from src.robeau.core.speech_recognition import recognize_speech
@@ -24,6 +28,7 @@ from src.utils.logging_utils import setup_logger
 from src.utils.script_initializer import setup_script
 
 SCRIPT_NAME = construct_script_name(__file__)
+GREETING_QUERY = "hey robeau"
 
 
 logger = setup_logger(SCRIPT_NAME)
@@ -40,7 +45,7 @@ def check_greeting_in_message(msg: str):
         greeting, _ = sbert_matcher.check_for_best_matching_synonym(
             segment, show_details=True, labels=["Greeting"]
         )
-        if greeting and "hey robeau" in greeting.lower():
+        if greeting and GREETING_QUERY in greeting.lower():
             return segment
     return None
 
@@ -55,10 +60,12 @@ def check_for_stop_command(message: str):
     return stop_command, rudeness_points
 
 
+def remove_greeting(message: str, greeting_segment: str) -> str:
+    return re.sub(re.escape(greeting_segment), "", message, count=1).strip()
+
+
 def extract_remaining_message(message: str, greeting_segment: str):
-    remaining_message = re.sub(
-        re.escape(greeting_segment), "", message, count=1
-    ).strip()
+    remaining_message = remove_greeting(message, greeting_segment)
 
     if remaining_message:
         logger.info(
@@ -78,65 +85,194 @@ def log_matching_synonym(matched_message: str | None, message: str):
         logger.info(f"Could not match prompt '{message}' with any node text.")
 
 
+def normalize_transcript(message: str) -> str:
+    return " ".join(message.split()).casefold()
+
+
+class MatchPlan(NamedTuple):
+    """What a message matched, without acting on it yet. Only valid for the
+    state it was matched in (robeau talking, listening, expected labels)."""
+
+    message: str
+    state: tuple[bool, bool, tuple[str, ...]]
+    stop_command: Optional[str] = None
+    rudeness_points: Optional[int] = None
+    greeting_segment: Optional[str] = None
+    remaining_message: str = ""
+    matched_message: Optional[str] = None
+
+
+class Speculation(NamedTuple):
+    transcript: str  # normalized
+    future: asyncio.Future
+
+
 class RobeauHandler:
+    """Matching is synchronous (SBERT, Neo4j), it runs in a small worker pool so
+    the event loop, and the stop command, stay responsive.
+
+    Stable interim transcripts can be matched speculatively: the plan is reused
+    when the final transcript is the same, and the matched node's connections
+    and audio are fetched in the meantime."""
+
     def __init__(
         self,
         session: Session,
         conversation_state: ConversationState,
+        max_concurrency: int = MATCHING_MAX_CONCURRENCY,
+        driver: Optional[Driver] = None,
     ):
         self.stop_event = asyncio.Event()
         self.session = session
+        self.driver = driver
         self.conversation_state = conversation_state
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="RobeauMatching"
+        )
+        self.matching_slots = asyncio.Semaphore(max_concurrency)
+        self.speculation: Optional[Speculation] = None
         print("Waiting for greeting...")
 
     async def handle_message(self, message: str):
+        async with self.matching_slots:
+            plan = await self.take_speculation(message)
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.dispatch_message, message, plan
+            )
+
+    def speculate(self, transcript: str):
+        """Match an interim transcript ahead of its final version. Called from
+        the event loop, replaces any previous speculation."""
+        normalized = normalize_transcript(transcript)
+        if self.speculation and self.speculation.transcript == normalized:
+            return
+        self.cancel_speculation()
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self.plan_speculatively, transcript
+        )
+        self.speculation = Speculation(normalized, future)
+
+    def cancel_speculation(self):
+        if self.speculation:
+            self.speculation.future.cancel()  # no effect once started
+            self.speculation = None
+
+    async def take_speculation(self, message: str) -> Optional[MatchPlan]:
+        speculation = self.speculation
+        self.speculation = None
+        if speculation is None:
+            return None
+        if speculation.transcript != normalize_transcript(message):
+            speculation.future.cancel()
+            logger.info(f"Speculation '{speculation.transcript}' discarded")
+            return None
+        try:
+            return await speculation.future
+        except Exception as e:
+            logger.warning(f"Speculation for '{message}' failed: {e}")
+            return None
+
+    def plan_speculatively(self, transcript: str) -> MatchPlan:
+        plan = self.plan_message(transcript)
+        if self.driver is not None:
+            nodes = []
+            if plan.greeting_segment:
+                nodes.append(GREETING_QUERY)
+            if plan.matched_message:
+                nodes.append(plan.matched_message)
+            for node in nodes:
+                try:
+                    prefetch_node(self.driver, node)
+                except Exception as e:
+                    logger.warning(f"Could not prefetch <{node}>: {e}")
+        return plan
+
+    def current_state(self) -> tuple[bool, bool, tuple[str, ...]]:
+        talking = robeau_is_talking.is_set()
+        listening = bool(robeau_is_listening(self.conversation_state))
+        labels = tuple(self.determine_labels()) if listening else ()
+        return talking, listening, labels
+
+    def plan_message(self, message: str) -> MatchPlan:
+        state = self.current_state()
+        talking, listening, labels = state
+
+        if talking:
+            stop_command, rudeness_points = check_for_stop_command(message)
+            return MatchPlan(
+                message,
+                state,
+                stop_command=stop_command,
+                rudeness_points=rudeness_points,
+            )
+
+        if not listening:
+            greeting_segment = check_greeting_in_message(message)
+            if not greeting_segment:
+                return MatchPlan(message, state)
+            remaining_message = remove_greeting(message, greeting_segment)
+            matched_message = None
+            if remaining_message:
+                matched_message, _ = sbert_matcher.check_for_best_matching_synonym(
+                    remaining_message, show_details=True, labels=["Prompt"]
+                )
+            return MatchPlan(
+                message,
+                state,
+                greeting_segment=greeting_segment,
+                remaining_message=remaining_message,
+                matched_message=matched_message,
+            )
+
+        matched_message, _ = sbert_matcher.check_for_best_matching_synonym(
+            message, show_details=True, labels=list(labels)
+        )
+        return MatchPlan(message, state, matched_message=matched_message)
 
-        if robeau_is_talking.is_set():
+    def dispatch_message(self, message: str, plan: Optional[MatchPlan] = None):
+        if plan is not None and plan.state != self.current_state():
+            logger.info(f"State changed since '{message}' was matched, matching again")
+            plan = None
+        elif plan is not None:
+            logger.info(f"Reusing the speculative match of '{message}'")
+        if plan is None:
+            plan = self.plan_message(message)
+
+        talking, listening, _ = plan.state
+
+        if talking:
             print("Robeau is talking.")
-            stop_command, rudeness_points = check_for_stop_command(message)
-            if stop_command:
+            if plan.stop_command:
                 interrupt_robeau()
-                print(f"interrupted robeau with {rudeness_points} rudeness points")
+                print(f"interrupted robeau with {plan.rudeness_points} rudeness points")
             else:
                 print("No stop command detected over robeau's speech")
 
-        elif not robeau_is_listening(self.conversation_state):
-            self.process_initial_greeting(message)
+        elif not listening:
+            self.process_initial_greeting(plan)
 
         else:
-            self.process_message(message)
+            log_matching_synonym(plan.matched_message, message)
+            if plan.matched_message:
+                self.process_node_with_message(plan.matched_message)
 
-    def process_initial_greeting(self, message: str):
-        greeting_segment = check_greeting_in_message(message)
-        if not greeting_segment:
+    def process_initial_greeting(self, plan: MatchPlan):
+        if not plan.greeting_segment:
             print("Waiting for greeting...")
             return
 
-        remaining_message = extract_remaining_message(message, greeting_segment)
+        remaining_message = extract_remaining_message(
+            plan.message, plan.greeting_segment
+        )
 
         if remaining_message:
             self.greet(silent=True)
-            self.handle_remaining_message(remaining_message)
+            log_matching_synonym(plan.matched_message, remaining_message)
+            if plan.matched_message:
+                self.process_node_with_message(plan.matched_message)
         else:
             self.greet(silent=False)
 
-    def handle_remaining_message(self, remaining_message: str):
-        matched_message, _ = sbert_matcher.check_for_best_matching_synonym(
-            remaining_message, show_details=True, labels=["Prompt"]
-        )
-        log_matching_synonym(matched_message, remaining_message)
-        if matched_message:
-            self.process_node_with_message(matched_message)
-
-    def process_message(self, message: str):
-        labels = self.determine_labels()
-        matched_message, _ = sbert_matcher.check_for_best_matching_synonym(
-            message, show_details=True, labels=labels
-        )
-        log_matching_synonym(matched_message, message)
-        if matched_message:
-            self.process_node_with_message(matched_message)
-
     def determine_labels(self):
         labels = []
         if self.conversation_state.context["listens"]:
@@ -155,7 +291,7 @@ class RobeauHandler:
 
     def greet(self, silent=False):
         launch_specified_query(
-            user_query="hey robeau",
+            user_query=GREETING_QUERY,
             query_type="greeting",
             session=self.session,
             conversation_state=self.conversation_state,
@@ -177,16 +313,15 @@ async def main():
     driver = None
     stop_event = None
     update_thread = None
+    handler = None
 
     try:
         db_conn, _ = await setup_script(SCRIPT_NAME, TERMINAL_WINDOW_SLOTS_DB_FILE_PATH)
         driver, session, conversation_state, stop_event, update_thread, pause_event = (
             initialize()
         )
-        handler = RobeauHandler(session, conversation_state)
-        recognize_task = asyncio.create_task(recognize_speech(handler, pause_event))
-        await handler.stop_event.wait()
-        await recognize_task
+        handler = RobeauHandler(session, conversation_state, driver=driver)
+        await recognize_speech(handler, pause_event, stop_event=handler.stop_event)
 
     except Exception as e:
         logging.exception(f"Unexpected error: {e}")
@@ -195,6 +330,8 @@ async def main():
     finally:
         if db_conn:
             await db_conn.close()
+        if handler:
+            handler.executor.shutdown(wait=False, cancel_futures=True)
         cleanup(driver, session, stop_event, update_thread)
 
 
@@ -0,0 +1,99 @@
+"""Replay a WAV file through a speech recognizer and time the whole path, from
+the final transcript to RobeauHandler.handle_message returning.
+
+Run from the project root, e.g.:
+python -m src.robeau.scripts.benchmark_recognition data/tests/hey_robeau.wav
+python -m src.robeau.scripts.benchmark_recognition hey_robeau.wav --backend vosk
+
+The replay backend reads its transcripts from the WAV's .json sidecar (see
+ReplayRecognizer). --handler echo skips Neo4j and SBERT to time the recognizer
+alone."""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.robeau.classes.microphone_stream import WavFileStream
+from src.robeau.classes.recognizers import RECOGNIZERS, ReplayRecognizer
+from src.robeau.core.robeau_constants import SPEECH_CHUNK, SPEECH_RATE
+from src.robeau.core.speech_recognition import recognize_speech
+
+
+class EchoHandler:
+    async def handle_message(self, message: str):
+        print(f"Final: {message}")
+
+
+class TimingHandler:
+    """Wraps a handler and records how long each message took to handle."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.durations: list[float] = []
+
+    async def handle_message(self, message: str):
+        start = time.perf_counter()
+        await self.handler.handle_message(message)
+        self.durations.append(time.perf_counter() - start)
+
+
+def make_recognizer(backend: str, wav_path: str, realtime: bool):
+    if backend == ReplayRecognizer.name:
+        return ReplayRecognizer(wav_path=wav_path, realtime=realtime)
+    stream = WavFileStream(wav_path, SPEECH_RATE, SPEECH_CHUNK, realtime=realtime)
+    return RECOGNIZERS[backend](stream=stream)
+
+
+def print_report(name: str, durations: list[float]):
+    if not durations:
+        print(f"{name}: no samples")
+        return
+    durations_ms = sorted(duration * 1000 for duration in durations)
+    p95 = durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))]
+    print(
+        f"{name}: {len(durations_ms)} samples, "
+        f"mean {statistics.mean(durations_ms):.1f}ms, "
+        f"median {statistics.median(durations_ms):.1f}ms, p95 {p95:.1f}ms, "
+        f"max {durations_ms[-1]:.1f}ms"
+    )
+
+
+async def main(wav_path: str, backend: str, handler_name: str, realtime: bool):
+    cleanup_args = None
+    if handler_name == "robeau":
+        from src.robeau.core.graph_logic_network import cleanup, initialize
+        from src.robeau.robeau import RobeauHandler
+
+        driver, session, conversation_state, stop_event, update_thread, _ = initialize()
+        cleanup_args = (driver, session, stop_event, update_thread)
+        handler = TimingHandler(RobeauHandler(session, conversation_state))
+    else:
+        handler = TimingHandler(EchoHandler())
+
+    recognizer = make_recognizer(backend, wav_path, realtime)
+    start = time.perf_counter()
+    try:
+        await recognize_speech(handler, recognizer=recognizer)
+    finally:
+        if cleanup_args:
+            cleanup(*cleanup_args)
+
+    print(f"Replayed {wav_path} with {backend} in {time.perf_counter() - start:.2f}s")
+    print_report("handle_message", handler.durations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("wav", help="16 bits mono 16kHz WAV file")
+    parser.add_argument(
+        "--backend", choices=list(RECOGNIZERS), default=ReplayRecognizer.name
+    )
+    parser.add_argument("--handler", choices=["robeau", "echo"], default="robeau")
+    parser.add_argument(
+        "--fast", action="store_true", help="feed the audio as fast as possible"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.wav, args.backend, args.handler, not args.fast))
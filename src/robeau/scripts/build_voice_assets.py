@@ -0,0 +1,174 @@
+"""Pre-render every voice line referenced in robeau_responses.json to the mixer's
+native PCM format, with normalized loudness and trimmed silence, and write a
+manifest of the built files and their durations.
+
+Run from the project root: python -m src.robeau.scripts.build_voice_assets
+Only new or modified source files are rebuilt, unless --force is given."""
+
+import argparse
+import hashlib
+import json
+import os
+
+from pydub import AudioSegment  # type: ignore
+from pydub.silence import detect_leading_silence  # type: ignore
+
+from src.robeau.core.robeau_constants import (
+    MIXER_CHANNELS,
+    MIXER_FREQUENCY,
+    MIXER_SIZE,
+    ROBEAU_DIR_PATH,
+    ROBEAU_RESPONSES_JSON_FILE_PATH,
+    VOICE_ASSETS_DIR_PATH,
+    VOICE_ASSETS_MANIFEST_FILE_PATH,
+    VOICE_LINES_KEEP_SILENCE_MS,
+    VOICE_LINES_MAX_PEAK_DBFS,
+    VOICE_LINES_SILENCE_THRESHOLD_DBFS,
+    VOICE_LINES_TARGET_DBFS,
+)
+
+MIXER_FORMAT = {
+    "frequency": MIXER_FREQUENCY,
+    "size": MIXER_SIZE,
+    "channels": MIXER_CHANNELS,
+    "target_dbfs": VOICE_LINES_TARGET_DBFS,
+}
+
+
+def load_referenced_files() -> list[str]:
+    with open(ROBEAU_RESPONSES_JSON_FILE_PATH, "r") as file:
+        nodes = json.load(file)["nodes"]
+    files = {
+        audio_file["file"]
+        for node in nodes
+        for audio_file in node.get("audio_files", [])
+        if audio_file["file"]
+    }
+    return sorted(files)
+
+
+def load_manifest() -> dict:
+    try:
+        with open(VOICE_ASSETS_MANIFEST_FILE_PATH, "r") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {"format": MIXER_FORMAT, "files": {}}
+    if manifest.get("format") != MIXER_FORMAT:
+        print("Mixer format or loudness target changed, rebuilding every asset")
+        return {"format": MIXER_FORMAT, "files": {}}
+    return manifest
+
+
+def write_manifest(manifest: dict):
+    temp_file_path = f"{VOICE_ASSETS_MANIFEST_FILE_PATH}.tmp"
+    with open(temp_file_path, "w") as file:
+        json.dump(manifest, file, indent=4)
+    os.replace(temp_file_path, VOICE_ASSETS_MANIFEST_FILE_PATH)
+
+
+def asset_name(source: str) -> str:
+    stem = os.path.splitext(os.path.basename(source.replace("\\", "/")))[0]
+    digest = hashlib.sha1(source.encode()).hexdigest()[:8]
+    return f"{stem}_{digest}.wav"
+
+
+def trim_silence(segment: AudioSegment) -> tuple[AudioSegment, int, int]:
+    lead = detect_leading_silence(
+        segment, silence_threshold=VOICE_LINES_SILENCE_THRESHOLD_DBFS
+    )
+    trail = detect_leading_silence(
+        segment.reverse(), silence_threshold=VOICE_LINES_SILENCE_THRESHOLD_DBFS
+    )
+    lead = max(lead - VOICE_LINES_KEEP_SILENCE_MS, 0)
+    trail = max(trail - VOICE_LINES_KEEP_SILENCE_MS, 0)
+    if lead + trail >= len(segment):
+        return segment, 0, 0  # silent file, leave it as is
+    return segment[lead : len(segment) - trail], lead, trail
+
+
+def normalize_loudness(segment: AudioSegment) -> tuple[AudioSegment, float]:
+    if segment.dBFS == float("-inf"):
+        return segment, 0.0
+    gain = VOICE_LINES_TARGET_DBFS - segment.dBFS
+    gain = min(gain, VOICE_LINES_MAX_PEAK_DBFS - segment.max_dBFS)
+    return segment.apply_gain(gain), gain
+
+
+def build_asset(source_path: str, asset_path: str) -> dict:
+    segment = AudioSegment.from_file(source_path)
+    segment = (
+        segment.set_frame_rate(MIXER_FREQUENCY)
+        .set_channels(MIXER_CHANNELS)
+        .set_sample_width(abs(MIXER_SIZE) // 8)
+    )
+    segment, lead, trail = trim_silence(segment)
+    segment, gain = normalize_loudness(segment)
+    segment.export(asset_path, format="wav")
+
+    return {
+        "duration": len(segment) / 1000,
+        "gain_db": round(gain, 2),
+        "trimmed_ms": [lead, trail],
+    }
+
+
+def main(force: bool = False):
+    os.makedirs(VOICE_ASSETS_DIR_PATH, exist_ok=True)
+    manifest = {"format": MIXER_FORMAT, "files": {}} if force else load_manifest()
+    previous_files = manifest["files"]
+    built_files = {}
+    built, reused, failed = 0, 0, 0
+
+    for source in load_referenced_files():
+        source_path = os.path.join(ROBEAU_DIR_PATH, source)
+        if not os.path.exists(source_path):
+            print(f'Source "{source_path}" not found, skipped')
+            failed += 1
+            continue
+
+        stat = os.stat(source_path)
+        asset = os.path.relpath(
+            os.path.join(VOICE_ASSETS_DIR_PATH, asset_name(source)), ROBEAU_DIR_PATH
+        )
+        previous = previous_files.get(source)
+        if (
+            previous
+            and previous["source_mtime"] == stat.st_mtime
+            and previous["source_size"] == stat.st_size
+            and os.path.exists(os.path.join(ROBEAU_DIR_PATH, previous["asset"]))
+        ):
+            built_files[source] = previous
+            reused += 1
+            continue
+
+        try:
+            info = build_asset(source_path, os.path.join(ROBEAU_DIR_PATH, asset))
+        except Exception as e:
+            print(f'Could not build "{source_path}": {e}')
+            failed += 1
+            continue
+
+        built_files[source] = {
+            "asset": asset,
+            "source_mtime": stat.st_mtime,
+            "source_size": stat.st_size,
+            **info,
+        }
+        built += 1
+        print(f"Built {asset} ({info['duration']:.2f}s, {info['gain_db']:+.2f} dB)")
+
+    for source, entry in previous_files.items():
+        if source not in built_files:
+            stale_asset = os.path.join(ROBEAU_DIR_PATH, entry["asset"])
+            if os.path.exists(stale_asset):
+                os.remove(stale_asset)
+
+    manifest["files"] = built_files
+    write_manifest(manifest)
+    print(f"Voice assets: {built} built, {reused} up to date, {failed} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="rebuild every asset")
+    main(parser.parse_args().force)
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.core.constants import (
+    SCHEDULER_BACKOFF_FACTOR,
+    SCHEDULER_CPU_BUDGET,
+    SCHEDULER_MAX_BACKOFF,
+)
+
+
+class StageTimings:
+    """Smoothed duration of each stage of a detector's tick (capture, scoring...)
+    and the achieved tick rate. With keep_samples, every duration is kept too,
+    e.g. for benchmarks."""
+
+    def __init__(self, smoothing: float = 0.1, keep_samples: bool = False):
+        self.smoothing = smoothing
+        self.durations: dict[str, float] = {}  # seconds, exponential moving average
+        self.samples: dict[str, list[float]] = {}
+        self.keep_samples = keep_samples
+        self.fps = 0.0
+        self._last_tick: Optional[float] = None
+
+    def record(self, name: str, duration: float):
+        previous = self.durations.get(name)
+        self.durations[name] = (
+            duration
+            if previous is None
+            else previous + self.smoothing * (duration - previous)
+        )
+        if self.keep_samples:
+            self.samples.setdefault(name, []).append(duration)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._last_tick is not None and now > self._last_tick:
+            fps = 1 / (now - self._last_tick)
+            self.fps = (
+                fps if not self.fps else self.fps + self.smoothing * (fps - self.fps)
+            )
+        self._last_tick = now
+
+    def summary(self) -> str:
+        stages = " ".join(
+            f"{name}:{duration * 1000:.1f}ms"
+            for name, duration in self.durations.items()
+        )
+        return f"{self.fps:.0f}fps {stages}"
+
+
+class AdaptiveScheduler:
+    """Paces a detector's polling loop. Each state has its own target interval,
+    stretched while nothing changes (up to max_backoff times) and back to the
+    target as soon as something does. On top of that, the loop never uses more
+    than cpu_budget of a core: a tick that cost more CPU gets a longer sleep."""
+
+    def __init__(
+        self,
+        intervals: dict[str, float],
+        default_interval: float,
+        timings: Optional[StageTimings] = None,
+        backoff_factor: float = SCHEDULER_BACKOFF_FACTOR,
+        max_backoff: float = SCHEDULER_MAX_BACKOFF,
+        cpu_budget: float = SCHEDULER_CPU_BUDGET,
+    ):
+        self.intervals = intervals
+        self.default_interval = default_interval
+        self.timings = timings if timings is not None else StageTimings()
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.cpu_budget = cpu_budget
+        self.backoff = 1.0
+        self.state: Optional[str] = None
+        self._tick_start = time.perf_counter()
+        self._tick_cpu_start = time.process_time()
+
+    def next_delay(self, state: Optional[str], changed: bool) -> float:
+        """Delay before the next tick, given the state and whether this tick saw
+        anything change."""
+        if changed or state != self.state:
+            self.backoff = 1.0
+        else:
+            self.backoff = min(self.backoff * self.backoff_factor, self.max_backoff)
+        self.state = state
+
+        elapsed = time.perf_counter() - self._tick_start
+        cpu_used = time.process_time() - self._tick_cpu_start
+        interval = (
+            self.intervals.get(state, self.default_interval)
+            if state is not None
+            else self.default_interval
+        ) * self.backoff
+        # Sleeping long enough that cpu_used / (elapsed + delay) <= cpu_budget
+        budget_delay = cpu_used / self.cpu_budget - elapsed
+        return max(interval - elapsed, budget_delay, 0.0)
+
+    async def wait(self, state: Optional[str], changed: bool):
+        """Sleep until the next tick, then start timing it."""
+        await asyncio.sleep(self.next_delay(state, changed))
+        self.timings.tick()
+        self._tick_start = time.perf_counter()
+        self._tick_cpu_start = time.process_time()
@@ -0,0 +1,279 @@
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Iterable, Optional
+
+import numpy as np
+
+from src.core.constants import (
+    FRAME_BUS_FIRST_FRAME_TIMEOUT,
+    FRAME_BUS_NAME,
+    FRAME_BUS_SLOTS,
+    FRAME_BUS_STALE_AFTER,
+    FRAME_BUS_WAIT_TIMEOUT,
+)
+from src.utils.helpers import process_is_alive
+from src.utils.screen_capture import Area, BoundingBox
+
+# Shared memory layout: a header, the sequence number and timestamp of each
+# slot, then the slots' pixels (BGRA, like mss), each block 64 bytes aligned.
+_MAGIC = 0x46425553  # "FBUS"
+_VERSION = 2
+_HEADER_FIELDS = (
+    "magic",
+    "version",
+    "height",
+    "width",
+    "channels",
+    "slots",
+    "left",
+    "top",
+    "producer_pid",
+    "written",  # frames published since the start
+    "closed",
+)
+_FIELD = {name: index for index, name in enumerate(_HEADER_FIELDS)}
+
+
+def _aligned(size: int) -> int:
+    return (size + 63) // 64 * 64
+
+
+class FrameBusError(RuntimeError):
+    pass
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    if os.name != "nt":
+        # Attaching registers the segment for removal when this process exits
+        # (Python < 3.13), which is the producer's job.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+
+class _Layout:
+    def __init__(self, buffer: memoryview, create: Optional[tuple] = None):
+        self.header = np.ndarray((len(_HEADER_FIELDS),), np.int64, buffer)
+        if create is not None:
+            self.header[:] = 0
+            height, width, channels, slots, left, top = create
+            self.header[_FIELD["magic"]] = _MAGIC
+            self.header[_FIELD["version"]] = _VERSION
+            self.header[_FIELD["height"]] = height
+            self.header[_FIELD["width"]] = width
+            self.header[_FIELD["channels"]] = channels
+            self.header[_FIELD["slots"]] = slots
+            self.header[_FIELD["left"]] = left
+            self.header[_FIELD["top"]] = top
+            self.header[_FIELD["producer_pid"]] = os.getpid()
+        elif (
+            self.header[_FIELD["magic"]] != _MAGIC
+            or self.header[_FIELD["version"]] != _VERSION
+        ):
+            raise FrameBusError("Shared memory is not a frame bus of this version")
+
+        self.slots = int(self.header[_FIELD["slots"]])
+        self.shape = (
+            int(self.header[_FIELD["height"]]),
+            int(self.header[_FIELD["width"]]),
+            int(self.header[_FIELD["channels"]]),
+        )
+        self.origin = (
+            int(self.header[_FIELD["left"]]),
+            int(self.header[_FIELD["top"]]),
+        )
+        self.producer_pid = int(self.header[_FIELD["producer_pid"]])
+
+        offset = _aligned(self.header.nbytes)
+        # Seqlock per slot: odd while the producer writes it
+        self.sequences = np.ndarray((self.slots,), np.int64, buffer, offset)
+        offset = _aligned(offset + self.sequences.nbytes)
+        self.timestamps = np.ndarray((self.slots,), np.float64, buffer, offset)
+        offset = _aligned(offset + self.timestamps.nbytes)
+        self.frames = np.ndarray((self.slots, *self.shape), np.uint8, buffer, offset)
+
+    @staticmethod
+    def size(shape: tuple[int, int, int], slots: int) -> int:
+        size = _aligned(len(_HEADER_FIELDS) * 8)
+        size += _aligned(slots * 8) * 2
+        return size + slots * shape[0] * shape[1] * shape[2]
+
+
+class FrameBusProducer:
+    """Publishes frames of a fixed screen area into a shared memory ring, read by
+    FrameBusConsumer in other processes. There is a single producer per bus."""
+
+    def __init__(
+        self,
+        area: Area,
+        channels: int = 4,
+        slots: int = FRAME_BUS_SLOTS,
+        name: str = FRAME_BUS_NAME,
+    ):
+        shape = (area["height"], area["width"], channels)
+        try:
+            self.shm = shared_memory.SharedMemory(
+                name=name, create=True, size=_Layout.size(shape, slots)
+            )
+        except FileExistsError:
+            self._unlink_stale_bus(name)
+            self.shm = shared_memory.SharedMemory(
+                name=name, create=True, size=_Layout.size(shape, slots)
+            )
+        self.layout = _Layout(self.shm.buf, (*shape, slots, area["left"], area["top"]))
+        self.area = area
+
+    @staticmethod
+    def _unlink_stale_bus(name: str):
+        """Remove a bus left over by a producer that did not exit cleanly, refuse
+        to take over one whose producer is still running."""
+        existing = shared_memory.SharedMemory(name=name)
+        try:
+            layout = _Layout(existing.buf)
+            pid = layout.producer_pid
+            closed = bool(layout.header[_FIELD["closed"]])
+            del layout  # views on the buffer must go before closing it
+        except (FrameBusError, ValueError, TypeError):
+            pid, closed = 0, True  # not a bus of this version, or truncated
+        if not closed and pid != os.getpid() and process_is_alive(pid):
+            _untrack(existing)
+            existing.close()
+            raise FrameBusError(
+                f"A frame producer (pid {pid}) is already publishing on {name}"
+            )
+        existing.close()
+        existing.unlink()
+
+    @property
+    def written(self) -> int:
+        return int(self.layout.header[_FIELD["written"]])
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        layout = self.layout
+        sequence = self.written + 1
+        slot = sequence % layout.slots
+        layout.sequences[slot] = 2 * sequence - 1  # readers retry while odd
+        layout.frames[slot] = frame
+        layout.timestamps[slot] = time.monotonic() if timestamp is None else timestamp
+        layout.sequences[slot] = 2 * sequence
+        layout.header[_FIELD["written"]] = sequence
+
+    def close(self):
+        self.layout.header[_FIELD["closed"]] = 1
+        del self.layout  # views on the buffer must go before closing it
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameBusConsumer:
+    """Reads the regions it subscribed to out of the frames published on the bus,
+    with the same interface as ScreenCaptureService so the detectors can use
+    either. Only the regions are copied out of the shared memory, never the
+    whole frame."""
+
+    def __init__(
+        self,
+        regions: Optional[dict[str, Area]] = None,
+        name: str = FRAME_BUS_NAME,
+        wait_timeout: float = FRAME_BUS_WAIT_TIMEOUT,
+    ):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError as e:
+            raise FrameBusError(
+                f"No frame bus named {name}, is the producer running?"
+            ) from e
+        _untrack(self.shm)
+
+        self.layout = _Layout(self.shm.buf)
+        left, top = self.layout.origin
+        height, width, _ = self.layout.shape
+        self.bounds = BoundingBox(left, top, left + width, top + height)
+        self.wait_timeout = wait_timeout
+        self.regions: dict[str, BoundingBox] = {}
+        self.last_sequence = 0
+        self.last_timestamp: Optional[float] = None
+        self.stale = False  # the producer stopped publishing
+        for region_name, area in (regions or {}).items():
+            self.add_region(region_name, area)
+
+    def add_region(self, name: str, area: Area):
+        self.regions[name] = self._check_inside(area)
+
+    def _check_inside(self, area: Area) -> BoundingBox:
+        box = BoundingBox.from_area(area)
+        if (
+            box.left < self.bounds.left
+            or box.top < self.bounds.top
+            or box.right > self.bounds.right
+            or box.bottom > self.bounds.bottom
+        ):
+            raise ValueError(f"{area} is not within the frame bus area {self.bounds}")
+        return box
+
+    def _slices(self, box: BoundingBox) -> tuple[slice, slice]:
+        return (
+            slice(box.top - self.bounds.top, box.bottom - self.bounds.top),
+            slice(box.left - self.bounds.left, box.right - self.bounds.left),
+        )
+
+    def _wait_for_frame(self) -> int:
+        header = self.layout.header
+        started = time.monotonic()
+        deadline = started + self.wait_timeout
+        while True:
+            if header[_FIELD["closed"]]:
+                raise FrameBusError("The frame producer closed the bus")
+            written = int(header[_FIELD["written"]])
+            if written > self.last_sequence:
+                return written
+            now = time.monotonic()
+            if now >= deadline:
+                if not process_is_alive(self.layout.producer_pid):
+                    raise FrameBusError("The frame producer exited")
+                if written:
+                    return written  # the latest frame again
+                if now - started >= FRAME_BUS_FIRST_FRAME_TIMEOUT:
+                    raise FrameBusError(
+                        f"No frame published in {FRAME_BUS_FIRST_FRAME_TIMEOUT}s"
+                    )
+                deadline = now + self.wait_timeout
+            time.sleep(0.001)
+
+    def read(self, boxes: Iterable[BoundingBox]) -> list[np.ndarray]:
+        """Copy the boxes out of the latest frame, waiting a little for one newer
+        than the last read."""
+        boxes = list(boxes)
+        layout = self.layout
+        while True:
+            sequence = self._wait_for_frame()
+            slot = sequence % layout.slots
+            if layout.sequences[slot] != 2 * sequence:
+                continue  # being overwritten by a newer frame
+            frame = layout.frames[slot]
+            regions = [frame[self._slices(box)].copy() for box in boxes]
+            timestamp = float(layout.timestamps[slot])
+            if layout.sequences[slot] == 2 * sequence:
+                break
+
+        stale = time.monotonic() - timestamp > FRAME_BUS_STALE_AFTER
+        if stale and not self.stale:
+            print(f"\nFrame bus frames are {time.monotonic() - timestamp:.1f}s old")
+        self.stale = stale
+        self.last_sequence = sequence
+        self.last_timestamp = timestamp
+        return regions
+
+    def grab(self, area: Area) -> np.ndarray:
+        return self.read([self._check_inside(area)])[0]
+
+    def grab_regions(
+        self, names: Optional[Iterable[str]] = None
+    ) -> dict[str, np.ndarray]:
+        names = list(self.regions) if names is None else list(names)
+        return dict(zip(names, self.read(self.regions[name] for name in names)))
+
+    def close(self):
+        del self.layout
+        self.shm.close()
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import cv2 as cv
+import numpy as np
+
+from src.core.constants import (
+    REPLAY_DEFAULT_FPS,
+    REPLAY_FRAMES_EXTENSIONS,
+    REPLAY_FRAMES_ORIGIN,
+)
+from src.utils.screen_capture import Area, BoundingBox
+
+
+class RecordedFrame(NamedTuple):
+    timestamp: float  # seconds since the start of the recording
+    frame: np.ndarray  # BGRA, like mss
+
+
+def sidecar_path(path: str) -> str:
+    """recording.json inside a folder of frames, the video's name with .json
+    otherwise."""
+    if os.path.isdir(path):
+        return os.path.join(path, "recording.json")
+    return f"{os.path.splitext(path)[0]}.json"
+
+
+def load_sidecar(path: str) -> dict:
+    """The recording's sidecar, empty when it has none:
+    {"fps": 30, "timestamps": [0.0, 0.033, ...],
+     "labels": {"pregame": [{"time": 1.2, "state": "hero_pick"}, ...]}}
+    Timestamps, one per frame, take precedence over the fps."""
+    try:
+        with open(sidecar_path(path), "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _folder_images(folder: str) -> Iterator[np.ndarray]:
+    filenames = sorted(
+        filename
+        for filename in os.listdir(folder)
+        if filename.lower().endswith(REPLAY_FRAMES_EXTENSIONS)
+    )
+    for filename in filenames:
+        image = cv.imread(os.path.join(folder, filename), cv.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not read the recorded frame {filename}")
+        yield image
+
+
+def _video_images(video: cv.VideoCapture) -> Iterator[np.ndarray]:
+    try:
+        while True:
+            read, image = video.read()
+            if not read:
+                return
+            yield image
+    finally:
+        video.release()
+
+
+def read_recording(
+    path: str, sidecar: Optional[dict] = None
+) -> Iterator[RecordedFrame]:
+    """Frames of a folder of images (name order) or of a video, one at a time,
+    with their timestamps."""
+    sidecar = load_sidecar(path) if sidecar is None else sidecar
+    if os.path.isdir(path):
+        images = _folder_images(path)
+        fps = sidecar.get("fps", REPLAY_DEFAULT_FPS)
+    else:
+        video = cv.VideoCapture(path)
+        if not video.isOpened():
+            raise ValueError(f"Could not open the recording {path}")
+        fps = sidecar.get("fps") or video.get(cv.CAP_PROP_FPS) or REPLAY_DEFAULT_FPS
+        images = _video_images(video)
+    timestamps = sidecar.get("timestamps")
+
+    shape = None
+    try:
+        for index, image in enumerate(images):
+            if shape is not None and image.shape != shape:
+                raise ValueError(f"Recorded frames in {path} are not all the same size")
+            shape = image.shape
+            timestamp = timestamps[index] if timestamps else index / fps
+            yield RecordedFrame(timestamp, cv.cvtColor(image, cv.COLOR_BGR2BGRA))
+    finally:
+        images.close()  # releases a video
+    if shape is None:
+        raise ValueError(f"No recorded frames in {path}")
+
+
+class ReplayCapture:
+    """Hands out regions of recorded frames, with the same interface as
+    ScreenCaptureService so the detectors can run on a recording.
+
+    Realtime, each grab gets the frame recorded at the time elapsed since the
+    first grab, skipping the frames a slow detector would have missed on a live
+    screen. Otherwise each grab gets the next frame, as fast as the detector
+    goes. Only grab_regions moves on. Once the recording is over, grabs keep
+    getting its last frame and `finished` is set."""
+
+    def __init__(
+        self,
+        path: str,
+        regions: Optional[dict[str, Area]] = None,
+        realtime: bool = True,
+        origin: Area = REPLAY_FRAMES_ORIGIN,
+    ):
+        self.path = path
+        self.sidecar = load_sidecar(path)
+        self.realtime = realtime
+        self._frames = read_recording(path, self.sidecar)
+        self.current = next(self._frames)
+        self._first_timestamp = self.current.timestamp
+        self._upcoming: Optional[RecordedFrame] = next(self._frames, None)
+        self._started_at: Optional[float] = None
+        self.grabs = 0
+        self.skipped = 0  # frames never grabbed, realtime only
+        self.finished = threading.Event()
+
+        height, width, _ = self.current.frame.shape
+        left, top = origin["left"], origin["top"]
+        self.bounds = BoundingBox(left, top, left + width, top + height)
+        self.regions: dict[str, BoundingBox] = {}
+        for name, area in (regions or {}).items():
+            self.add_region(name, area)
+
+    @property
+    def timestamp(self) -> float:
+        """Recording time of the frame last grabbed."""
+        return self.current.timestamp
+
+    def add_region(self, name: str, area: Area):
+        self.regions[name] = self._check_inside(area)
+
+    def _check_inside(self, area: Area) -> BoundingBox:
+        box = BoundingBox.from_area(area)
+        if (
+            box.left < self.bounds.left
+            or box.top < self.bounds.top
+            or box.right > self.bounds.right
+            or box.bottom > self.bounds.bottom
+        ):
+            raise ValueError(f"{area} is not within the recorded frames {self.bounds}")
+        return box
+
+    def _advance(self) -> np.ndarray:
+        self.grabs += 1
+        if self._started_at is None:
+            # The first grab gets the first frame
+            self._started_at = time.perf_counter()
+        elif self.realtime:
+            target = self._first_timestamp + time.perf_counter() - self._started_at
+            moved = False
+            while self._upcoming is not None and self._upcoming.timestamp <= target:
+                self.skipped += moved
+                self.current = self._upcoming
+                self._upcoming = next(self._frames, None)
+                moved = True
+        elif self._upcoming is not None:
+            self.current = self._upcoming
+            self._upcoming = next(self._frames, None)
+
+        if self._upcoming is None:
+            self.finished.set()
+        return self.current.frame
+
+    def _crop(self, frame: np.ndarray, box: BoundingBox) -> np.ndarray:
+        return frame[
+            box.top - self.bounds.top : box.bottom - self.bounds.top,
+            box.left - self.bounds.left : box.right - self.bounds.left,
+        ]
+
+    def grab(self, area: Area) -> np.ndarray:
+        """Any area of the current frame, without moving on to the next one (e.g.
+        to look for templates over the whole screen)."""
+        return self._crop(self.current.frame, self._check_inside(area))
+
+    def grab_regions(
+        self, names: Optional[Iterable[str]] = None
+    ) -> dict[str, np.ndarray]:
+        names = list(self.regions) if names is None else list(names)
+        frame = self._advance()
+        return {name: self._crop(frame, self.regions[name]) for name in names}
+
+    def close(self):
+        self._frames.close()
+        self.finished.set()
@@ -25,3 +25,29 @@ def construct_script_name(file_path: str) -> str:
     """
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     return base_name
+
+
+def process_is_alive(pid: int) -> bool:
+    if os.name == "nt":
+        import pywintypes
+        import win32api
+        import win32con
+        import win32process
+
+        try:
+            handle = win32api.OpenProcess(
+                win32con.PROCESS_QUERY_LIMITED_INFORMATION, False, pid
+            )
+        except pywintypes.error as e:
+            return e.winerror == 5  # access denied: it exists
+        try:
+            return win32process.GetExitCodeProcess(handle) == 259  # STILL_ACTIVE
+        finally:
+            handle.Close()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -1,9 +1,25 @@
+import atexit
+import copy
+import glob
+import heapq
 import logging
 import os
+import queue
+import re
+import shutil
+import threading
+import time
 from logging import Logger
-from typing import Literal
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Iterator, Literal, Optional
 
-from src.core.constants import COMMON_LOGS_FILE_PATH, LOG_DIR_PATH
+from src.config.settings import LOG_VERBOSITY
+from src.core.constants import (
+    COMMON_LOGS_FILE_PATH,
+    COMMON_LOGS_PARTS_DIR_PATH,
+    LOG_DIR_PATH,
+)
+from src.utils.helpers import process_is_alive
 
 LOG_LEVELS = {
     "DEBUG": logging.DEBUG,
@@ -13,44 +29,340 @@ LOG_LEVELS = {
     "CRITICAL": logging.CRITICAL,
 }
 
+# Verbosity profiles, switchable at runtime with set_verbosity(). Expensive state
+# dumps are logged at DEBUG level, so the production profile skips building them.
+VERBOSITY_PROFILES: dict[str, Literal["DEBUG", "INFO", "WARNING"]] = {
+    "debug": "DEBUG",
+    "production": "INFO",
+    "quiet": "WARNING",
+}
+
+# Log files rotation and flushing of the background writer
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_FLUSH_EVERY_RECORDS = 64
+LOG_FLUSH_INTERVAL = 0.5  # seconds
+
+LOG_FORMAT = "%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s"
+LOG_ENTRY_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} - ")
+COMMON_LOG_PART_NAME = re.compile(r"^all_logs\.(\d+)\.log$")
+
+# Loggers configured by setup_logger() without an explicit level, they follow the
+# current verbosity profile.
+_profiled_loggers: dict[str, Logger] = {}
+_current_verbosity = LOG_VERBOSITY if LOG_VERBOSITY in VERBOSITY_PROFILES else "debug"
+
+
+class LazyFormat:
+    """Log argument whose string is only built if a handler formats the record.
+    Use it with %-style logging calls, e.g.
+    logger.debug("State: %s", LazyFormat(build_state_dump, state))"""
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable[..., object], *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+    __repr__ = __str__
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that only flushes every few records or after a short
+    interval, instead of after every single record."""
+
+    def __init__(self, filename: str):
+        super().__init__(
+            filename,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.setFormatter(LogFormatter(LOG_FORMAT))
+        self._pending_records = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        # Called by StreamHandler.emit() after each record.
+        self._pending_records += 1
+        if (
+            self._pending_records >= LOG_FLUSH_EVERY_RECORDS
+            or time.monotonic() - self._last_flush >= LOG_FLUSH_INTERVAL
+        ):
+            self.force_flush()
+
+    def force_flush(self):
+        if self._pending_records:
+            super().flush()
+        self._pending_records = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.force_flush()
+        super().close()
+
+
+class LogFormatter(logging.Formatter):
+    """Writes records flagged as raw (blank lines, new entry markers) without the
+    usual prefix."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "raw", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class _ScriptLogsRouter(logging.Handler):
+    """Dispatches records to the log file of the script whose logger emitted them."""
+
+    def __init__(self):
+        super().__init__()
+        self.handlers: dict[str, BatchedRotatingFileHandler] = {}
+
+    def add_script(self, logger_name: str, file_path: str):
+        if logger_name not in self.handlers:
+            self.handlers[logger_name] = BatchedRotatingFileHandler(file_path)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        handler = self.handlers.get(record.name)
+        if handler:
+            handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+    def force_flush(self):
+        for handler in list(self.handlers.values()):
+            handler.force_flush()
+
+    flush = force_flush
+
+    def close(self):
+        for handler in list(self.handlers.values()):
+            handler.close()
+        super().close()
+
+
+class _CommonLogHandler(BatchedRotatingFileHandler):
+    """Per-process part of the common log, merged into all_logs.log on exit so
+    processes never write to the same file concurrently."""
+
+    def __init__(self):
+        os.makedirs(COMMON_LOGS_PARTS_DIR_PATH, exist_ok=True)
+        super().__init__(_common_log_part_path(os.getpid()))
+        self.addFilter(lambda record: not getattr(record, "script_only", False))
+
+
+# Arguments that cannot change before the background writer formats the record
+_DEFERRABLE_ARGS = (str, int, float, bool, bytes, type(None), LazyFormat)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves the message unformatted, so LazyFormat arguments
+    are built by the background writer rather than by the logging thread. Records
+    with other (possibly mutable) arguments or an exception are formatted here,
+    like the stock QueueHandler does."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        values = args.values() if isinstance(args, dict) else args or ()
+        if (
+            record.exc_info
+            or record.stack_info
+            or not all(isinstance(value, _DEFERRABLE_ARGS) for value in values)
+        ):
+            return super().prepare(record)
+        return copy.copy(record)
+
+
+class _BackgroundLogWriter(QueueListener):
+    """QueueListener that flushes its handlers when the queue stays idle."""
+
+    def dequeue(self, block: bool):
+        while True:
+            try:
+                return self.queue.get(block, timeout=LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.force_flush()
+
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_script_logs_router = _ScriptLogsRouter()
+_log_writer: Optional[_BackgroundLogWriter] = None
+_log_writer_lock = threading.Lock()
+
+
+def _common_log_part_path(pid: int) -> str:
+    return os.path.join(COMMON_LOGS_PARTS_DIR_PATH, f"all_logs.{pid}.log")
+
+
+def _start_log_writer():
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is not None:
+            return
+        _log_writer = _BackgroundLogWriter(
+            _log_queue, _script_logs_router, _CommonLogHandler()
+        )
+        _log_writer.start()
+        atexit.register(stop_log_writer)
+
+
+def stop_log_writer():
+    """Drain the queue, close the log files and merge this process's part of the
+    common log into all_logs.log."""
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None:
+            return
+        _log_writer.stop()
+        for handler in _log_writer.handlers:
+            handler.close()
+        _log_writer = None
+    _append_common_log_part(_common_log_part_path(os.getpid()))
+
+
+def _rotated_files_oldest_first(part_path: str) -> list[str]:
+    backups = [f"{part_path}.{index}" for index in range(LOG_BACKUP_COUNT, 0, -1)]
+    return [path for path in backups + [part_path] if os.path.exists(path)]
+
+
+def _append_common_log_part(part_path: str):
+    files = _rotated_files_oldest_first(part_path)
+    if not files:
+        return
+    with open(COMMON_LOGS_FILE_PATH, "a", encoding="utf-8") as common_log:
+        for path in files:
+            with open(path, "r", encoding="utf-8") as part:
+                shutil.copyfileobj(part, common_log)
+    for path in files:
+        os.remove(path)
+
+
+def _read_log_entries(paths: list[str]) -> Iterator[tuple[str, str]]:
+    """Yield (timestamp, text) entries, continuation lines stay with their entry."""
+    timestamp, lines = "", []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as part:
+            for line in part:
+                if LOG_ENTRY_TIMESTAMP.match(line):
+                    if lines:
+                        yield timestamp, "".join(lines)
+                    timestamp, lines = line[:23], []
+                lines.append(line)
+    if lines:
+        yield timestamp, "".join(lines)
+
+
+def merge_common_log_parts():
+    """Merge, in timestamp order, parts of the common log left behind by processes
+    that did not exit cleanly. Parts of processes still running are skipped, they
+    merge their own part on exit."""
+    claimed = []
+    for part_path in glob.glob(os.path.join(COMMON_LOGS_PARTS_DIR_PATH, "*.log")):
+        owner = COMMON_LOG_PART_NAME.match(os.path.basename(part_path))
+        if owner is None:
+            continue
+        pid = int(owner.group(1))
+        if pid == os.getpid() or process_is_alive(pid):
+            continue
+        try:
+            # Another process may be merging it at the same time
+            merging_path = f"{part_path}.merging"
+            os.replace(part_path, merging_path)
+        except OSError:
+            continue
+        claimed.append(
+            [
+                path
+                for path in _rotated_files_oldest_first(part_path)
+                if path != part_path
+            ]
+            + [merging_path]
+        )
+
+    if not claimed:
+        return
+
+    entries = heapq.merge(
+        *(_read_log_entries(paths) for paths in claimed), key=lambda entry: entry[0]
+    )
+    with open(COMMON_LOGS_FILE_PATH, "a", encoding="utf-8") as common_log:
+        for _timestamp, text in entries:
+            common_log.write(text)
+
+    for paths in claimed:
+        for path in paths:
+            os.remove(path)
+
+
+def get_verbosity() -> str:
+    return _current_verbosity
+
+
+def set_verbosity(profile: str):
+    """Switch every profiled logger of this process to the given verbosity profile."""
+    global _current_verbosity
+    if profile not in VERBOSITY_PROFILES:
+        raise ValueError(
+            f"Unknown verbosity profile {profile}, must be one of {list(VERBOSITY_PROFILES)}"
+        )
+    _current_verbosity = profile
+    level = LOG_LEVELS[VERBOSITY_PROFILES[profile]]
+    for logger in _profiled_loggers.values():
+        _apply_level(logger, level)
+
+
+def _apply_level(logger: Logger, level: int):
+    logger.setLevel(level)
+    for handler in logger.handlers:
+        handler.setLevel(level)
+
 
 def setup_logger(
     file_name: str,
-    level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "DEBUG",
+    level: Optional[Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]] = None,
 ) -> logging.Logger:
+    """Level defaults to the current verbosity profile, in which case the logger
+    also follows later calls to set_verbosity().
+
+    Records are handed to a queue and written by a single background thread per
+    process, to a rotating per-script file and to this process's part of the
+    common log."""
     script_log_file_path = os.path.join(LOG_DIR_PATH, f"{file_name}.log")
-    common_log_file_path = COMMON_LOGS_FILE_PATH
 
-    with open(script_log_file_path, "a", encoding="utf-8") as log_file:
-        log_file.write("<< New Log Entry >>\n")
+    if level is None:
+        level = VERBOSITY_PROFILES[_current_verbosity]
+        _profiled_loggers[file_name] = logging.getLogger(file_name)
+
+    _start_log_writer()
+    _script_logs_router.add_script(file_name, script_log_file_path)
 
     logger = logging.getLogger(file_name)
     if not logger.hasHandlers():
         logger.setLevel(LOG_LEVELS[level])
 
-        # Script-specific file handler with UTF-8 encoding
-        script_fh = logging.FileHandler(script_log_file_path, encoding="utf-8")
-        script_fh.setLevel(LOG_LEVELS[level])
-        formatter = logging.Formatter(
-            "%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s"
-        )
-        script_fh.setFormatter(formatter)
-        logger.addHandler(script_fh)
-
-        # Common file handler with UTF-8 encoding
-        common_fh = logging.FileHandler(common_log_file_path, encoding="utf-8")
-        common_fh.setLevel(LOG_LEVELS[level])
-        common_formatter = logging.Formatter(
-            "%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s"
-        )
-        common_fh.setFormatter(common_formatter)
-        logger.addHandler(common_fh)
+        queue_handler = _DeferredQueueHandler(_log_queue)
+        queue_handler.setLevel(LOG_LEVELS[level])
+        logger.addHandler(queue_handler)
+
+    logger.log(
+        logger.getEffectiveLevel(),
+        "<< New Log Entry >>",
+        extra={"raw": True, "script_only": True},
+    )
 
     return logger
 
 
 def log_empty_lines(logger: Logger, lines: int = 1):
-    for handler in logger.handlers:
-        if isinstance(handler, logging.FileHandler):
-            handler.stream.write(lines * "\n")
-            handler.flush()
+    if not lines or not logger.isEnabledFor(logging.INFO):
+        return
+    # The handler adds the last line break
+    logger.info("\n" * (lines - 1), extra={"raw": True})
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from src.config.settings import DETECTOR_PREVIEW
+from src.core.constants import PREVIEW_REFRESH_RATE
+from src.core.terminal_window_manager_v4 import SecondaryWindow
+
+PREVIEW_MODES = ("live", "decimated", "headless")
+
+
+class PreviewWindows:
+    """OpenCV windows previewing what a detector captures, in one of three modes:
+    - "live": shown from the capture loop, on every frame
+    - "decimated": the capture loop only hands its latest frames over, a thread
+      shows them a few times per second (PREVIEW_REFRESH_RATE)
+    - "headless": no windows at all
+
+    poll() pumps the GUI events once per frame in live mode and reports whether
+    "q" was pressed in the windows since the last poll."""
+
+    def __init__(
+        self,
+        windows: list[SecondaryWindow],
+        mode: str = DETECTOR_PREVIEW,
+        refresh_rate: float = PREVIEW_REFRESH_RATE,
+    ):
+        if mode not in PREVIEW_MODES:
+            raise ValueError(
+                f"Unknown preview mode: {mode}, use one of {PREVIEW_MODES}"
+            )
+        self.mode = mode
+        self.windows = windows if mode != "headless" else []
+        self.refresh_interval = 1 / refresh_rate
+        self._window_names: dict[str, Optional[str]] = {}  # alias -> window name
+        self._latest: dict[str, np.ndarray] = {}
+        self._created: set[str] = set()
+        self._lock = threading.Lock()
+        self._quit = threading.Event()
+        self._stop = threading.Event()
+        self.shown = threading.Event()  # the windows have been created
+        self._thread: Optional[threading.Thread] = None
+
+        if mode == "headless":
+            self.shown.set()
+        elif mode == "decimated":
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="PreviewWindows", daemon=True
+            )
+            self._thread.start()
+
+    def window_name(self, alias: str) -> Optional[str]:
+        """Name of the window whose name contains the alias, looked up once."""
+        if alias not in self._window_names:
+            self._window_names[alias] = next(
+                (window.name for window in self.windows if alias in window.name), None
+            )
+        return self._window_names[alias]
+
+    def show(self, alias: str, frame: np.ndarray):
+        if self.mode == "headless":
+            return
+        name = self.window_name(alias)
+        if name is None:
+            return
+        if self.mode == "live":
+            cv.imshow(name, frame)
+        else:
+            with self._lock:
+                self._latest[name] = frame  # frames are not reused, no copy needed
+
+    def poll(self) -> bool:
+        """Call once per frame. True when "q" was pressed in a preview window."""
+        if self.mode == "live":
+            if cv.waitKey(1) == ord("q"):
+                self._quit.set()
+            self.shown.set()
+        pressed = self._quit.is_set()
+        self._quit.clear()
+        return pressed
+
+    async def wait_shown(self, timeout: float = 5.0):
+        """Wait for the windows to exist, e.g. before arranging them."""
+        await asyncio.to_thread(self.shown.wait, timeout)
+
+    def _refresh_loop(self):
+        # HighGUI windows belong to the thread that created them, this one
+        while not self._stop.is_set():
+            with self._lock:
+                latest, self._latest = self._latest, {}
+            for name, frame in latest.items():
+                cv.imshow(name, frame)
+                self._created.add(name)
+            if cv.waitKey(1) == ord("q"):
+                self._quit.set()
+            if len(self._created) == len(self.windows):
+                self.shown.set()
+            self._stop.wait(self.refresh_interval)
+        cv.destroyAllWindows()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
@@ -0,0 +1,143 @@
+import threading
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+import mss
+import numpy as np
+from mss.base import MSSBase
+
+from src.config.settings import SCREEN_CAPTURE_SOURCE
+from src.core.constants import SCREEN_CAPTURE_MODE
+
+if TYPE_CHECKING:
+    from src.utils.frame_bus import FrameBusConsumer
+
+Area = dict[str, int]  # mss style: left, top, width, height
+
+
+class BoundingBox(NamedTuple):
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    @classmethod
+    def from_area(cls, area: Area) -> "BoundingBox":
+        return cls(
+            area["left"],
+            area["top"],
+            area["left"] + area["width"],
+            area["top"] + area["height"],
+        )
+
+    @classmethod
+    def union(cls, boxes: Iterable["BoundingBox"]) -> "BoundingBox":
+        lefts, tops, rights, bottoms = zip(*boxes)
+        return cls(min(lefts), min(tops), max(rights), max(bottoms))
+
+    def as_area(self) -> Area:
+        return {
+            "left": self.left,
+            "top": self.top,
+            "width": self.right - self.left,
+            "height": self.bottom - self.top,
+        }
+
+
+class ScreenCaptureService:
+    """Grabs all the regions a detector watches with one long-lived mss grabber,
+    instead of opening a new one per region and per frame.
+
+    In "union" mode the bounding box of the regions is grabbed once per call and
+    each region is handed out as a NumPy view into that frame (BGRA, like
+    mss). "regions" mode grabs each region on its own with the same grabber,
+    cheaper when a few tiny regions sit in opposite corners of a slow display.
+
+    mss handles are bound to the thread that created them, so each thread
+    capturing gets its own grabber."""
+
+    def __init__(
+        self,
+        regions: Optional[dict[str, Area]] = None,
+        mode: str = SCREEN_CAPTURE_MODE,
+    ):
+        if mode not in ("union", "regions"):
+            raise ValueError(f"Unknown screen capture mode: {mode}")
+        self.mode = mode
+        self.regions: dict[str, BoundingBox] = {}
+        self._union: Optional[BoundingBox] = None
+        self._local = threading.local()
+        self._grabbers: list[MSSBase] = []
+        self._grabbers_lock = threading.Lock()
+        for name, area in (regions or {}).items():
+            self.add_region(name, area)
+
+    def add_region(self, name: str, area: Area):
+        self.regions[name] = BoundingBox.from_area(area)
+        self._union = BoundingBox.union(self.regions.values())
+
+    def _grabber(self) -> MSSBase:
+        grabber = getattr(self._local, "grabber", None)
+        if grabber is None:
+            grabber = mss.mss()
+            self._local.grabber = grabber
+            with self._grabbers_lock:
+                self._grabbers.append(grabber)
+        return grabber
+
+    @property
+    def bounds(self) -> BoundingBox:
+        """The primary monitor."""
+        return BoundingBox.from_area(self._grabber().monitors[1])
+
+    def grab(self, area: Area) -> np.ndarray:
+        """Grab a single area, e.g. one that is not a registered region."""
+        # The screenshot exposes its pixels through __array_interface__, no copy
+        return np.asarray(self._grabber().grab(area))
+
+    def grab_regions(
+        self, names: Optional[Iterable[str]] = None
+    ) -> dict[str, np.ndarray]:
+        """Grab the registered regions (all of them by default) as of now. The
+        views stay valid as long as they are referenced."""
+        names = list(self.regions) if names is None else list(names)
+        if not names:
+            return {}
+
+        if self.mode == "regions":
+            return {name: self.grab(self.regions[name].as_area()) for name in names}
+
+        boxes = [self.regions[name] for name in names]
+        union = (
+            self._union if len(names) == len(self.regions) else BoundingBox.union(boxes)
+        )
+        frame = self.grab(union.as_area())
+        return {
+            name: frame[
+                box.top - union.top : box.bottom - union.top,
+                box.left - union.left : box.right - union.left,
+            ]
+            for name, box in zip(names, boxes)
+        }
+
+    def close(self):
+        """Release the grabbers of every thread."""
+        with self._grabbers_lock:
+            for grabber in self._grabbers:
+                grabber.close()
+            self._grabbers.clear()
+        self._local = threading.local()
+
+
+def create_screen_capture(
+    regions: dict[str, Area], source: str = SCREEN_CAPTURE_SOURCE
+) -> "ScreenCaptureService | FrameBusConsumer":
+    """Capture the regions from the frame bus when the source is "frame_bus" and
+    the frame producer is running, directly from the screen otherwise."""
+    if source == "frame_bus":
+        from src.utils.frame_bus import FrameBusConsumer, FrameBusError
+
+        try:
+            return FrameBusConsumer(regions)
+        except FrameBusError as e:
+            print(f"{e} Capturing the screen directly.")
+    return ScreenCaptureService(regions)
@@ -0,0 +1,85 @@
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+
+class FilterSettings(NamedTuple):
+    """A sample votes on at `enter` or above, off below `exit`, and for the
+    current state in between. The state switches once `votes` of the last
+    `window` samples are for the other state, and have been for `min_dwell`
+    seconds."""
+
+    enter: float
+    exit: float
+    window: int = 1
+    votes: int = 1
+    min_dwell: float = 0.0
+
+
+class HysteresisFilter:
+    """Turns a stream of scores into an on/off decision that does not flap when
+    the scores hover around a threshold or glitch for a frame."""
+
+    def __init__(self, settings: FilterSettings, active: bool = False):
+        if settings.exit > settings.enter:
+            raise ValueError("The exit threshold is above the enter one")
+        if not 1 <= settings.votes <= settings.window:
+            raise ValueError("Votes must be between 1 and the window size")
+        self.settings = settings
+        self._votes: deque[bool] = deque(maxlen=settings.window)
+        self._pending_since: Optional[float] = None
+        self.active = active
+
+    def reset(self, active: bool = False):
+        self._votes.clear()
+        self._pending_since = None
+        self.active = active
+
+    def update(self, value: float, now: Optional[float] = None) -> bool:
+        """Feed the latest score, get the filtered state back."""
+        now = time.monotonic() if now is None else now
+        if value >= self.settings.enter:
+            vote = True
+        elif value < self.settings.exit:
+            vote = False
+        else:
+            vote = self.active
+        self._votes.append(vote)
+
+        against = sum(vote != self.active for vote in self._votes)
+        if against < self.settings.votes:
+            self._pending_since = None
+            return self.active
+        if self._pending_since is None:
+            self._pending_since = now
+        if now - self._pending_since >= self.settings.min_dwell:
+            self.active = not self.active
+            self._pending_since = None
+            # Votes cast before the switch must not count toward switching back
+            self._votes.extend([self.active] * self.settings.window)
+        return self.active
+
+
+class FilterBank:
+    """One filter per detector. Detectors left out of an update were not scanned,
+    their filter starts over when they are scanned again."""
+
+    def __init__(self, settings: dict[str, FilterSettings]):
+        self.filters = {name: HysteresisFilter(s) for name, s in settings.items()}
+
+    def update(
+        self, values: dict[str, float], now: Optional[float] = None
+    ) -> dict[str, bool]:
+        """Filtered states of the detectors updated."""
+        now = time.monotonic() if now is None else now
+        for name, detector_filter in self.filters.items():
+            if name not in values:
+                detector_filter.reset()
+        return {
+            name: self.filters[name].update(value, now)
+            for name, value in values.items()
+        }
+
+    def reset(self):
+        for detector_filter in self.filters.values():
+            detector_filter.reset()
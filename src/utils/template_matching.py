@@ -0,0 +1,189 @@
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from src.core.constants import (
+    FRAME_CHANGE_MAX_MEAN_DIFF,
+    SKIP_UNCHANGED_FRAMES,
+    TEMPLATE_MATCHING_MODE,
+)
+
+# Same parameters as skimage.metrics.structural_similarity's defaults on uint8
+# images: 7x7 uniform windows, sample covariance, data range of 255.
+SSIM_WIN_SIZE = 7
+SSIM_DATA_RANGE = 255.0
+SSIM_C1 = (0.01 * SSIM_DATA_RANGE) ** 2
+SSIM_C2 = (0.03 * SSIM_DATA_RANGE) ** 2
+SSIM_COV_NORM = SSIM_WIN_SIZE**2 / (SSIM_WIN_SIZE**2 - 1)
+
+
+def isotonic(values: np.ndarray) -> np.ndarray:
+    """Closest non-decreasing sequence to the values (pool adjacent violators)."""
+    blocks: list[list[float]] = []  # [mean, count]
+    for value in values:
+        blocks.append([float(value), 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            mean, count = blocks.pop()
+            previous = blocks[-1]
+            previous[0] = (previous[0] * previous[1] + mean * count) / (
+                previous[1] + count
+            )
+            previous[1] += count
+    return np.concatenate([np.full(int(count), mean) for mean, count in blocks])
+
+
+def window_sums(integral: np.ndarray, size: int = SSIM_WIN_SIZE) -> np.ndarray:
+    """Sums over every size x size window lying fully inside the image, from its
+    integral image."""
+    return (
+        integral[size:, size:]
+        - integral[:-size, size:]
+        - integral[size:, :-size]
+        + integral[:-size, :-size]
+    )
+
+
+class TemplateScorer:
+    """Scores grayscale frames against a fixed template, computing the template's
+    side of the statistics once instead of on every frame.
+
+    "ssim" mode gives the same score as skimage's structural_similarity with its
+    default parameters: skimage averages the SSIM map over the windows lying
+    fully inside the image, which box sums over integral images give exactly.
+
+    "ncc" mode uses cv.matchTemplate's normalized cross-correlation, cheaper, and
+    maps it onto the SSIM scale with a curve calibrated on distorted copies of
+    the template, so the same thresholds apply in both modes.
+
+    A region mostly shows the same thing from one frame to the next, so with
+    skip_unchanged, score() returns the last score again as long as the frame
+    barely differs (mean absolute difference) from the last one scored."""
+
+    def __init__(
+        self,
+        template: np.ndarray,
+        mode: str = TEMPLATE_MATCHING_MODE,
+        skip_unchanged: bool = SKIP_UNCHANGED_FRAMES,
+        statistics: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        if template is None:
+            raise ValueError("Template image is missing")
+        if mode not in ("ssim", "ncc"):
+            raise ValueError(f"Unknown template matching mode: {mode}")
+        if min(template.shape[:2]) < SSIM_WIN_SIZE:
+            raise ValueError(f"Template is smaller than {SSIM_WIN_SIZE} pixels")
+        self.mode = mode
+        self.template = template
+        self.shape = template.shape
+
+        self._template_float = template.astype(np.float64)
+        self._mean, self._variance = (
+            statistics if statistics is not None else self.statistics(template)
+        )
+        # Terms of the SSIM formula depending on the template only
+        self._mean_term = self._mean**2 + SSIM_C1
+        self._variance_term = self._variance + SSIM_C2
+
+        self.skip_unchanged = skip_unchanged
+        self._scored_frame = np.empty_like(template)  # last frame actually scored
+        self._has_scored = False
+        self.last_score = 0.0
+        self.scored = 0
+        self.reused = 0
+
+        self._ncc_scores = np.zeros(0)
+        self._ssim_scores = np.zeros(0)
+        if mode == "ncc":
+            self.calibrate()
+
+    @staticmethod
+    def statistics(template: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Mean and variance of each SSIM window of the template, which template
+        packs store precomputed."""
+        area = SSIM_WIN_SIZE**2
+        sums, squared_sums = cv.integral2(template.astype(np.float64), sdepth=cv.CV_64F)
+        mean = window_sums(sums) / area
+        variance = SSIM_COV_NORM * (window_sums(squared_sums) / area - mean**2)
+        return mean, variance
+
+    def _check_shape(self, frame: np.ndarray):
+        if frame.shape != self.shape:
+            raise ValueError(
+                f"Frame shape {frame.shape} does not match template {self.shape}"
+            )
+
+    def ssim(self, frame: np.ndarray) -> float:
+        self._check_shape(frame)
+        area = SSIM_WIN_SIZE**2
+        sums, squared_sums = cv.integral2(frame, sdepth=cv.CV_64F, sqdepth=cv.CV_64F)
+        cross_sums = cv.integral(frame * self._template_float, sdepth=cv.CV_64F)
+
+        mean = window_sums(sums) / area
+        variance = SSIM_COV_NORM * (window_sums(squared_sums) / area - mean**2)
+        covariance = SSIM_COV_NORM * (
+            window_sums(cross_sums) / area - mean * self._mean
+        )
+
+        numerator = (2 * mean * self._mean + SSIM_C1) * (2 * covariance + SSIM_C2)
+        denominator = (mean**2 + self._mean_term) * (variance + self._variance_term)
+        return float(np.mean(numerator / denominator))
+
+    def ncc(self, frame: np.ndarray) -> float:
+        self._check_shape(frame)
+        result = cv.matchTemplate(frame, self.template, cv.TM_CCOEFF_NORMED)
+        return float(np.nan_to_num(result[0, 0]))
+
+    def unchanged(self, frame: np.ndarray) -> bool:
+        """Whether the frame is close enough to the last one scored to reuse its
+        score. Compared to the last frame scored rather than the previous one, a
+        slow drift still adds up to a rescore."""
+        if not self._has_scored or frame.shape != self.shape:
+            return False
+        difference = cv.norm(frame, self._scored_frame, cv.NORM_L1)
+        return difference <= FRAME_CHANGE_MAX_MEAN_DIFF * frame.size
+
+    def score(self, frame: np.ndarray) -> float:
+        """Match value of the frame on the SSIM scale, whatever the mode."""
+        if self.skip_unchanged and self.unchanged(frame):
+            self.reused += 1
+            return self.last_score
+
+        if self.mode == "ssim":
+            score = self.ssim(frame)
+        else:
+            score = float(
+                np.interp(self.ncc(frame), self._ncc_scores, self._ssim_scores)
+            )
+        np.copyto(self._scored_frame, frame)
+        self._has_scored = True
+        self.last_score = score
+        self.scored += 1
+        return score
+
+    def calibrate(self, frames: list[np.ndarray] | None = None):
+        """Fit the NCC to SSIM mapping on the given frames, by default on copies of
+        the template with noise, blur and blending. Shifts and lighting changes
+        are left out: NCC ranks them differently from SSIM and would blur the
+        fit."""
+        frames = frames if frames is not None else self._distorted_templates()
+        pairs = sorted((self.ncc(frame), self.ssim(frame)) for frame in frames)
+        pairs = [(-1.0, -1.0)] + pairs + [(1.0, 1.0)]
+        self._ncc_scores = np.array([ncc for ncc, _ in pairs])
+        # Monotonic fit, so a better correlation never maps to a lower score
+        self._ssim_scores = isotonic(np.array([ssim for _, ssim in pairs]))
+
+    def _distorted_templates(self) -> list[np.ndarray]:
+        rng = np.random.default_rng(0)
+        template = self._template_float
+        frames = []
+        for sigma in (2, 4, 6, 8, 10, 13, 16, 20, 25, 30, 40, 50, 65, 80):
+            frames.append(template + rng.normal(0, sigma, template.shape))
+        for kernel in (3, 5, 9):
+            frames.append(cv.blur(template, (kernel, kernel)))
+        for blend in (0.2, 0.4, 0.6, 0.8):
+            noise = rng.uniform(0, 255, template.shape)
+            frames.append(template * (1 - blend) + noise * blend)
+        frames.append(rng.uniform(0, 255, template.shape))
+        frames.append(np.full(template.shape, template.mean()))
+        return [np.clip(frame, 0, 255).astype(np.uint8) for frame in frames]
@@ -0,0 +1,102 @@
+import os
+import zipfile
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+from src.utils.template_matching import TemplateScorer
+
+
+def compile_template_pack(path: str, sources: dict[str, str]):
+    """Read the template images (grayscale) and save them with their SSIM
+    statistics in a single .npz file. Written next to it then moved in place, a
+    detector starting meanwhile never reads a partial pack."""
+    arrays = {}
+    for name, source in sources.items():
+        template = cv.imread(source, cv.IMREAD_GRAYSCALE)
+        if template is None:
+            raise ValueError(f"Could not read the template {source}")
+        arrays[name] = template
+        arrays[f"{name}.mean"], arrays[f"{name}.variance"] = TemplateScorer.statistics(
+            template
+        )
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary_path, path)
+
+
+class TemplatePack:
+    """An app's templates, compiled into one .npz file, each read from it on its
+    first use only. The pack is compiled (again) when missing or older than one
+    of its images; when it cannot be written, templates are read from their
+    images instead."""
+
+    def __init__(self, path: str, sources: dict[str, str]):
+        self.path = path
+        self.sources = sources
+        self._pack: Optional[np.lib.npyio.NpzFile] = None
+        self._opened = False
+        self._templates: dict[str, np.ndarray] = {}
+
+    def _up_to_date(self) -> bool:
+        try:
+            compiled_at = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        return all(
+            os.path.getmtime(source) <= compiled_at for source in self.sources.values()
+        )
+
+    def _open(self) -> Optional[np.lib.npyio.NpzFile]:
+        if self._opened:
+            return self._pack
+        self._opened = True
+        try:
+            if not self._up_to_date():
+                print(f"Compiling the template pack {self.path}")
+                compile_template_pack(self.path, self.sources)
+            pack = np.load(self.path)
+            if not set(self.sources) <= set(pack.files):  # templates were added
+                pack.close()
+                compile_template_pack(self.path, self.sources)
+                pack = np.load(self.path)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Template pack unavailable ({e}), reading the images instead")
+            return None
+        self._pack = pack
+        return pack
+
+    def get(self, name: str) -> np.ndarray:
+        if name not in self._templates:
+            pack = self._open()
+            self._templates[name] = (
+                pack[name]
+                if pack is not None
+                else cv.imread(self.sources[name], cv.IMREAD_GRAYSCALE)
+            )
+        return self._templates[name]
+
+    def statistics(
+        self, name: str, template: np.ndarray
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Precomputed SSIM statistics of the template, None if the template was
+        resized since (see TemplateRegistry) or the pack is unavailable."""
+        pack = self._open()
+        if pack is None or template.shape != self.get(name).shape:
+            return None
+        return pack[f"{name}.mean"], pack[f"{name}.variance"]
+
+    def scorer(
+        self, name: str, template: Optional[np.ndarray] = None
+    ) -> TemplateScorer:
+        """Scorer of the template, or of its resized version."""
+        template = self.get(name) if template is None else template
+        return TemplateScorer(template, statistics=self.statistics(name, template))
+
+    def close(self):
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+        self._opened = False
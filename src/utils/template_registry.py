@@ -0,0 +1,241 @@
+import json
+import os
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import cv2 as cv
+import numpy as np
+
+from src.core.constants import (
+    TEMPLATE_LOCATE_MIN_SCORE,
+    TEMPLATE_PYRAMID_MIN_SIZE,
+    TEMPLATE_REFERENCE_RESOLUTION,
+    TEMPLATE_REGIONS_CACHE_PATH,
+    TEMPLATE_SEARCH_SCALES,
+)
+from src.utils.screen_capture import Area, BoundingBox
+
+REFINE_MARGIN = 4  # pixels searched around the match of the coarser level
+
+
+class TemplateMatch(NamedTuple):
+    left: int  # in the frame
+    top: int
+    width: int
+    height: int
+    scale: float
+    score: float  # normalized cross-correlation
+
+
+class TemplateRegion(NamedTuple):
+    area: Area  # on screen
+    located: bool  # found on screen, rather than scaled from the reference area
+
+    def fit(self, template: np.ndarray) -> np.ndarray:
+        """The template resized to the area."""
+        width, height = self.area["width"], self.area["height"]
+        if template.shape[:2] == (height, width):
+            return template
+        return cv.resize(template, (width, height), interpolation=cv.INTER_AREA)
+
+
+def resize_template(template: np.ndarray, scale: float) -> np.ndarray:
+    if scale == 1.0:
+        return template
+    height, width = template.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv.resize(
+        template, size, interpolation=cv.INTER_AREA if scale < 1 else cv.INTER_LINEAR
+    )
+
+
+def _best_match(frame: np.ndarray, template: np.ndarray) -> tuple[float, int, int]:
+    result = cv.matchTemplate(frame, template, cv.TM_CCOEFF_NORMED)
+    _, score, _, (left, top) = cv.minMaxLoc(np.nan_to_num(result))
+    return float(score), left, top
+
+
+def pyramid_search(
+    frame: np.ndarray,
+    template: np.ndarray,
+    scales: Sequence[float],
+    min_size: int = TEMPLATE_PYRAMID_MIN_SIZE,
+) -> Optional[TemplateMatch]:
+    """Best match of the template, at any of the scales, anywhere in the frame
+    (both grayscale). The whole frame is only searched at the coarsest pyramid
+    level, each finer level just refines around the previous match."""
+    best: Optional[TemplateMatch] = None
+    frames = [frame]  # pyramid, shared by every scale
+    for scale in scales:
+        scaled = resize_template(template, scale)
+        height, width = scaled.shape[:2]
+        if height > frame.shape[0] or width > frame.shape[1]:
+            continue
+        levels = 0
+        while min(height, width) >> (levels + 1) >= min_size:
+            levels += 1
+
+        while len(frames) <= levels:
+            frames.append(cv.pyrDown(frames[-1]))
+
+        score, left, top = _best_match(
+            frames[levels], resize_template(scaled, 0.5**levels)
+        )
+        for level in range(levels - 1, -1, -1):
+            level_template = resize_template(scaled, 0.5**level)
+            level_height, level_width = level_template.shape[:2]
+            level_frame = frames[level]
+            x = max(0, 2 * left - REFINE_MARGIN)
+            y = max(0, 2 * top - REFINE_MARGIN)
+            window = level_frame[
+                y : min(level_frame.shape[0], 2 * top + level_height + REFINE_MARGIN),
+                x : min(level_frame.shape[1], 2 * left + level_width + REFINE_MARGIN),
+            ]
+            if window.shape[0] < level_height or window.shape[1] < level_width:
+                break
+            score, left, top = _best_match(window, level_template)
+            left, top = left + x, top + y
+
+        if best is None or score > best.score:
+            best = TemplateMatch(left, top, width, height, scale, score)
+    return best
+
+
+class TemplateRegistry:
+    """Works out where a detector's templates are on this monitor, once, and
+    caches it per resolution, so the areas hard-coded for the reference
+    resolution work at any other.
+
+    Each template is first checked for where its reference area lands once
+    scaled to the monitor, then searched for over the whole screen. A template
+    that is not on screen at startup (e.g. the hero pick icons while in the
+    menus) gets its scaled area, and is looked for again at the next startup.
+    One found away from its scaled area is only cached for good once found at
+    the same place at a later startup, so a lookalike on screen does not stick.
+    Delete the cache file after moving the game's UI around.
+
+    Templates are only loaded to be looked for, cached regions need none."""
+
+    def __init__(
+        self,
+        namespace: str,
+        cache_path: str = TEMPLATE_REGIONS_CACHE_PATH,
+        reference: tuple[int, int] = TEMPLATE_REFERENCE_RESOLUTION,
+        min_score: float = TEMPLATE_LOCATE_MIN_SCORE,
+    ):
+        self.namespace = namespace  # templates of different apps may share names
+        self.cache_path = cache_path
+        self.reference = reference
+        self.min_score = min_score
+        self.cache = self._load_cache()
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, "w") as file:
+            json.dump(self.cache, file, indent=2)
+
+    def resolve(
+        self, capture, areas: dict[str, Area], load: Callable[[str], np.ndarray]
+    ) -> dict[str, TemplateRegion]:
+        """Region of each template, given its area at the reference resolution
+        and how to load it. The capture only needs a `bounds` and a `grab`."""
+        bounds: BoundingBox = capture.bounds
+        resolution = f"{bounds.right - bounds.left}x{bounds.bottom - bounds.top}"
+        cached = self.cache.setdefault(resolution, {}).setdefault(self.namespace, {})
+        scale = (bounds.bottom - bounds.top) / self.reference[1]
+
+        frame = None
+        regions = {}
+        for name, area in areas.items():
+            entry = cached.get(name)
+            if entry is not None and entry.get("confirmed", True):
+                regions[name] = self._region(bounds, entry, located=True)
+                continue
+
+            if frame is None:
+                frame = cv.cvtColor(capture.grab(bounds.as_area()), cv.COLOR_BGRA2GRAY)
+            expected = self._scaled_area(bounds, area, scale)
+            match = self.locate(frame, load(name), bounds, area, scale)
+            if match is None:
+                regions[name] = self._region(bounds, expected)
+                print(f"Template {name} not on screen, using its scaled area")
+                continue
+            found = {
+                "left": match.left,
+                "top": match.top,
+                "width": match.width,
+                "height": match.height,
+                "scale": match.scale,
+                "score": round(match.score, 3),
+            }
+            found["confirmed"] = self._same_place(found, expected) or (
+                entry is not None and self._same_place(found, entry)
+            )
+            if not found["confirmed"]:
+                print(f"Template {name} found away from its area, to be confirmed")
+            cached[name] = found
+            regions[name] = self._region(bounds, found, located=True)
+            self._save_cache()
+        return regions
+
+    @staticmethod
+    def _same_place(entry: dict, other: dict) -> bool:
+        return (
+            abs(entry["left"] - other["left"]) <= REFINE_MARGIN
+            and abs(entry["top"] - other["top"]) <= REFINE_MARGIN
+        )
+
+    def locate(
+        self,
+        frame: np.ndarray,
+        template: np.ndarray,
+        bounds: BoundingBox,
+        area: Area,
+        scale: float,
+    ) -> Optional[TemplateMatch]:
+        """Where the template is in the full screen frame, if found."""
+        expected = self._scaled_area(bounds, area, scale)
+        scaled = resize_template(template, scale)
+        left, top = expected["left"], expected["top"]
+        patch = frame[top : top + scaled.shape[0], left : left + scaled.shape[1]]
+        if patch.shape == scaled.shape:
+            score = _best_match(patch, scaled)[0]
+            if score >= self.min_score:
+                return TemplateMatch(left, top, *scaled.shape[::-1], scale, score)
+
+        match = pyramid_search(
+            frame, template, [scale * factor for factor in TEMPLATE_SEARCH_SCALES]
+        )
+        return match if match is not None and match.score >= self.min_score else None
+
+    def _scaled_area(self, bounds: BoundingBox, area: Area, scale: float) -> dict:
+        """Reference area moved proportionally to the monitor, its size scaled
+        like the game's UI, with the height. Relative to the monitor."""
+        width = bounds.right - bounds.left
+        return {
+            "left": round(area["left"] * width / self.reference[0]),
+            "top": round(area["top"] * scale),
+            "width": max(1, round(area["width"] * scale)),
+            "height": max(1, round(area["height"] * scale)),
+            "scale": scale,
+        }
+
+    @staticmethod
+    def _region(
+        bounds: BoundingBox, entry: dict, located: bool = False
+    ) -> TemplateRegion:
+        width = min(entry["width"], bounds.right - bounds.left - entry["left"])
+        height = min(entry["height"], bounds.bottom - bounds.top - entry["top"])
+        area = {
+            "left": bounds.left + entry["left"],
+            "top": bounds.top + entry["top"],
+            "width": width,
+            "height": height,
+        }
+        return TemplateRegion(area, located)
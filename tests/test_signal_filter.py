@@ -0,0 +1,23 @@
+from src.utils.signal_filter import FilterSettings, HysteresisFilter
+
+
+def test_alternating_scores_do_not_flip_every_frame():
+    settings = FilterSettings(0.8, 0.7, window=3, votes=2)
+    hysteresis_filter = HysteresisFilter(settings)
+    states = [
+        hysteresis_filter.update(0.9 if frame % 2 == 0 else 0.5, now=float(frame))
+        for frame in range(30)
+    ]
+    switches = [
+        frame for frame in range(1, len(states)) if states[frame] != states[frame - 1]
+    ]
+    assert all(
+        later - earlier >= settings.window
+        for earlier, later in zip(switches, switches[1:])
+    )
+
+
+def test_steady_scores_switch_once():
+    hysteresis_filter = HysteresisFilter(FilterSettings(0.8, 0.7, window=3, votes=2))
+    states = [hysteresis_filter.update(0.9, now=float(frame)) for frame in range(5)]
+    assert states == [False, True, True, True, True]